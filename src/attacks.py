@@ -0,0 +1,217 @@
+""" This module keeps a board's attack map up to date as moves are made and taken back.
+
+Rebuilding every piece's attacks after each move repeats almost all of the work, since
+a move only changes the squares it moves from and to (and the captured pawn's or the
+castling rook's squares, and the en-passant squares). The board marks those squares
+in `changed_squares`, and
+AttackMap.update only regenerates the pieces that stood on them or whose attacks or
+pawn pushes reached them. Sliders are the only pieces whose attacks depend on other
+pieces, and a slider's attacks can only change if a square on them, up to and
+including its first blocker, changed.
+"""
+
+from src.bitboard import (SQUARE_BITS, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS,
+                          rook_attacks, bishop_attacks, queen_attacks)
+
+# Rank a pawn of each colour can still make its two square move from
+DOUBLE_PUSH_RANK = {'W': 1, 'B': 6}
+
+
+def get_piece_attacks(piece, square, occupied):
+    """
+    Returns the squares a piece attacks, given the occupancy.
+
+    Parameters:
+    piece (subclass of BasicPiece): the piece
+    square (int): square index the piece stands on
+    occupied (int): bitboard of all occupied squares
+
+    Returns:
+    attacks (int): bitboard of the attacked squares
+
+    """
+    piece_type = piece.get_piece_type()
+    if piece_type == 'pawn':
+        return PAWN_ATTACKS[piece.get_colour()][square]
+    if piece_type == 'knight':
+        return KNIGHT_ATTACKS[square]
+    if piece_type == 'bishop':
+        return bishop_attacks(square, occupied)
+    if piece_type == 'rook':
+        return rook_attacks(square, occupied)
+    if piece_type == 'queen':
+        return queen_attacks(square, occupied)
+    if piece_type == 'king':
+        return KING_ATTACKS[square]
+    return 0
+
+
+def get_push_squares(piece, square):
+    """
+    Returns the squares a pawn may push to if they are empty, or 0 for other pieces.
+    """
+    if piece.get_piece_type() != 'pawn':
+        return 0
+    colour = piece.get_colour()
+    step = 8 if colour == 'W' else -8
+    target = square + step
+    if not 0 <= target < 64:
+        return 0
+    pushes = SQUARE_BITS[target]
+    if square // 8 == DOUBLE_PUSH_RANK[colour]:
+        pushes |= SQUARE_BITS[target + step]
+    return pushes
+
+
+class AttackMap():
+    """
+    Attacks of every piece on a board, with per-square attack counts for each colour,
+    kept up to date incrementally.
+    """
+
+    def __init__(self, board):
+        """
+        Builds the map for the board's current position.
+
+        Parameters:
+        board (Board): the board to follow
+        """
+        self.board = board
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Recomputes the attacks of every piece from scratch
+        """
+        board = self.board
+        # Keyed by id(piece): two pieces promoted on the same square compare equal
+        self.pieces = {}
+        self.counts = {'W': [0] * 64, 'B': [0] * 64}
+        self.attacks = {'W': 0, 'B': 0}
+        board.changed_squares = 0
+        # Set once Board.update_moves has generated every piece's moves, after which the
+        # pieces regenerated here are collected until it next runs, keyed like pieces
+        self.moves_generated = False
+        self.stale_pieces = {}
+
+        self.updates = 0
+        self.regenerated = 0
+        self.full_rebuild_cost = 0
+        for piece in board.active_white_pieces + board.active_black_pieces:
+            self._add(piece)
+
+    def _add(self, piece):
+        """
+        Starts tracking a piece on its current square
+        """
+        square = piece.pos[1] * 8 + piece.pos[0]
+        attacks = get_piece_attacks(piece, square, self.board.occupied)
+        self.pieces[id(piece)] = (piece, square, attacks, attacks | get_push_squares(piece, square))
+        self._count(piece.get_colour(), attacks, 1)
+
+    def _remove(self, piece_id):
+        """
+        Stops tracking a piece, taking its attacks off the counts
+        """
+        (piece, _, attacks, _) = self.pieces.pop(piece_id)
+        self._count(piece.get_colour(), attacks, -1)
+
+    def _count(self, colour, attacks, change):
+        """
+        Adds change to the attack count of every square in attacks, and keeps the
+        colour's attack bitboard in step with the counts.
+        """
+        counts = self.counts[colour]
+        attacked = self.attacks[colour]
+        while attacks:
+            attack_bit = attacks & -attacks
+            attacks ^= attack_bit
+            square = attack_bit.bit_length() - 1
+            counts[square] += change
+            if counts[square]:
+                attacked |= attack_bit
+            else:
+                attacked &= ~attack_bit
+        self.attacks[colour] = attacked
+
+    def update(self):
+        """
+        Brings the map up to date with the board, regenerating only the pieces that
+        stood on a changed square, or whose attacks or pawn pushes reached one.
+
+        Parameters:
+        None
+
+        Returns:
+        pieces (list): the active pieces that were regenerated. Their move lists may
+            have changed since they were last generated.
+
+        """
+        board = self.board
+        changed = board.changed_squares
+        if not changed:
+            return []
+        board.changed_squares = 0
+        self.updates += 1
+        self.full_rebuild_cost += len(board.active_white_pieces) + len(board.active_black_pieces)
+
+        regenerated = []
+        stale_pieces = self.stale_pieces
+        for (piece_id, (piece, square, _, watched)) in list(self.pieces.items()):
+            if not (watched | SQUARE_BITS[square]) & changed:
+                continue
+            self._remove(piece_id)
+            if piece.is_active_piece and board.get_piece_from_position(piece.pos) is piece:
+                self._add(piece)
+                regenerated.append(piece)
+                stale_pieces[piece_id] = piece
+
+        # Pieces that arrived on a changed square without being tracked, ie. promotions
+        # and restored captures
+        arrivals = changed & board.occupied
+        while arrivals:
+            arrival_bit = arrivals & -arrivals
+            arrivals ^= arrival_bit
+            square = arrival_bit.bit_length() - 1
+            piece = board.board[square // 8][square % 8]
+            if id(piece) not in self.pieces:
+                self._add(piece)
+                regenerated.append(piece)
+                stale_pieces[id(piece)] = piece
+
+        self.regenerated += len(regenerated)
+        return regenerated
+
+    def get_attack_count(self, colour, pos):
+        """
+        Returns how many pieces of the given colour attack a square.
+
+        Parameters:
+        colour (str): 'W' or 'B', the attacking side
+        pos (tuple): square on the board in (file, rank) format
+
+        Returns:
+        count (int): number of attackers
+
+        """
+        return self.counts[colour][pos[1] * 8 + pos[0]]
+
+    def get_stats(self):
+        """
+        Returns how much regeneration work the incremental updates did.
+
+        Parameters:
+        None
+
+        Returns:
+        stats (dict): updates, regenerated (pieces regenerated), full_rebuild_cost (pieces
+            a full rebuild would have regenerated) and fraction (their ratio)
+
+        """
+        return {
+            'updates': self.updates,
+            'regenerated': self.regenerated,
+            'full_rebuild_cost': self.full_rebuild_cost,
+            'fraction': (self.regenerated / self.full_rebuild_cost
+                         if self.full_rebuild_cost else 0.0),
+        }
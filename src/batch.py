@@ -0,0 +1,390 @@
+""" This module packs many positions into NumPy arrays and evaluates them all at once.
+
+A PositionBatch holds N positions as
+    pieces          (N, 64) int8: 0 for an empty square, 1 to 6 for a white pawn,
+                    knight, bishop, rook, queen or king and -1 to -6 for black, indexed
+                    by square index (see src/bitboard.py)
+    white_to_move   (N,) bool
+    castling_rights (N,) uint8, the board's castling bit flags (see src/king.py)
+    en_passant      (N,) int8, the en-passant square index or -1
+    halfmove_clock  (N,) int16 and fullmove_number (N,) int32
+
+Material, piece-square and mobility scores are computed for the whole batch with a
+handful of array operations each, using the same tables as src/evaluation.py. Mobility
+works on per-position bitboards (uint64) by shifting them a square at a time, so every
+position is processed in the same call.
+
+NumPy is optional: the rest of the engine does not need it, and PositionBatch raises
+ImportError if it is not installed.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.board import Board, FEN_PIECE_KEYS, FEN_EMPTY_SQUARES, FEN_CASTLING, PIECE_TYPES
+from src.bitboard import parse_square, square_name
+from src.evaluation import PIECE_SCORES, PHASE_MAX, MG_VALUES, EG_VALUES, PHASE_WEIGHTS
+
+# Piece code of each FEN letter, ie. 'N' is 2 and 'n' is -2
+FEN_CODES = {char: (PIECE_TYPES.index(piece_type) + 1) * (1 if colour == 'W' else -1)
+             for (char, (colour, piece_type)) in FEN_PIECE_KEYS.items()}
+CODE_LETTERS = {code: char for (char, code) in FEN_CODES.items()}
+
+# Centipawns per square a knight, bishop, rook or queen can move to
+MOBILITY_WEIGHT = 2
+
+
+def _build_tables():
+    """
+    Builds the lookup tables, indexed by piece code + 6 (so that black codes are
+    valid indices) and by square index
+    """
+    mg_table = np.zeros((13, 64), dtype=np.int32)
+    eg_table = np.zeros((13, 64), dtype=np.int32)
+    mg_material = np.zeros(13, dtype=np.int32)
+    eg_material = np.zeros(13, dtype=np.int32)
+    phase_table = np.zeros(13, dtype=np.int32)
+    for (colour, piece_type), (mg_scores, eg_scores, phase) in PIECE_SCORES.items():
+        code = (PIECE_TYPES.index(piece_type) + 1) * (1 if colour == 'W' else -1) + 6
+        sign = 1 if colour == 'W' else -1
+        mg_table[code] = mg_scores
+        eg_table[code] = eg_scores
+        mg_material[code] = sign * MG_VALUES[piece_type]
+        eg_material[code] = sign * EG_VALUES[piece_type]
+        phase_table[code] = PHASE_WEIGHTS[piece_type]
+    return mg_table, eg_table, mg_material, eg_material, phase_table
+
+
+if np is not None:
+    (MG_TABLE, EG_TABLE, MG_MATERIAL, EG_MATERIAL, PHASE_TABLE) = _build_tables()
+    SQUARE_INDICES = np.arange(64)
+    PIECE_CODES = np.array([1, 2, 3, 4, 5, 6, -1, -2, -3, -4, -5, -6], dtype=np.int8)
+    CODE_COLUMNS = {int(code): column for (column, code) in enumerate(PIECE_CODES)}
+    NOT_FILE_A = np.uint64(0xFEFEFEFEFEFEFEFE)
+    NOT_FILE_H = np.uint64(0x7F7F7F7F7F7F7F7F)
+    NOT_FILES_AB = np.uint64(0xFCFCFCFCFCFCFCFC)
+    NOT_FILES_GH = np.uint64(0x3F3F3F3F3F3F3F3F)
+    # Bits set in each byte value, for counting the bits of uint64 arrays
+    BYTE_COUNTS = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+    # (shift, mask applied after the shift) for each sliding direction. Positive shifts
+    # move towards H8, and the masks stop rays wrapping round the board's edge
+    ROOK_SHIFTS = ((8, None), (-8, None), (1, NOT_FILE_A), (-1, NOT_FILE_H))
+    BISHOP_SHIFTS = ((9, NOT_FILE_A), (7, NOT_FILE_H), (-7, NOT_FILE_A), (-9, NOT_FILE_H))
+    KNIGHT_SHIFTS = ((17, NOT_FILE_A), (15, NOT_FILE_H), (10, NOT_FILES_AB), (6, NOT_FILES_GH),
+                     (-6, NOT_FILES_AB), (-10, NOT_FILES_GH), (-15, NOT_FILE_A), (-17, NOT_FILE_H))
+
+
+def _shift(bitboards, shift, mask):
+    """
+    Shifts every bitboard in an array by a number of squares, towards H8 if positive
+    """
+    if shift > 0:
+        shifted = bitboards << np.uint64(shift)
+    else:
+        shifted = bitboards >> np.uint64(-shift)
+    return shifted & mask if mask is not None else shifted
+
+
+def popcount(bitboards):
+    """
+    Counts the set bits of each bitboard in a uint64 array.
+
+    Parameters:
+    bitboards (ndarray): uint64 array of shape (N,)
+
+    Returns:
+    counts (ndarray): int64 array of shape (N,)
+
+    """
+    if hasattr(np, 'bitwise_count'):
+        # NumPy 2.0 and later count in one call
+        return np.bitwise_count(bitboards).astype(np.int64)
+    return BYTE_COUNTS[bitboards.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int64)
+
+
+def _slider_mobility(sliders, empty, allowed, shifts):
+    """
+    Counts the moves of a set of sliders, one direction at a time. Along one direction
+    a square is reached from at most one slider (the nearest one behind it blocks the
+    rest), so counting the union of the rays counts every slider's moves.
+    """
+    count = np.zeros(len(sliders), dtype=np.int64)
+    for (shift, mask) in shifts:
+        ray = sliders
+        flood = sliders
+        for _ in range(6):
+            ray = _shift(ray, shift, mask) & empty
+            flood = flood | ray
+        count += popcount(_shift(flood, shift, mask) & allowed)
+    return count
+
+
+class PositionBatch():
+    """
+    N positions packed into NumPy arrays, see the module docstring.
+    """
+
+    def __init__(self, pieces, white_to_move, castling_rights=None, en_passant=None,
+                 halfmove_clock=None, fullmove_number=None):
+        """
+        Parameters:
+        pieces (array-like): (N, 64) piece codes
+        white_to_move (array-like): (N,) True where white is to move
+        castling_rights (array-like): (N,) castling bit flags, none if not given
+        en_passant (array-like): (N,) en-passant square indices, -1 for none. None if
+            not given
+        halfmove_clock (array-like): (N,) halfmove clocks, 0 if not given
+        fullmove_number (array-like): (N,) fullmove numbers, 1 if not given
+
+        Raises:
+        ImportError: if NumPy is not installed
+        """
+        if np is None:
+            raise ImportError('PositionBatch needs NumPy, which is not installed')
+        self.pieces = np.asarray(pieces, dtype=np.int8).reshape(-1, 64)
+        size = len(self.pieces)
+        self.white_to_move = np.asarray(white_to_move, dtype=bool).reshape(size)
+        self.castling_rights = (np.zeros(size, dtype=np.uint8) if castling_rights is None
+                                else np.asarray(castling_rights, dtype=np.uint8))
+        self.en_passant = (np.full(size, -1, dtype=np.int8) if en_passant is None
+                           else np.asarray(en_passant, dtype=np.int8))
+        self.halfmove_clock = (np.zeros(size, dtype=np.int16) if halfmove_clock is None
+                               else np.asarray(halfmove_clock, dtype=np.int16))
+        self.fullmove_number = (np.ones(size, dtype=np.int32) if fullmove_number is None
+                                else np.asarray(fullmove_number, dtype=np.int32))
+
+    def __len__(self):
+        return len(self.pieces)
+
+    @classmethod
+    def from_fens(cls, fens):
+        """
+        Packs positions given in Forsyth-Edwards Notation, without building Boards.
+
+        Parameters:
+        fens (iterable of str): the positions
+
+        Returns:
+        batch (PositionBatch): the positions, in order
+
+        """
+        if np is None:
+            raise ImportError('PositionBatch needs NumPy, which is not installed')
+        rows = []
+        white_to_move = []
+        castling_rights = []
+        en_passant = []
+        halfmove_clock = []
+        fullmove_number = []
+        for fen in fens:
+            fields = fen.split()
+            row = bytearray(64)
+            rank = 7
+            index = 56
+            for char in fields[0]:
+                if char == '/':
+                    rank -= 1
+                    index = rank * 8
+                elif char in FEN_EMPTY_SQUARES:
+                    index += FEN_EMPTY_SQUARES[char]
+                else:
+                    row[index] = FEN_CODES[char] & 0xFF
+                    index += 1
+            rows.append(row)
+            white_to_move.append(len(fields) < 2 or fields[1] == 'w')
+            rights = 0
+            if len(fields) > 2 and fields[2] != '-':
+                for char in fields[2]:
+                    rights |= FEN_CASTLING[char]
+            castling_rights.append(rights)
+            if len(fields) > 3 and fields[3] != '-':
+                square = parse_square(fields[3])
+                en_passant.append(square[1] * 8 + square[0])
+            else:
+                en_passant.append(-1)
+            halfmove_clock.append(int(fields[4]) if len(fields) > 5 else 0)
+            fullmove_number.append(int(fields[5]) if len(fields) > 5 else 1)
+
+        pieces = np.frombuffer(b''.join(rows), dtype=np.int8).reshape(-1, 64)
+        return cls(pieces, white_to_move, castling_rights, en_passant,
+                   halfmove_clock, fullmove_number)
+
+    @classmethod
+    def from_boards(cls, boards):
+        """
+        Packs Boards. Each board's twelve piece bitboards are unpacked into the piece
+        codes for all boards at once.
+
+        Parameters:
+        boards (iterable of Board): the positions
+
+        Returns:
+        batch (PositionBatch): the positions, in order
+
+        """
+        if np is None:
+            raise ImportError('PositionBatch needs NumPy, which is not installed')
+        boards = list(boards)
+        bitboards = np.array([[board.piece_bitboards[colour][piece_type]
+                               for colour in ('W', 'B') for piece_type in PIECE_TYPES]
+                              for board in boards], dtype=np.uint64).reshape(-1, 12)
+        # (N, 12, 64) squares, from the little-endian bytes of each bitboard
+        squares = np.unpackbits(bitboards.astype('<u8').view(np.uint8).reshape(-1, 12, 8),
+                                axis=2, bitorder='little')
+        pieces = np.einsum('nts,t->ns', squares.astype(np.int8), PIECE_CODES).astype(np.int8)
+        return cls(
+            pieces,
+            [board.colour_to_move == 'W' for board in boards],
+            [board.castling_rights for board in boards],
+            [board.en_passant_square[1] * 8 + board.en_passant_square[0]
+             if board.en_passant_square else -1 for board in boards],
+            [board.halfmove_clock for board in boards],
+            [board.fullmove_number for board in boards])
+
+    def get_fen(self, index):
+        """
+        Returns one position of the batch in Forsyth-Edwards Notation
+        """
+        ranks = []
+        row = self.pieces[index].tolist()
+        for rank in range(7, -1, -1):
+            text = ''
+            empty = 0
+            for code in row[rank * 8:rank * 8 + 8]:
+                if code:
+                    if empty:
+                        text += str(empty)
+                        empty = 0
+                    text += CODE_LETTERS[code]
+                else:
+                    empty += 1
+            ranks.append(text + (str(empty) if empty else ''))
+        rights = int(self.castling_rights[index])
+        castling = ''.join(char for (char, right) in FEN_CASTLING.items() if rights & right) or '-'
+        en_passant = int(self.en_passant[index])
+        return (f'{"/".join(ranks)} {"w" if self.white_to_move[index] else "b"} {castling} '
+                f'{square_name(divmod(en_passant, 8)[::-1]) if en_passant >= 0 else "-"} '
+                f'{self.halfmove_clock[index]} {self.fullmove_number[index]}')
+
+    def to_boards(self):
+        """
+        Unpacks the batch into a list of Boards
+        """
+        return [Board.from_fen(self.get_fen(index)) for index in range(len(self))]
+
+    def get_piece_bitboards(self):
+        """
+        Returns the bitboard of each kind of piece in each position, all in one pass.
+
+        Parameters:
+        None
+
+        Returns:
+        bitboards (ndarray): uint64 array of shape (N, 12), one column per piece code in
+            PIECE_CODES order (white pawn to king, then black pawn to king)
+
+        """
+        squares = self.pieces[:, None, :] == PIECE_CODES[None, :, None]
+        packed = np.packbits(squares, axis=2, bitorder='little')
+        return packed.view('<u8').reshape(-1, 12).astype(np.uint64)
+
+    def get_bitboards(self, codes, piece_bitboards=None):
+        """
+        Returns, for each position, the bitboard of the squares holding any of the given
+        piece codes.
+
+        Parameters:
+        codes (iterable of int): piece codes, ie. (2, 3) for white knights and bishops
+        piece_bitboards (ndarray): the result of get_piece_bitboards, if already made
+
+        Returns:
+        bitboards (ndarray): uint64 array of shape (N,)
+
+        """
+        if piece_bitboards is None:
+            piece_bitboards = self.get_piece_bitboards()
+        columns = [CODE_COLUMNS[code] for code in codes]
+        return np.bitwise_or.reduce(piece_bitboards[:, columns], axis=1)
+
+    def get_phase(self):
+        """
+        Returns the game phase of each position, see src/evaluation.py
+        """
+        return np.minimum(PHASE_TABLE[self.pieces + 6].sum(axis=1), PHASE_MAX)
+
+    def _taper(self, mg_scores, eg_scores):
+        """
+        Blends middlegame and endgame scores by phase, rounding towards zero like
+        evaluation.evaluate
+        """
+        phase = self.get_phase()
+        return np.trunc((mg_scores * phase + eg_scores * (PHASE_MAX - phase)) / PHASE_MAX).astype(np.int64)
+
+    def get_material(self):
+        """
+        Returns the material balance of each position in centipawns, white minus black,
+        tapered between the middlegame and endgame values
+        """
+        codes = self.pieces + 6
+        return self._taper(MG_MATERIAL[codes].sum(axis=1), EG_MATERIAL[codes].sum(axis=1))
+
+    def get_piece_square_scores(self):
+        """
+        Returns material plus piece-square scores of each position, white minus black.
+        The same as evaluation.evaluate from white's point of view.
+        """
+        codes = self.pieces + 6
+        return self._taper(MG_TABLE[codes, SQUARE_INDICES].sum(axis=1),
+                           EG_TABLE[codes, SQUARE_INDICES].sum(axis=1))
+
+    def get_mobility(self):
+        """
+        Returns the mobility of each position, white minus black: the number of squares
+        each knight, bishop, rook and queen attacks that do not hold a piece of its own
+        colour, summed over the pieces. Pins and checks are not taken into account.
+
+        Parameters:
+        None
+
+        Returns:
+        mobility (ndarray): int64 array of shape (N,)
+
+        """
+        piece_bitboards = self.get_piece_bitboards()
+        white = self.get_bitboards((1, 2, 3, 4, 5, 6), piece_bitboards)
+        black = self.get_bitboards((-1, -2, -3, -4, -5, -6), piece_bitboards)
+        empty = ~(white | black)
+        mobility = np.zeros(len(self), dtype=np.int64)
+        for (sign, own, codes) in ((1, white, (2, 3, 4, 5)), (-1, black, (-2, -3, -4, -5))):
+            allowed = ~own
+            knights = self.get_bitboards(codes[:1], piece_bitboards)
+            diagonal = self.get_bitboards((codes[1], codes[3]), piece_bitboards)
+            straight = self.get_bitboards((codes[2], codes[3]), piece_bitboards)
+            count = _slider_mobility(diagonal, empty, allowed, BISHOP_SHIFTS)
+            count += _slider_mobility(straight, empty, allowed, ROOK_SHIFTS)
+            # A knight jump lands each square from one knight at most
+            for (shift, mask) in KNIGHT_SHIFTS:
+                count += popcount(_shift(knights, shift, mask) & allowed)
+            mobility += sign * count
+        return mobility
+
+    def evaluate(self, mobility_weight=MOBILITY_WEIGHT):
+        """
+        Scores every position in the batch.
+
+        Parameters:
+        mobility_weight (int): centipawns per square of mobility. With 0 the scores
+            are the same as evaluation.evaluate's
+
+        Returns:
+        scores (ndarray): int64 array of shape (N,), in centipawns from the side to
+            move's point of view
+
+        """
+        scores = self.get_piece_square_scores()
+        if mobility_weight:
+            scores = scores + mobility_weight * self.get_mobility()
+        return np.where(self.white_to_move, scores, -scores)
@@ -0,0 +1,237 @@
+""" This module times the parts of the engine that handle many positions at once.
+
+Run from the repository root, ie.
+    python -m src.benchmark fen 100000
+    python -m src.benchmark pgn 1000
+    python -m src.benchmark batch 100000
+    python -m src.benchmark smp 6
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from src.batch import PositionBatch
+from src.board import Board
+from src.evaluation import evaluate
+from src.perft import REFERENCE_POSITIONS
+from src.pgn import iter_games, game_to_pgn
+from src.smp import parallel_search
+from src.transposition import SharedTranspositionTable
+
+# Positions to cycle through when no others are given
+BENCHMARK_FENS = [fen for (_, fen, _) in REFERENCE_POSITIONS]
+
+# Numbers of processes to time the parallel search with, up to the number of CPUs
+SMP_WORKER_COUNTS = (1, 2, 4, 8, 16, 32)
+
+
+def benchmark_fen(count, fens=BENCHMARK_FENS, output=sys.stdout):
+    """
+    Times parsing positions with Board.from_fen and writing them back with Board.to_fen.
+
+    Parameters:
+    count (int): number of positions to parse and write
+    fens (list): positions to cycle through
+    output (file): where to write the report
+
+    Returns:
+    results (dict): count, parse_seconds, parse_per_second, export_seconds and
+        export_per_second
+
+    """
+    from_fen = Board.from_fen
+    start = time.perf_counter()
+    for index in range(count):
+        from_fen(fens[index % len(fens)])
+    parse_seconds = time.perf_counter() - start
+
+    boards = [from_fen(fen) for fen in fens]
+    start = time.perf_counter()
+    for index in range(count):
+        boards[index % len(boards)].to_fen()
+    export_seconds = time.perf_counter() - start
+
+    results = {
+        'count': count,
+        'parse_seconds': parse_seconds,
+        'parse_per_second': count / parse_seconds if parse_seconds > 0 else 0.0,
+        'export_seconds': export_seconds,
+        'export_per_second': count / export_seconds if export_seconds > 0 else 0.0,
+    }
+    output.write(f'from_fen: {count} positions in {parse_seconds:.3f}s '
+                 f'({results["parse_per_second"]:.0f} positions/s)\n'
+                 f'to_fen:   {count} positions in {export_seconds:.3f}s '
+                 f'({results["export_per_second"]:.0f} positions/s)\n')
+    return results
+
+
+def make_sample_game(seed, plies=80):
+    """
+    Plays a game of random legal moves from the starting position and returns it as
+    PGN text. The same seed always gives the same game.
+    """
+    choose = random.Random(seed).choice
+    board = Board.from_fen()
+    for _ in range(plies):
+        moves = board.get_legal_moves()
+        if not moves:
+            break
+        board.make_move(choose(moves))
+    return game_to_pgn(board, {'Event': 'benchmark', 'Round': str(seed)})
+
+
+def benchmark_pgn(count, output=sys.stdout):
+    """
+    Times streaming games out of a PGN file, both reading the movetext alone and
+    replaying every game into a Board.
+
+    Parameters:
+    count (int): number of games in the file
+    output (file): where to write the report
+
+    Returns:
+    results (dict): count, scan_seconds, scan_per_second, replay_seconds and
+        replay_per_second
+
+    """
+    # A handful of distinct games, repeated to fill the file
+    games = [make_sample_game(seed) for seed in range(min(count, 20))]
+    handle, path = tempfile.mkstemp(suffix='.pgn')
+    try:
+        with os.fdopen(handle, 'w') as file:
+            for index in range(count):
+                file.write(games[index % len(games)])
+
+        start = time.perf_counter()
+        for game in iter_games(path):
+            game.get_moves()
+        scan_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for game in iter_games(path):
+            game.replay()
+        replay_seconds = time.perf_counter() - start
+    finally:
+        os.remove(path)
+
+    results = {
+        'count': count,
+        'scan_seconds': scan_seconds,
+        'scan_per_second': count / scan_seconds if scan_seconds > 0 else 0.0,
+        'replay_seconds': replay_seconds,
+        'replay_per_second': count / replay_seconds if replay_seconds > 0 else 0.0,
+    }
+    output.write(f'scan:   {count} games in {scan_seconds:.3f}s '
+                 f'({results["scan_per_second"]:.0f} games/s)\n'
+                 f'replay: {count} games in {replay_seconds:.3f}s '
+                 f'({results["replay_per_second"]:.0f} games/s)\n')
+    return results
+
+
+def benchmark_batch(count, fens=BENCHMARK_FENS, output=sys.stdout):
+    """
+    Times packing positions into a PositionBatch and evaluating them all at once,
+    against building a Board and evaluating it one position at a time.
+
+    Parameters:
+    count (int): number of positions
+    fens (list): positions to cycle through
+    output (file): where to write the report
+
+    Returns:
+    results (dict): count, and the seconds and positions per second of pack, evaluate
+        (the batch's material, piece-square and mobility scores) and single (one
+        Board.from_fen and evaluation.evaluate per position)
+
+    Raises:
+    ImportError: if NumPy is not installed
+
+    """
+    fens = [fens[index % len(fens)] for index in range(count)]
+    start = time.perf_counter()
+    batch = PositionBatch.from_fens(fens)
+    pack_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch.evaluate()
+    evaluate_seconds = time.perf_counter() - start
+
+    from_fen = Board.from_fen
+    start = time.perf_counter()
+    for fen in fens:
+        evaluate(from_fen(fen))
+    single_seconds = time.perf_counter() - start
+
+    results = {'count': count}
+    lines = []
+    for (name, seconds) in (('pack', pack_seconds), ('evaluate', evaluate_seconds),
+                            ('single', single_seconds)):
+        per_second = count / seconds if seconds > 0 else 0.0
+        results[f'{name}_seconds'] = seconds
+        results[f'{name}_per_second'] = per_second
+        lines.append(f'{name + ":":<10}{count} positions in {seconds:.3f}s ({per_second:.0f} positions/s)\n')
+    output.write(''.join(lines))
+    return results
+
+
+def benchmark_smp(depth, fens=BENCHMARK_FENS, worker_counts=None, output=sys.stdout):
+    """
+    Times the parallel search (see src/smp.py) to a fixed depth with more and more
+    processes, each time with an empty transposition table.
+
+    Parameters:
+    depth (int): depth to search each position to
+    fens (list): positions to search
+    worker_counts (list): numbers of processes to try. Those of SMP_WORKER_COUNTS up to
+        the number of CPUs if None
+    output (file): where to write the report
+
+    Returns:
+    results (dict): depth, and for each number of processes, in worker_counts order:
+        workers, seconds (summed over the positions, from the start of each main
+        search), speedup (against the first number of processes) and nodes (searched
+        by all the processes)
+
+    """
+    if worker_counts is None:
+        worker_counts = [workers for workers in SMP_WORKER_COUNTS if workers <= (os.cpu_count() or 1)]
+    results = {'depth': depth, 'workers': [], 'seconds': [], 'speedup': [], 'nodes': []}
+    lines = []
+    for workers in worker_counts:
+        seconds = nodes = 0
+        for fen in fens:
+            table = SharedTranspositionTable()
+            try:
+                result = parallel_search(fen, depth, workers, table=table)
+            finally:
+                table.close()
+            seconds += result['seconds']
+            nodes += result['total_nodes']
+        speedup = results['seconds'][0] / seconds if results['seconds'] and seconds > 0 else 1.0
+        results['workers'].append(workers)
+        results['seconds'].append(seconds)
+        results['speedup'].append(speedup)
+        results['nodes'].append(nodes)
+        lines.append(f'{workers:>2} workers: depth {depth} in {seconds:.3f}s '
+                     f'(speedup {speedup:.2f}x, {nodes} nodes)\n')
+    output.write(''.join(lines))
+    return results
+
+
+BENCHMARKS = {
+    'fen': benchmark_fen,
+    'pgn': benchmark_pgn,
+    'batch': benchmark_batch,
+    'smp': benchmark_smp,
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] in BENCHMARKS:
+        BENCHMARKS[sys.argv[1]](int(sys.argv[2]))
+    else:
+        sys.stderr.write(f'usage: python -m src.benchmark <{"|".join(BENCHMARKS)}> <count, or depth for smp>\n')
+        sys.exit(2)
@@ -1,29 +1,21 @@
 """ This module implements the Bishop piece """
 
-from src.piece import BasicPiece
+from src.bitboard import BISHOP_DIRECTIONS
+from src.piece import BasicPiece, NO_SQUARES
 
 class Bishop(BasicPiece):
     """
     The Bishop class. Contains all the functionality for a bishop on a chess board.
     """
 
+    __slots__ = ('xray_squares',)
+
     def __init__(self, colour, pos):
         BasicPiece.__init__(self, colour, 'bishop', pos)
-        self.xray_squares = []
+        self.xray_squares = NO_SQUARES
 
     def update_all_moves(self, board):
-        self.all_moves = []
-        self.xray_squares = []
-        self.squares_defended = []
-
-        # Check upper left
-        self.check_direction(-1,  1, board)
-        # Check upper right
-        self.check_direction( 1,  1, board)
-        # Check lower left
-        self.check_direction(-1, -1, board)
-        # Check lower right
-        self.check_direction( 1, -1, board)
-
-
+        self.xray_squares = NO_SQUARES
 
+        # Check upper left, upper right, lower left and lower right
+        self.update_sliding_moves(board, BISHOP_DIRECTIONS)
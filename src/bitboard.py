@@ -0,0 +1,273 @@
+""" This module contains the bitboard helpers shared by the board and the pieces.
+
+A bitboard is a python int used as a 64-bit mask, one bit per square.
+Squares are indexed as rank * 8 + file, so (0, 0) (A1) is bit 0,
+(7, 0) (H1) is bit 7 and (7, 7) (H8) is bit 63.
+"""
+
+NUM_SQUARES = 64
+FULL_BOARD = (1 << NUM_SQUARES) - 1
+
+# Lookup tables so that the hot loops never build tuples or shift ints
+SQUARES = [(index % 8, index // 8) for index in range(NUM_SQUARES)]
+SQUARE_BITS = [1 << index for index in range(NUM_SQUARES)]
+
+
+def square_index(pos):
+    """
+    Converts a square into its bit index.
+
+    Parameters:
+    pos (tuple): square on the board in (file, rank) format
+
+    Returns:
+    index (int): the bit index of the square, from 0 to 63
+
+    """
+    return pos[1] * 8 + pos[0]
+
+
+def square_bit(pos):
+    """
+    Converts a square into a bitboard with only that square set.
+
+    Parameters:
+    pos (tuple): square on the board in (file, rank) format
+
+    Returns:
+    mask (int): bitboard with the single square set
+
+    """
+    return SQUARE_BITS[pos[1] * 8 + pos[0]]
+
+
+def square_name(pos):
+    """
+    Converts a square into its algebraic name, ie. (4, 1) is 'e2'.
+    """
+    return 'abcdefgh'[pos[0]] + str(pos[1] + 1)
+
+
+def parse_square(name):
+    """
+    Converts an algebraic square name into a (file, rank) tuple, ie. 'e2' is (4, 1).
+    """
+    return (ord(name[0]) - ord('a'), int(name[1]) - 1)
+
+
+def iter_bits(mask):
+    """
+    Yields the index of every set bit in the mask, lowest first.
+
+    Parameters:
+    mask (int): bitboard to iterate over
+
+    Returns:
+    generator of int: bit indices from 0 to 63
+
+    """
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def iter_squares(mask):
+    """
+    Yields every set square of the mask as a (file, rank) tuple, lowest first.
+
+    Parameters:
+    mask (int): bitboard to iterate over
+
+    Returns:
+    generator of tuple: squares in (file, rank) format
+
+    """
+    while mask:
+        lowest = mask & -mask
+        yield SQUARES[lowest.bit_length() - 1]
+        mask ^= lowest
+
+
+def popcount(mask):
+    """
+    Counts the number of set squares in the mask.
+    """
+    return mask.bit_count()
+
+
+def mask_from_squares(squares):
+    """
+    Builds a bitboard out of an iterable of (file, rank) squares.
+    """
+    mask = 0
+    for pos in squares:
+        mask |= SQUARE_BITS[pos[1] * 8 + pos[0]]
+    return mask
+
+
+def _build_jump_table(offsets):
+    """
+    Builds a table mapping each square index to the bitboard of squares reached
+    by the given (file, rank) offsets, dropping any that fall off the board.
+    """
+    table = []
+    for (file, rank) in SQUARES:
+        mask = 0
+        for (file_offset, rank_offset) in offsets:
+            target_file = file + file_offset
+            target_rank = rank + rank_offset
+            if 0 <= target_file <= 7 and 0 <= target_rank <= 7:
+                mask |= SQUARE_BITS[target_rank * 8 + target_file]
+        table.append(mask)
+    return table
+
+
+# Attack tables, built once at import. Indexed by square index
+KNIGHT_ATTACKS = _build_jump_table(
+    [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+KING_ATTACKS = _build_jump_table(
+    [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)])
+# Squares a pawn of the given colour attacks diagonally
+PAWN_ATTACKS = {
+    'W': _build_jump_table([(-1, 1), (1, 1)]),
+    'B': _build_jump_table([(-1, -1), (1, -1)]),
+}
+
+# Sliding directions as (file, rank) steps
+ROOK_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+BISHOP_DIRECTIONS = ((-1, 1), (1, 1), (-1, -1), (1, -1))
+QUEEN_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+# Directions in which the square index increases. The nearest blocker along these
+# rays is the lowest set bit, along the others it is the highest set bit.
+POSITIVE_DIRECTIONS = frozenset([(0, 1), (1, 0), (1, 1), (-1, 1)])
+
+
+def _build_rays():
+    """
+    Builds a table mapping each direction to a list of 64 bitboards, holding every
+    square from (but not including) the given square to the edge of the board.
+    """
+    rays = {}
+    for (file_step, rank_step) in QUEEN_DIRECTIONS:
+        table = []
+        for (file, rank) in SQUARES:
+            mask = 0
+            target_file = file + file_step
+            target_rank = rank + rank_step
+            while 0 <= target_file <= 7 and 0 <= target_rank <= 7:
+                mask |= SQUARE_BITS[target_rank * 8 + target_file]
+                target_file += file_step
+                target_rank += rank_step
+            table.append(mask)
+        rays[(file_step, rank_step)] = table
+    return rays
+
+
+RAYS = _build_rays()
+
+
+def _build_between():
+    """
+    Builds a table mapping a pair of square indices to the bitboard of squares
+    strictly between them, or 0 if they do not share a rank, file or diagonal.
+    """
+    between = [[0] * NUM_SQUARES for _ in range(NUM_SQUARES)]
+    for direction in QUEEN_DIRECTIONS:
+        for (file, rank) in SQUARES:
+            square = rank * 8 + file
+            mask = 0
+            target_file = file + direction[0]
+            target_rank = rank + direction[1]
+            while 0 <= target_file <= 7 and 0 <= target_rank <= 7:
+                target = target_rank * 8 + target_file
+                between[square][target] = mask
+                mask |= SQUARE_BITS[target]
+                target_file += direction[0]
+                target_rank += direction[1]
+    return between
+
+
+# BETWEEN[from_index][to_index]
+BETWEEN = _build_between()
+
+
+def first_blocker(direction, blockers):
+    """
+    Finds the blocker nearest to the origin of a ray.
+
+    Parameters:
+    direction (tuple): (file, rank) step of the ray
+    blockers (int): non-empty bitboard of occupied squares on the ray
+
+    Returns:
+    index (int): square index of the nearest blocker
+
+    """
+    if direction in POSITIVE_DIRECTIONS:
+        return (blockers & -blockers).bit_length() - 1
+    return blockers.bit_length() - 1
+
+
+def ray_attacks(square, direction, occupied):
+    """
+    Squares attacked along one ray, up to and including the first blocker.
+
+    Parameters:
+    square (int): square index the ray starts from
+    direction (tuple): (file, rank) step of the ray
+    occupied (int): bitboard of all occupied squares
+
+    Returns:
+    mask (int): bitboard of the attacked squares
+
+    """
+    rays = RAYS[direction]
+    ray = rays[square]
+    blockers = ray & occupied
+    if not blockers:
+        return ray
+    if direction in POSITIVE_DIRECTIONS:
+        return ray ^ rays[(blockers & -blockers).bit_length() - 1]
+    return ray ^ rays[blockers.bit_length() - 1]
+
+
+def sliding_attacks(square, directions, occupied):
+    """
+    Squares attacked along several rays. See ray_attacks, which is inlined here
+    since the queen resolves all eight of its rays in this one loop.
+    """
+    attacks = 0
+    for direction in directions:
+        rays = RAYS[direction]
+        ray = rays[square]
+        blockers = ray & occupied
+        if not blockers:
+            attacks |= ray
+        elif direction in POSITIVE_DIRECTIONS:
+            attacks |= ray ^ rays[(blockers & -blockers).bit_length() - 1]
+        else:
+            attacks |= ray ^ rays[blockers.bit_length() - 1]
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    """
+    Squares attacked by a rook on the square index, given the occupancy.
+    """
+    return sliding_attacks(square, ROOK_DIRECTIONS, occupied)
+
+
+def bishop_attacks(square, occupied):
+    """
+    Squares attacked by a bishop on the square index, given the occupancy.
+    """
+    return sliding_attacks(square, BISHOP_DIRECTIONS, occupied)
+
+
+def queen_attacks(square, occupied):
+    """
+    Squares attacked by a queen on the square index, given the occupancy.
+    """
+    return sliding_attacks(square, QUEEN_DIRECTIONS, occupied)
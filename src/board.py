@@ -1,8 +1,68 @@
 """ This module controls the board, importing pieces for the game of chess. """
 
+from src.bitboard import (FULL_BOARD, SQUARES, SQUARE_BITS, KNIGHT_ATTACKS, KING_ATTACKS,
+                          PAWN_ATTACKS, RAYS, BETWEEN, ROOK_DIRECTIONS, BISHOP_DIRECTIONS,
+                          first_blocker, rook_attacks, bishop_attacks, iter_bits, iter_squares,
+                          parse_square, square_name)
+from src.attacks import AttackMap, get_piece_attacks
+from src.evaluation import get_piece_scores
+from src.bishop import Bishop
+from src.king import (King, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE,
+                      ALL_CASTLING_RIGHTS)
+from src.knight import Knight
+from src.move import (new_move_list, decode_move, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE,
+                      PROMOTION, PROMOTION_FLAGS, CAPTURE, EN_PASSANT)
+from src.pawn import Pawn, PROMOTION_RANK, get_pawn_move_sets, get_en_passant_pawns
+from src.piece import NO_SQUARES
+from src.queen import Queen
+from src.rook import Rook
+from src.zobrist import (ZOBRIST_BLACK_TO_MOVE, ZOBRIST_CASTLING, ZOBRIST_EN_PASSANT_FILE,
+                         ZOBRIST_PIECES, get_piece_keys)
+
 MIN_INDEX = 0
 MAX_INDEX = 7
 
+PIECE_TYPES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+
+# Rights lost when a piece moves from or to one of these squares
+CASTLING_RIGHTS_LOST = {
+    (4, 0): WHITE_KINGSIDE | WHITE_QUEENSIDE,
+    (7, 0): WHITE_KINGSIDE,
+    (0, 0): WHITE_QUEENSIDE,
+    (4, 7): BLACK_KINGSIDE | BLACK_QUEENSIDE,
+    (7, 7): BLACK_KINGSIDE,
+    (0, 7): BLACK_QUEENSIDE,
+}
+
+# Rook (from, to) squares, keyed by the king's destination when castling
+CASTLING_ROOK_MOVES = {
+    (6, 0): ((7, 0), (5, 0)),
+    (2, 0): ((0, 0), (3, 0)),
+    (6, 7): ((7, 7), (5, 7)),
+    (2, 7): ((0, 7), (3, 7)),
+}
+
+PROMOTION_PIECES = {'queen': Queen, 'rook': Rook, 'bishop': Bishop, 'knight': Knight}
+# The order promotions are generated in, best first. Not the encoding order of src/move.py
+PROMOTION_ORDER = ('queen', 'rook', 'bishop', 'knight')
+
+# Piece classes and colours keyed by their FEN letter
+FEN_PIECES = {
+    'P': (Pawn, 'W'), 'N': (Knight, 'W'), 'B': (Bishop, 'W'),
+    'R': (Rook, 'W'), 'Q': (Queen, 'W'), 'K': (King, 'W'),
+    'p': (Pawn, 'B'), 'n': (Knight, 'B'), 'b': (Bishop, 'B'),
+    'r': (Rook, 'B'), 'q': (Queen, 'B'), 'k': (King, 'B'),
+}
+# Colour and piece type, letter and Zobrist keys for each FEN piece letter
+FEN_PIECE_KEYS = {char: (colour, piece_class.__name__.lower())
+                  for (char, (piece_class, colour)) in FEN_PIECES.items()}
+FEN_LETTERS = {piece_key: char for (char, piece_key) in FEN_PIECE_KEYS.items()}
+FEN_ZOBRIST_KEYS = {char: ZOBRIST_PIECES[piece_key] for (char, piece_key) in FEN_PIECE_KEYS.items()}
+FEN_SCORES = {char: get_piece_scores(*piece_key) for (char, piece_key) in FEN_PIECE_KEYS.items()}
+FEN_EMPTY_SQUARES = {str(count): count for count in range(1, 9)}
+FEN_CASTLING = {'K': WHITE_KINGSIDE, 'Q': WHITE_QUEENSIDE, 'k': BLACK_KINGSIDE, 'q': BLACK_QUEENSIDE}
+STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
 class Board():
     def __init__(self):
         self.board = [
@@ -15,6 +75,152 @@ class Board():
         self.black_in_check = False
         self.move_history = []
         self.colour_to_move = 'W'
+        self.castling_rights = ALL_CASTLING_RIGHTS
+        self.en_passant_square = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        # One undo record per move made with make_move
+        self.undo_stack = []
+        # The piece each promotion made, keyed by (id of the pawn, square, piece type), so
+        # that making the same promotion again brings back the same piece and the moves
+        # recorded after it still refer to it
+        self.promoted_pieces = {}
+
+        # Bitboards mirroring the board matrix. See src/bitboard.py for the square layout
+        self.occupied = 0
+        self.colour_bitboards = {'W': 0, 'B': 0}
+        self.piece_bitboards = {'W': dict.fromkeys(PIECE_TYPES, 0), 'B': dict.fromkeys(PIECE_TYPES, 0)}
+
+        # Zobrist hash of the position, kept up to date as pieces are added, removed and moved.
+        # See src/zobrist.py
+        self.zobrist_key = ZOBRIST_CASTLING[self.castling_rights]
+
+        # Running totals of material and piece-square scores (white minus black) and of
+        # the game phase, kept up to date like the Zobrist key. See src/evaluation.py
+        self.mg_score = 0
+        self.eg_score = 0
+        self.game_phase = 0
+
+        # Checks and pins against one side, found by update_pins_and_checks
+        self.checkers = 0
+        self.check_mask = FULL_BOARD
+        self.pinned = 0
+        self.pin_rays = {}
+        self.pinned_pieces = []
+        self.pins_key = None
+
+        # Squares attacked by each colour, see get_attack_map
+        self.attack_maps = {'W': 0, 'B': 0}
+        self.attack_map_keys = {'W': None, 'B': None}
+        # Incrementally kept attacks, started by track_attacks. Every square whose
+        # occupant changes is marked in changed_squares until the AttackMap catches up
+        self.attack_map = None
+        self.changed_squares = 0
+
+    @classmethod
+    def from_fen(cls, fen=STARTING_FEN):
+        """
+        Creates a board from a position in Forsyth-Edwards Notation.
+        The placement is read in one pass that fills the board matrix and piece lists
+        and builds the bitboards, Zobrist key and evaluation totals as it goes, rather than adding the
+        pieces one at a time with add_piece.
+
+        Parameters:
+        fen (str): the position, ie. 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+        Returns:
+        board (Board): a new board holding the position
+
+        """
+        fields = fen.split()
+        board = cls()
+        matrix = board.board
+        piece_lists = {'W': board.active_white_pieces, 'B': board.active_black_pieces}
+        letter_bitboards = dict.fromkeys(FEN_PIECES, 0)
+        key = 0
+        mg_score = eg_score = game_phase = 0
+        rank = MAX_INDEX
+        index = rank * 8
+        for char in fields[0]:
+            if char == '/':
+                rank -= 1
+                index = rank * 8
+            elif char in FEN_EMPTY_SQUARES:
+                index += FEN_EMPTY_SQUARES[char]
+            else:
+                piece_class, colour = FEN_PIECES[char]
+                piece = piece_class(colour, SQUARES[index])
+                matrix[rank][index & 7] = piece
+                pieces = piece_lists[colour]
+                piece.list_index = len(pieces)
+                pieces.append(piece)
+                letter_bitboards[char] |= SQUARE_BITS[index]
+                key ^= FEN_ZOBRIST_KEYS[char][index]
+                (mg_scores, eg_scores, phase) = FEN_SCORES[char]
+                mg_score += mg_scores[index]
+                eg_score += eg_scores[index]
+                game_phase += phase
+                index += 1
+
+        for (char, bits) in letter_bitboards.items():
+            if bits:
+                colour, piece_type = FEN_PIECE_KEYS[char]
+                board.piece_bitboards[colour][piece_type] = bits
+                board.colour_bitboards[colour] |= bits
+        board.occupied = board.colour_bitboards['W'] | board.colour_bitboards['B']
+        board.mg_score = mg_score
+        board.eg_score = eg_score
+        board.game_phase = game_phase
+
+        board.colour_to_move = 'W' if len(fields) < 2 or fields[1] == 'w' else 'B'
+        castling_rights = 0
+        if len(fields) > 2 and fields[2] != '-':
+            for char in fields[2]:
+                castling_rights |= FEN_CASTLING[char]
+        board.castling_rights = castling_rights
+        if len(fields) > 3 and fields[3] != '-':
+            board.en_passant_square = parse_square(fields[3])
+        if len(fields) > 5:
+            board.halfmove_clock = int(fields[4])
+            board.fullmove_number = int(fields[5])
+
+        if board.colour_to_move == 'B':
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        board.zobrist_key = key ^ ZOBRIST_CASTLING[castling_rights] ^ board._en_passant_key()
+        return board
+
+    def to_fen(self):
+        """
+        Writes the position in Forsyth-Edwards Notation
+
+        Parameters:
+        None
+
+        Returns:
+        fen (str): the position, ie. 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+        """
+        ranks = []
+        for rank in range(MAX_INDEX, MIN_INDEX - 1, -1):
+            text = ''
+            empty_squares = 0
+            for piece in self.board[rank]:
+                if piece is None:
+                    empty_squares += 1
+                    continue
+                if empty_squares:
+                    text += str(empty_squares)
+                    empty_squares = 0
+                text += FEN_LETTERS[(piece.get_colour(), piece.get_piece_type())]
+            if empty_squares:
+                text += str(empty_squares)
+            ranks.append(text)
+
+        castling = ''.join(char for (char, right) in FEN_CASTLING.items()
+                           if self.castling_rights & right) or '-'
+        en_passant = square_name(self.en_passant_square) if self.en_passant_square else '-'
+        return (f"{'/'.join(ranks)} {'w' if self.colour_to_move == 'W' else 'b'} {castling} "
+                f"{en_passant} {self.halfmove_clock} {self.fullmove_number}")
 
     @staticmethod
     def is_valid_square(pos):
@@ -44,8 +250,259 @@ class Board():
         None
 
         """
-        # TODO: implement this
+        self.make_move(move)
+
+    def make_move(self, move):
+        """
+        Makes the move on the board in place, and pushes an undo record so that
+        unmake_move can restore the position exactly.
+
+        The move is a move history tuple. A sixth element, if given, is the piece type
+        a pawn promotes to ('queen', 'rook', 'bishop' or 'knight').
+        A castle ('O') is given as the king's move, and the rook is moved with it.
+
+        Parameters:
+        move (tuple of (piece, prev_square, new_square, move_type, ...)): the move to make
 
+        Returns:
+        None
+
+        """
+        piece, prev_square, new_square, move_type = move[0], move[1], move[2], move[3]
+        promotion = move[5] if len(move) > 5 else None
+        zobrist_key = self.zobrist_key
+        old_state_key = ZOBRIST_CASTLING[self.castling_rights]
+        if self.en_passant_square:
+            old_state_key ^= self._en_passant_key()
+
+        captured_piece = None
+        if move_type == 'C':
+            captured_piece = self.get_piece_from_position(new_square)
+        elif move_type == 'E':
+            captured_piece = self.get_piece_from_position((new_square[0], prev_square[1]))
+        if captured_piece:
+            self.remove_piece_by_square(captured_piece.pos)
+
+        previous_square = piece.previous_square
+        self._move_on_board(piece, prev_square, new_square)
+        piece.move_piece(new_square)
+
+        castle_record = None
+        if move_type == 'O':
+            rook_from, rook_to = CASTLING_ROOK_MOVES[new_square]
+            rook = self.get_piece_from_position(rook_from)
+            castle_record = (rook, rook.previous_square)
+            self._move_on_board(rook, rook_from, rook_to)
+            rook.move_piece(rook_to)
+
+        promotion_record = None
+        if promotion:
+            self.remove_piece_by_square(new_square)
+            promotion_record = self.add_piece(self._get_promoted_piece(piece, new_square, promotion))
+
+        self.undo_stack.append((
+            captured_piece, previous_square, castle_record, promotion_record,
+            self.castling_rights, self.en_passant_square, self.halfmove_clock, zobrist_key))
+
+        self.castling_rights &= ~(CASTLING_RIGHTS_LOST.get(prev_square, 0)
+                                  | CASTLING_RIGHTS_LOST.get(new_square, 0))
+
+        is_pawn_move = piece.get_piece_type() == 'pawn'
+        previous_en_passant_square = self.en_passant_square
+        if is_pawn_move and abs(new_square[1] - prev_square[1]) == 2:
+            self.en_passant_square = (new_square[0], (new_square[1] + prev_square[1]) // 2)
+        else:
+            self.en_passant_square = None
+        if previous_en_passant_square or self.en_passant_square:
+            self._mark_en_passant_change(previous_en_passant_square, self.en_passant_square)
+
+        if is_pawn_move or captured_piece:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if self.colour_to_move == 'B':
+            self.fullmove_number += 1
+        self.colour_to_move = 'B' if self.colour_to_move == 'W' else 'W'
+
+        self.zobrist_key ^= old_state_key ^ ZOBRIST_BLACK_TO_MOVE ^ ZOBRIST_CASTLING[self.castling_rights]
+        if self.en_passant_square:
+            self.zobrist_key ^= self._en_passant_key()
+
+        self.move_history.append(move)
+
+    def unmake_move(self):
+        """
+        Takes back the last move made with make_move, restoring the position exactly.
+
+        Parameters:
+        None
+
+        Returns:
+        move (tuple): the move that was taken back
+
+        """
+        (captured_piece, previous_square, castle_record, promotion_record,
+         castling_rights, en_passant_square, halfmove_clock, zobrist_key) = self.undo_stack.pop()
+        move = self.move_history.pop()
+        piece, prev_square, new_square = move[0], move[1], move[2]
+
+        self.colour_to_move = 'B' if self.colour_to_move == 'W' else 'W'
+        if self.colour_to_move == 'B':
+            self.fullmove_number -= 1
+        self.castling_rights = castling_rights
+        if en_passant_square or self.en_passant_square:
+            self._mark_en_passant_change(self.en_passant_square, en_passant_square)
+        self.en_passant_square = en_passant_square
+        self.halfmove_clock = halfmove_clock
+
+        if promotion_record:
+            self.remove_piece_by_square(new_square)
+            self.inactive_pieces.pop()
+            self.inactive_pieces.pop()
+            self._restore_piece(piece, new_square)
+
+        if castle_record:
+            rook, rook_previous_square = castle_record
+            rook_from, rook_to = CASTLING_ROOK_MOVES[new_square]
+            self._move_on_board(rook, rook_to, rook_from)
+            rook.pos = rook_from
+            rook.previous_square = rook_previous_square
+
+        self._move_on_board(piece, new_square, prev_square)
+        piece.pos = prev_square
+        piece.previous_square = previous_square
+
+        if captured_piece:
+            self.inactive_pieces.pop()
+            self._restore_piece(captured_piece, captured_piece.pos)
+
+        self.zobrist_key = zobrist_key
+        return move
+
+    def _get_promoted_piece(self, pawn, square, promotion):
+        """
+        Returns the piece a pawn promotes to on a square: the one made the last time
+        the same promotion was made and taken back, or else a new one
+        """
+        key = (id(pawn), square, promotion)
+        record = self.promoted_pieces.get(key)
+        if record is not None and record[0] is pawn and not record[1].is_active_piece:
+            promoted = record[1]
+            promoted.pos = square
+            promoted.previous_square = None
+            return promoted
+        promoted = PROMOTION_PIECES[promotion](pawn.get_colour(), square)
+        # The pawn is kept with its piece, so that a new pawn given the same id is not matched
+        self.promoted_pieces[key] = (pawn, promoted)
+        return promoted
+
+    def _mark_en_passant_change(self, old_square, new_square):
+        """
+        Marks the old and new en-passant squares in changed_squares, since the pawns
+        attacking them gain or lose a capture
+        """
+        for pos in (old_square, new_square):
+            if pos:
+                self.changed_squares |= SQUARE_BITS[pos[1] * 8 + pos[0]]
+
+    def _move_on_board(self, piece, from_square, to_square):
+        """
+        Moves a piece between two squares in the board matrix and the bitboards.
+        The destination must be empty. The piece's own fields are left untouched.
+        """
+        self.board[from_square[1]][from_square[0]] = None
+        self.board[to_square[1]][to_square[0]] = piece
+        colour = piece.get_colour()
+        piece_type = piece.get_piece_type()
+        move_bits = (SQUARE_BITS[from_square[1] * 8 + from_square[0]]
+                     | SQUARE_BITS[to_square[1] * 8 + to_square[0]])
+        self.occupied ^= move_bits
+        self.changed_squares |= move_bits
+        self.colour_bitboards[colour] ^= move_bits
+        self.piece_bitboards[colour][piece_type] ^= move_bits
+        # Every piece on the board has had its keys looked up by _set_bitboards already
+        from_index = from_square[1] * 8 + from_square[0]
+        to_index = to_square[1] * 8 + to_square[0]
+        square_keys = ZOBRIST_PIECES[(colour, piece_type)]
+        self.zobrist_key ^= square_keys[from_index] ^ square_keys[to_index]
+        (mg_scores, eg_scores, _) = get_piece_scores(colour, piece_type)
+        self.mg_score += mg_scores[to_index] - mg_scores[from_index]
+        self.eg_score += eg_scores[to_index] - eg_scores[from_index]
+
+    def _en_passant_key(self):
+        """
+        Returns the Zobrist key for the en-passant square. It is only hashed when a pawn
+        of the side to move can actually capture onto it, so that otherwise identical
+        positions get the same key.
+        """
+        en_passant_square = self.en_passant_square
+        if not en_passant_square:
+            return 0
+        colour = self.colour_to_move
+        index = en_passant_square[1] * 8 + en_passant_square[0]
+        if PAWN_ATTACKS['B' if colour == 'W' else 'W'][index] & self.piece_bitboards[colour]['pawn']:
+            return ZOBRIST_EN_PASSANT_FILE[en_passant_square[0]]
+        return 0
+
+    def compute_zobrist_key(self):
+        """
+        Computes the Zobrist key of the position from scratch.
+        The board keeps zobrist_key up to date itself, so this is only needed after
+        changing colour_to_move, castling_rights or en_passant_square by hand.
+
+        Parameters:
+        None
+
+        Returns:
+        key (int): the 64-bit Zobrist key
+
+        """
+        key = 0
+        for rank in range(MAX_INDEX + 1):
+            for file in range(MAX_INDEX + 1):
+                piece = self.board[rank][file]
+                if piece:
+                    key ^= get_piece_keys(piece.get_colour(), piece.get_piece_type())[rank * 8 + file]
+        if self.colour_to_move == 'B':
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        return key ^ ZOBRIST_CASTLING[self.castling_rights] ^ self._en_passant_key()
+
+    def _active_pieces(self, colour):
+        """
+        Returns the active piece list for the colour
+        """
+        return self.active_white_pieces if colour == 'W' else self.active_black_pieces
+
+    def get_active_pieces(self, colour):
+        """
+        Returns the list of active pieces of a colour
+
+        Parameters:
+        colour (str): 'W' or 'B'
+
+        Returns:
+        pieces (list): the board's own list of the colour's pieces on the board
+
+        """
+        return self._active_pieces(colour)
+
+    def _restore_piece(self, piece, pos):
+        """
+        Puts the most recently removed piece back on pos, at its old slot in the
+        active piece list. This exactly undoes the swap in remove_piece_by_square.
+        """
+        self.board[pos[1]][pos[0]] = piece
+        self._set_bitboards(piece, pos)
+        piece.is_active_piece = True
+        active_pieces = self._active_pieces(piece.get_colour())
+        index = piece.list_index
+        if index < len(active_pieces):
+            displaced_piece = active_pieces[index]
+            displaced_piece.list_index = len(active_pieces)
+            active_pieces.append(displaced_piece)
+            active_pieces[index] = piece
+        else:
+            active_pieces.append(piece)
 
     def get_last_move(self):
         """
@@ -63,6 +520,27 @@ class Board():
             return self.move_history[-1]
         return None
 
+    def get_en_passant_square(self):
+        """
+        Returns the square a pawn can capture en-passant onto, if any.
+        Moves made with make_move set it directly. Otherwise it is worked out from
+        the last move in the history.
+
+        Parameters:
+        None
+
+        Returns:
+        en_passant_square (tuple): square in (file, rank) format, or None
+
+        """
+        if self.en_passant_square:
+            return self.en_passant_square
+        last_move = self.get_last_move()
+        if ( last_move and not self.undo_stack and last_move[0].get_piece_type() == 'pawn'
+            and abs(last_move[2][1] - last_move[1][1]) == 2 ):
+            return (last_move[2][0], (last_move[1][1] + last_move[2][1]) // 2)
+        return None
+
     def add_move_to_history(self, move):
         """
         Adds a move to the move history
@@ -105,6 +583,713 @@ class Board():
         """
         return self.board[pos[1]][pos[0]]
 
+    def get_king_square(self, colour):
+        """
+        Returns the square of the king of the given colour
+
+        Parameters:
+        colour (str): 'W' or 'B'
+
+        Returns:
+        pos (tuple): square in (file, rank) format, or None if there is no king
+
+        """
+        king = self.piece_bitboards[colour]['king']
+        if not king:
+            return None
+        index = (king & -king).bit_length() - 1
+        return (index % 8, index // 8)
+
+    def is_square_attacked(self, pos, colour):
+        """
+        Tests whether any piece of the given colour attacks a square.
+        Works backwards from the square using the attack tables, so no piece
+        has to update its moves.
+
+        Parameters:
+        pos (tuple): square on the board in (file, rank) format
+        colour (str): 'W' or 'B', the attacking side
+
+        Returns:
+        bool: True if the square is attacked, False otherwise
+
+        """
+        index = pos[1] * 8 + pos[0]
+        pieces = self.piece_bitboards[colour]
+        if KNIGHT_ATTACKS[index] & pieces['knight']:
+            return True
+        # A pawn attacks this square if a pawn of the other colour here would attack it
+        if PAWN_ATTACKS['B' if colour == 'W' else 'W'][index] & pieces['pawn']:
+            return True
+        if KING_ATTACKS[index] & pieces['king']:
+            return True
+        rooks_and_queens = pieces['rook'] | pieces['queen']
+        if rooks_and_queens and rook_attacks(index, self.occupied) & rooks_and_queens:
+            return True
+        bishops_and_queens = pieces['bishop'] | pieces['queen']
+        if bishops_and_queens and bishop_attacks(index, self.occupied) & bishops_and_queens:
+            return True
+        return False
+
+    def get_attackers(self, index, occupied=None):
+        """
+        Returns every piece of either colour that attacks a square, given the occupancy.
+        Sliders behind a piece taken out of occupied (ie. in an exchange) are included.
+
+        Parameters:
+        index (int): square index, see src/bitboard.py
+        occupied (int): bitboard of the occupied squares, the board's own if None
+
+        Returns:
+        attackers (int): bitboard of the attacking pieces' squares, limited to occupied
+
+        """
+        if occupied is None:
+            occupied = self.occupied
+        white = self.piece_bitboards['W']
+        black = self.piece_bitboards['B']
+        attackers = ((PAWN_ATTACKS['B'][index] & white['pawn'])
+                     | (PAWN_ATTACKS['W'][index] & black['pawn'])
+                     | (KNIGHT_ATTACKS[index] & (white['knight'] | black['knight']))
+                     | (KING_ATTACKS[index] & (white['king'] | black['king']))
+                     | (rook_attacks(index, occupied) & (white['rook'] | black['rook']
+                                                         | white['queen'] | black['queen']))
+                     | (bishop_attacks(index, occupied) & (white['bishop'] | black['bishop']
+                                                           | white['queen'] | black['queen'])))
+        return attackers & occupied
+
+    def is_in_check(self, colour):
+        """
+        Tests whether the king of the given colour is attacked
+
+        Parameters:
+        colour (str): 'W' or 'B'
+
+        Returns:
+        bool: True if the king is in check, False otherwise (or if there is no king)
+
+        """
+        king_square = self.get_king_square(colour)
+        if king_square is None:
+            return False
+        return self.is_square_attacked(king_square, 'B' if colour == 'W' else 'W')
+
+    def update_pins_and_checks(self, colour=None):
+        """
+        Finds the enemy pieces checking the king of the given colour and the pieces pinned
+        to it, in one pass outwards from the king square. The result is kept until the
+        position changes, so calling this again for the same position does nothing.
+
+        Sets the fields:
+        checkers (int): bitboard of the enemy pieces giving check
+        check_mask (int): bitboard of the squares a move other than a king move must land on.
+            Every square when not in check, the checker and the squares between it and the
+            king in single check, and no square in double check
+        pinned (int): bitboard of the pinned pieces
+        pin_rays (dict): maps a pinned piece's square index to the bitboard of the squares
+            between the pinning piece and the king, including the pinning piece
+        white_in_check / black_in_check
+
+        Pinned pieces get is_pinned and pinned_squares, and pieces pinned in the
+        previous pass are released.
+
+        Parameters:
+        colour (str): 'W' or 'B', the side whose king is looked at. Defaults to the side to move
+
+        Returns:
+        None
+
+        """
+        if colour is None:
+            colour = self.colour_to_move
+        state = (self.zobrist_key, colour)
+        if state == self.pins_key:
+            return
+        self.pins_key = state
+
+        for piece in self.pinned_pieces:
+            piece.is_pinned = False
+            piece.pinned_squares = NO_SQUARES
+        self.pinned_pieces = []
+        self.pin_rays = {}
+        checkers = pinned = 0
+
+        king_bits = self.piece_bitboards[colour]['king']
+        if king_bits:
+            king = (king_bits & -king_bits).bit_length() - 1
+            enemy = self.piece_bitboards['B' if colour == 'W' else 'W']
+            own_pieces = self.colour_bitboards[colour]
+            occupied = self.occupied
+            # A pawn checks the king if a pawn of the king's colour on the king square would attack it
+            checkers = (KNIGHT_ATTACKS[king] & enemy['knight']) | (PAWN_ATTACKS[colour][king] & enemy['pawn'])
+            for (directions, sliders) in ((ROOK_DIRECTIONS, enemy['rook'] | enemy['queen']),
+                                          (BISHOP_DIRECTIONS, enemy['bishop'] | enemy['queen'])):
+                if not sliders:
+                    continue
+                for direction in directions:
+                    rays = RAYS[direction]
+                    if not rays[king] & sliders:
+                        continue
+                    blocker = first_blocker(direction, rays[king] & occupied)
+                    blocker_bit = SQUARE_BITS[blocker]
+                    if blocker_bit & sliders:
+                        checkers |= blocker_bit
+                        continue
+                    if not blocker_bit & own_pieces:
+                        continue
+                    behind = rays[blocker] & occupied
+                    if not behind:
+                        continue
+                    pinner = first_blocker(direction, behind)
+                    if not SQUARE_BITS[pinner] & sliders:
+                        continue
+                    pin_ray = (BETWEEN[king][pinner] ^ blocker_bit) | SQUARE_BITS[pinner]
+                    pinned |= blocker_bit
+                    self.pin_rays[blocker] = pin_ray
+                    piece = self.board[blocker // 8][blocker % 8]
+                    piece.is_pinned = True
+                    piece.pinned_squares = list(iter_squares(pin_ray))
+                    self.pinned_pieces.append(piece)
+
+            if not checkers:
+                self.check_mask = FULL_BOARD
+            elif checkers & (checkers - 1):
+                self.check_mask = 0
+            else:
+                self.check_mask = BETWEEN[king][checkers.bit_length() - 1] | checkers
+        else:
+            self.check_mask = FULL_BOARD
+
+        self.checkers = checkers
+        self.pinned = pinned
+        if colour == 'W':
+            self.white_in_check = bool(checkers)
+        else:
+            self.black_in_check = bool(checkers)
+
+    def get_move_mask(self, piece):
+        """
+        Returns the bitboard of squares a piece of the side checked by the last
+        update_pins_and_checks may move to without exposing its king: the check mask,
+        narrowed to the pin ray if the piece is pinned. King moves are not covered.
+
+        Parameters:
+        piece (subclass of BasicPiece): the piece to move
+
+        Returns:
+        mask (int): bitboard of the allowed destination squares
+
+        """
+        square = piece.pos[1] * 8 + piece.pos[0]
+        if SQUARE_BITS[square] & self.pinned:
+            return self.check_mask & self.pin_rays[square]
+        return self.check_mask
+
+    def get_attack_map(self, colour):
+        """
+        Returns every square attacked by the pieces of the given colour: the union of
+        their squares_defended, read from the bitboards. The map is shared by everything
+        that asks about the same position, and only built once per position and colour.
+        Once track_attacks has been called it is read from the incremental AttackMap.
+
+        Parameters:
+        colour (str): 'W' or 'B', the attacking side
+
+        Returns:
+        attacks (int): bitboard of the attacked squares
+
+        """
+        if self.attack_map is not None:
+            self.attack_map.update()
+            return self.attack_map.attacks[colour]
+        if self.attack_map_keys[colour] != self.zobrist_key:
+            self.attack_maps[colour] = self._compute_attacks(colour, self.occupied)
+            self.attack_map_keys[colour] = self.zobrist_key
+        return self.attack_maps[colour]
+
+    def track_attacks(self):
+        """
+        Starts keeping the attacks of every piece, with per-square attack counts for each
+        colour, up to date incrementally as moves are made and taken back (see src/attacks.py).
+
+        Parameters:
+        None
+
+        Returns:
+        attack_map (AttackMap): the incremental attack map
+
+        """
+        if self.attack_map is None:
+            self.attack_map = AttackMap(self)
+        return self.attack_map
+
+    def get_attack_count(self, pos, colour):
+        """
+        Returns how many pieces of the given colour attack a square
+
+        Parameters:
+        pos (tuple): square on the board in (file, rank) format
+        colour (str): 'W' or 'B', the attacking side
+
+        Returns:
+        count (int): number of attackers
+
+        """
+        attack_map = self.track_attacks()
+        attack_map.update()
+        return attack_map.get_attack_count(colour, pos)
+
+    def update_moves(self):
+        """
+        Updates all_moves and squares_defended after moves have been made or taken back,
+        regenerating only the pieces whose rays, jump targets or pawn pushes include a
+        square that changed. The kings are always regenerated, since castling depends on
+        the enemy's attacks anywhere along the king's path. The first call regenerates
+        every piece.
+
+        Parameters:
+        None
+
+        Returns:
+        pieces (list): the pieces that were regenerated
+
+        """
+        attack_map = self.track_attacks()
+        attack_map.update()
+        if attack_map.moves_generated:
+            pieces = [piece for piece in attack_map.stale_pieces.values() if piece.is_active_piece]
+            for piece in pieces:
+                piece.update_all_moves(self)
+        else:
+            attack_map.moves_generated = True
+            # The pawns of each colour are generated together
+            pieces = self.update_pawn_moves('W') + self.update_pawn_moves('B')
+            for piece in self.active_white_pieces + self.active_black_pieces:
+                if piece.get_piece_type() != 'pawn':
+                    piece.update_all_moves(self)
+                    pieces.append(piece)
+        attack_map.stale_pieces = {}
+        for colour in ('W', 'B'):
+            king_square = self.get_king_square(colour)
+            if king_square is not None:
+                king = self.board[king_square[1]][king_square[0]]
+                if king not in pieces:
+                    king.update_all_moves(self)
+        return pieces
+
+    def _compute_attacks(self, colour, occupied):
+        """
+        Builds the attack map of a colour for the given occupancy, see get_attack_map
+        """
+        pieces = self.piece_bitboards[colour]
+        attacks = 0
+        for (bits, table) in ((pieces['pawn'], PAWN_ATTACKS[colour]),
+                              (pieces['knight'], KNIGHT_ATTACKS), (pieces['king'], KING_ATTACKS)):
+            while bits:
+                piece_bit = bits & -bits
+                bits ^= piece_bit
+                attacks |= table[piece_bit.bit_length() - 1]
+        sliders = pieces['rook'] | pieces['queen']
+        while sliders:
+            piece_bit = sliders & -sliders
+            sliders ^= piece_bit
+            attacks |= rook_attacks(piece_bit.bit_length() - 1, occupied)
+        sliders = pieces['bishop'] | pieces['queen']
+        while sliders:
+            piece_bit = sliders & -sliders
+            sliders ^= piece_bit
+            attacks |= bishop_attacks(piece_bit.bit_length() - 1, occupied)
+        return attacks
+
+    def get_king_danger_squares(self, colour):
+        """
+        Returns every square the king of the given colour may not move to: the enemy's
+        attack map. When the king is in check the map is rebuilt with the king lifted
+        off the board, so that it cannot step back along the checking ray.
+
+        Parameters:
+        colour (str): 'W' or 'B', the side whose king is in danger
+
+        Returns:
+        danger (int): bitboard of the squares the king may not move to
+
+        """
+        enemy_colour = 'B' if colour == 'W' else 'W'
+        king = self.piece_bitboards[colour]['king']
+        attacks = self.get_attack_map(enemy_colour)
+        if not attacks & king:
+            return attacks
+        return self._compute_attacks(enemy_colour, self.occupied & ~king)
+
+    def is_legal_en_passant(self, pawn, target):
+        """
+        Tests whether an en-passant capture leaves the mover's king safe. Both pawns
+        leave the rank, so this also catches the pin along the rank that the pin rays
+        cannot see, and allows capturing a pawn that has just given check.
+
+        Parameters:
+        pawn (Pawn): the capturing pawn
+        target (tuple): the en-passant square in (file, rank) format
+
+        Returns:
+        bool: True if the capture is legal, False otherwise
+
+        """
+        colour = pawn.get_colour()
+        king_bits = self.piece_bitboards[colour]['king']
+        if not king_bits:
+            return True
+        king = (king_bits & -king_bits).bit_length() - 1
+        captured_bit = SQUARE_BITS[pawn.pos[1] * 8 + target[0]]
+        occupied = ((self.occupied ^ SQUARE_BITS[pawn.pos[1] * 8 + pawn.pos[0]] ^ captured_bit)
+                    | SQUARE_BITS[target[1] * 8 + target[0]])
+        enemy = self.piece_bitboards['B' if colour == 'W' else 'W']
+        if KNIGHT_ATTACKS[king] & enemy['knight'] or PAWN_ATTACKS[colour][king] & enemy['pawn'] & ~captured_bit:
+            return False
+        if rook_attacks(king, occupied) & (enemy['rook'] | enemy['queen']):
+            return False
+        return not bishop_attacks(king, occupied) & (enemy['bishop'] | enemy['queen'])
+
+    def get_legal_moves(self):
+        """
+        Returns every legal move for the side to move, as move history tuples ready for
+        make_move. Each piece filters its own moves with the pins and checks found once
+        for the position, so no move has to be made and taken back to test it. The pawns
+        are moved all together, see _add_pawn_moves.
+        A pawn reaching the last rank gives one move per promotion piece.
+
+        Parameters:
+        None
+
+        Returns:
+        moves (list): list of (piece, prev_square, new_square, move_type, marker, promotion)
+
+        """
+        colour = self.colour_to_move
+        self.update_pins_and_checks(colour)
+        moves = []
+        append = moves.append
+        for piece in self._active_pieces(colour):
+            if piece.get_piece_type() == 'pawn':
+                continue
+            pos = piece.pos
+            for (target, move_type) in piece.get_legal_moves(self):
+                append((piece, pos, target, move_type, None, None))
+        self._add_pawn_moves(moves, colour)
+        return moves
+
+    def get_legal_captures(self):
+        """
+        Returns only the legal captures (including en-passant captures) for the side
+        to move, as move history tuples. Each piece reads its captures straight off its
+        attacks (see BasicPiece.get_legal_captures), so no non-capture move is built.
+        A capture onto the last rank gives one move per promotion piece.
+
+        Parameters:
+        None
+
+        Returns:
+        moves (list): list of (piece, prev_square, new_square, move_type, marker, promotion)
+
+        """
+        colour = self.colour_to_move
+        self.update_pins_and_checks(colour)
+        moves = []
+        append = moves.append
+        for piece in self._active_pieces(colour):
+            if piece.get_piece_type() == 'pawn':
+                continue
+            pos = piece.pos
+            for (target, move_type) in piece.get_legal_captures(self):
+                append((piece, pos, target, move_type, None, None))
+        self._add_pawn_moves(moves, colour, captures_only=True)
+        return moves
+
+    def get_legal_quiet_moves(self, promotions_only=False):
+        """
+        Returns only the legal moves that capture nothing (pushes, castling and
+        promotions by a push) for the side to move, as move history tuples. Each piece
+        reads them off its attacks (see BasicPiece.get_legal_quiet_moves), so no
+        capture is built. A push onto the last rank gives one move per promotion piece.
+
+        Parameters:
+        promotions_only (bool): only return the promotions by a push
+
+        Returns:
+        moves (list): list of (piece, prev_square, new_square, move_type, marker, promotion)
+
+        """
+        colour = self.colour_to_move
+        self.update_pins_and_checks(colour)
+        moves = []
+        if promotions_only:
+            self._add_pawn_moves(moves, colour, quiets_only=True, target_mask=PROMOTION_RANK[colour])
+            return moves
+        append = moves.append
+        for piece in self._active_pieces(colour):
+            if piece.get_piece_type() == 'pawn':
+                continue
+            pos = piece.pos
+            for (target, move_type) in piece.get_legal_quiet_moves(self):
+                append((piece, pos, target, move_type, None, None))
+        self._add_pawn_moves(moves, colour, quiets_only=True)
+        return moves
+
+    def get_pseudo_legal_moves(self):
+        """
+        Returns every move for the side to move, as move history tuples ready for make_move.
+        Moves that leave the mover's own king in check are included.
+        A pawn reaching the last rank gives one move per promotion piece.
+
+        Parameters:
+        None
+
+        Returns:
+        moves (list): list of (piece, prev_square, new_square, move_type, marker, promotion)
+
+        """
+        colour = self.colour_to_move
+        moves = []
+        for piece in self._active_pieces(colour):
+            if piece.get_piece_type() == 'pawn':
+                continue
+            piece.update_all_moves(self)
+            pos = piece.pos
+            for (target, move_type) in piece.all_moves:
+                moves.append((piece, pos, target, move_type, None, None))
+        self._add_pawn_moves(moves, colour, legal=False)
+        return moves
+
+    def _add_pawn_moves(self, moves, colour, captures_only=False, legal=True, quiets_only=False,
+                        target_mask=FULL_BOARD):
+        """
+        Appends the moves of every pawn of a colour to a move list, generated for all
+        the pawns at once (see pawn.get_pawn_move_sets). The pawns that are not pinned
+        share the check mask, so only pinned pawns are moved on their own, along their
+        pin ray. En-passant captures are tested one by one with is_legal_en_passant.
+        When legal is set, update_pins_and_checks must have been called for the colour.
+        quiets_only leaves out every capture, and only moves onto target_mask are added.
+        """
+        pawns = self.piece_bitboards[colour].get('pawn', 0)
+        if not pawns:
+            return
+        enemy = self.colour_bitboards['B' if colour == 'W' else 'W']
+        if legal:
+            groups = [(pawns & ~self.pinned, self.check_mask)]
+            pinned = pawns & self.pinned
+            while pinned:
+                pawn_bit = pinned & -pinned
+                pinned ^= pawn_bit
+                groups.append((pawn_bit, self.check_mask & self.pin_rays[pawn_bit.bit_length() - 1]))
+        else:
+            groups = [(pawns, FULL_BOARD)]
+
+        board = self.board
+        append = moves.append
+        promotion_rank = PROMOTION_RANK[colour]
+        for (group, mask) in groups:
+            if not group or not mask:
+                continue
+            for (shift, move_type, targets) in get_pawn_move_sets(colour, group, self.occupied, enemy,
+                                                                  captures_only):
+                if quiets_only and move_type == 'C':
+                    continue
+                targets &= mask & target_mask
+                while targets:
+                    target_bit = targets & -targets
+                    targets ^= target_bit
+                    target = target_bit.bit_length() - 1
+                    origin = target - shift
+                    piece = board[origin >> 3][origin & 7]
+                    if target_bit & promotion_rank:
+                        for promotion in PROMOTION_ORDER:
+                            append((piece, SQUARES[origin], SQUARES[target], move_type, None, promotion))
+                    else:
+                        append((piece, SQUARES[origin], SQUARES[target], move_type, None, None))
+
+        if quiets_only:
+            return
+        en_passant_square = self.get_en_passant_square()
+        capturers = get_en_passant_pawns(colour, pawns, en_passant_square)
+        while capturers:
+            pawn_bit = capturers & -capturers
+            capturers ^= pawn_bit
+            origin = pawn_bit.bit_length() - 1
+            piece = board[origin >> 3][origin & 7]
+            if not legal or self.is_legal_en_passant(piece, en_passant_square):
+                append((piece, SQUARES[origin], en_passant_square, 'E', None, None))
+
+    def update_pawn_moves(self, colour):
+        """
+        Splits the set-wise pawn moves back into the all_moves and squares_defended
+        fields of each pawn of a colour, for callers that need them per piece.
+
+        Parameters:
+        colour (str): 'W' or 'B'
+
+        Returns:
+        pawns (list): the pawns that were updated
+
+        """
+        moves = []
+        self._add_pawn_moves(moves, colour, legal=False)
+        pawns = [piece for piece in self._active_pieces(colour) if piece.get_piece_type() == 'pawn']
+        for pawn in pawns:
+            pawn.all_moves = []
+            pawn.squares_defended = [SQUARES[index] for index in
+                                     iter_bits(PAWN_ATTACKS[colour][pawn.pos[1] * 8 + pawn.pos[0]])]
+        for move in moves:
+            if move[5] is None or move[5] == PROMOTION_ORDER[0]:
+                move[0].all_moves.append((move[2], move[3]))
+        return pawns
+
+    def get_encoded_moves(self, move_list=None):
+        """
+        Same as get_pseudo_legal_moves, but returns the moves as 16-bit ints
+        in a move list (see src/move.py). The codes are built straight from the
+        attack bitboards, and all the pawns are moved at once, so no move tuple is
+        made and the pieces' `all_moves` are left alone.
+
+        Parameters:
+        move_list (array): move list to append to. A new one is made if not given
+
+        Returns:
+        move_list (array): the move list holding the moves
+
+        """
+        if move_list is None:
+            move_list = new_move_list()
+        append = move_list.append
+        colour = self.colour_to_move
+        occupied = self.occupied
+        own = self.colour_bitboards[colour]
+        enemy = occupied & ~own
+        for piece in self._active_pieces(colour):
+            piece_type = piece.get_piece_type()
+            if piece_type == 'pawn':
+                continue
+            from_square = piece.pos[1] * 8 + piece.pos[0]
+            if piece_type == 'king':
+                targets = KING_ATTACKS[from_square] & ~own
+                for (target, _) in piece.get_castling_moves(self):
+                    to_square = target[1] * 8 + target[0]
+                    append(from_square | to_square << 6
+                           | (KING_CASTLE if to_square > from_square else QUEEN_CASTLE) << 12)
+            else:
+                targets = get_piece_attacks(piece, from_square, occupied) & ~own
+            while targets:
+                target_bit = targets & -targets
+                targets ^= target_bit
+                move = from_square | (target_bit.bit_length() - 1) << 6
+                append(move | CAPTURE << 12 if target_bit & enemy else move)
+
+        pawns = self.piece_bitboards[colour].get('pawn', 0)
+        if not pawns:
+            return move_list
+        promotion_rank = PROMOTION_RANK[colour]
+        for (shift, move_type, targets) in get_pawn_move_sets(colour, pawns, occupied, enemy):
+            if move_type == 'C':
+                flags = CAPTURE
+            else:
+                flags = DOUBLE_PUSH if shift == 16 or shift == -16 else 0
+            while targets:
+                target_bit = targets & -targets
+                targets ^= target_bit
+                to_square = target_bit.bit_length() - 1
+                move = (to_square - shift) | to_square << 6
+                if target_bit & promotion_rank:
+                    for promotion in PROMOTION_ORDER:
+                        append(move | (flags | PROMOTION | PROMOTION_FLAGS[promotion]) << 12)
+                else:
+                    append(move | flags << 12)
+        en_passant_square = self.get_en_passant_square()
+        capturers = get_en_passant_pawns(colour, pawns, en_passant_square)
+        if capturers:
+            to_square = en_passant_square[1] * 8 + en_passant_square[0]
+            for from_square in iter_bits(capturers):
+                append(from_square | to_square << 6 | EN_PASSANT << 12)
+        return move_list
+
+    def make_encoded_move(self, move):
+        """
+        Makes a 16-bit move (see src/move.py). The move history records it as a
+        move history tuple, like make_move.
+
+        Parameters:
+        move (int): the move to make
+
+        Returns:
+        None
+
+        """
+        self.make_move(decode_move(move, self))
+
+    def get_occupancy(self, colour=None):
+        """
+        Returns the bitboard of occupied squares
+
+        Parameters:
+        colour (str): 'W' or 'B' for the squares of one side, None for both sides
+
+        Returns:
+        mask (int): bitboard of the occupied squares
+
+        """
+        if colour is None:
+            return self.occupied
+        return self.colour_bitboards[colour]
+
+    def get_piece_bitboard(self, colour, piece_type):
+        """
+        Returns the bitboard of all pieces of a colour and type
+
+        Parameters:
+        colour (str): 'W' or 'B'
+        piece_type (str): type of piece (pawn, bishop, knight, etc...)
+
+        Returns:
+        mask (int): bitboard of the squares holding that kind of piece
+
+        """
+        return self.piece_bitboards[colour].get(piece_type, 0)
+
+    def _set_bitboards(self, piece, pos):
+        """
+        Marks the piece as standing on pos in the bitboards
+        """
+        index = pos[1] * 8 + pos[0]
+        bit = SQUARE_BITS[index]
+        colour = piece.get_colour()
+        piece_type = piece.get_piece_type()
+        self.occupied |= bit
+        self.changed_squares |= bit
+        self.colour_bitboards[colour] |= bit
+        type_bitboards = self.piece_bitboards[colour]
+        type_bitboards[piece_type] = type_bitboards.get(piece_type, 0) | bit
+        self.zobrist_key ^= get_piece_keys(colour, piece_type)[index]
+        (mg_scores, eg_scores, phase) = get_piece_scores(colour, piece_type)
+        self.mg_score += mg_scores[index]
+        self.eg_score += eg_scores[index]
+        self.game_phase += phase
+
+    def _clear_bitboards(self, piece, pos):
+        """
+        Clears the piece from pos in the bitboards
+        """
+        index = pos[1] * 8 + pos[0]
+        bit = SQUARE_BITS[index]
+        colour = piece.get_colour()
+        piece_type = piece.get_piece_type()
+        self.occupied &= ~bit
+        self.changed_squares |= bit
+        self.colour_bitboards[colour] &= ~bit
+        self.piece_bitboards[colour][piece_type] &= ~bit
+        self.zobrist_key ^= get_piece_keys(colour, piece_type)[index]
+        (mg_scores, eg_scores, phase) = get_piece_scores(colour, piece_type)
+        self.mg_score -= mg_scores[index]
+        self.eg_score -= eg_scores[index]
+        self.game_phase -= phase
+
     def add_piece(self, piece):
         """
         Adds a piece to the board
@@ -116,12 +1301,15 @@ class Board():
         piece (subclass of BasicPiece): the piece that was added
 
         """
+        replaced_piece = self.board[piece.pos[1]][piece.pos[0]]
+        if replaced_piece:
+            self._clear_bitboards(replaced_piece, piece.pos)
         self.board[piece.pos[1]][piece.pos[0]] = piece
+        self._set_bitboards(piece, piece.pos)
         piece.is_active_piece = True
-        if piece.get_colour() == 'W':
-            self.active_white_pieces.append(piece)
-        if piece.get_colour() == 'B':
-            self.active_black_pieces.append(piece)
+        active_pieces = self._active_pieces(piece.get_colour())
+        piece.list_index = len(active_pieces)
+        active_pieces.append(piece)
 
         return piece
 
@@ -138,19 +1326,20 @@ class Board():
 
         """
         piece_to_remove = self.board[pos[1]][pos[0]]
-        if piece_to_remove.get_colour() == "W":
-            self.active_white_pieces[:] = list(filter(
-                lambda item: item != piece_to_remove, self.active_white_pieces))
-        if piece_to_remove.get_colour() == "B":
-            self.active_black_pieces[:] = list(filter(
-                lambda item: item != piece_to_remove, self.active_black_pieces))
+
+        # Fill the piece's slot with the last piece in the list, so removal is O(1)
+        active_pieces = self._active_pieces(piece_to_remove.get_colour())
+        last_piece = active_pieces.pop()
+        if last_piece is not piece_to_remove:
+            active_pieces[piece_to_remove.list_index] = last_piece
+            last_piece.list_index = piece_to_remove.list_index
 
         self.board[pos[1]][pos[0]] = None
+        self._clear_bitboards(piece_to_remove, pos)
         self.inactive_pieces.append(piece_to_remove)
         piece_to_remove.is_active_piece = False
 
-
-
+        return piece_to_remove
 
     def refresh_all_active_pieces(self):
         """
@@ -173,14 +1362,13 @@ class Board():
         del self.active_black_pieces
         self.active_black_pieces = []
 
-        for rank in range(MAX_INDEX):
-            for file in range(MAX_INDEX):
-                piece = self.board[file][rank]
+        for rank in range(MAX_INDEX + 1):
+            for file in range(MAX_INDEX + 1):
+                piece = self.board[rank][file]
                 if piece:
-                    if piece.get_colour() == "W":
-                        self.active_white_pieces.append(self.board[file][rank])
-                    if piece.get_colour() == "B":
-                        self.active_black_pieces.append(self.board[file][rank])
+                    active_pieces = self._active_pieces(piece.get_colour())
+                    piece.list_index = len(active_pieces)
+                    active_pieces.append(piece)
 
 
     def remove_all_pieces(self):
@@ -198,11 +1386,7 @@ class Board():
 
         """
 
-        for rank in range(MAX_INDEX):
-            for file in range(MAX_INDEX):
-                piece = self.board[file][rank]
-                if piece:
-                    if piece.get_colour() == "W":
-                        self.active_white_pieces.append(self.board[file][rank])
-                    if piece.get_colour() == "B":
-                        self.active_black_pieces.append(self.board[file][rank])
+        for rank in range(MAX_INDEX + 1):
+            for file in range(MAX_INDEX + 1):
+                if self.board[rank][file]:
+                    self.remove_piece_by_square((file, rank))
@@ -0,0 +1,259 @@
+""" This module streams positions out of EPD and FEN files of any size.
+
+Files are read line by line through a memory map (or plain buffered reads), so only
+the current line is ever held in memory. Each line becomes an EpdPosition: a light
+view holding the FEN and the EPD operations, which builds a Board only when asked.
+Workers can split a file between them by line range, see get_shards.
+
+An EPD line holds the first four FEN fields followed by operations, ie.
+    r1b1k2r/... w kq - bm Nxe5; id "test.001";
+Plain FEN lines, with the two move clocks, are read the same way.
+"""
+
+import mmap
+
+from src.board import Board
+from src.san import parse_san
+
+
+class EpdPosition():
+    """
+    One line of an EPD or FEN file.
+    """
+
+    __slots__ = ('fen', 'operations', 'line_number')
+
+    def __init__(self, fen, operations, line_number=None):
+        """
+        Parameters:
+        fen (str): the position, with all six FEN fields
+        operations (dict): maps each EPD opcode, ie. 'bm' or 'id', to its list of operands
+        line_number (int): 0-indexed line of the file the position was read from
+        """
+        self.fen = fen
+        self.operations = operations
+        self.line_number = line_number
+
+    def get_board(self):
+        """
+        Returns a new board set up with the position
+        """
+        return Board.from_fen(self.fen)
+
+    def get_id(self):
+        """
+        Returns the position's 'id' operand, or None if it has none
+        """
+        operands = self.operations.get('id')
+        return operands[0] if operands else None
+
+    def get_best_moves(self):
+        """
+        Returns the 'bm' (best move) operands in SAN, ie. ['Nf3', 'e4']
+        """
+        return self.operations.get('bm', [])
+
+    def get_best_move_tuples(self, board=None):
+        """
+        Returns the best moves as move history tuples, ready for Board.make_move.
+
+        Parameters:
+        board (Board): the position, if a board has already been built for it
+
+        Returns:
+        moves (list): one move history tuple per 'bm' operand
+
+        """
+        if board is None:
+            board = self.get_board()
+        return [parse_san(board, san) for san in self.get_best_moves()]
+
+
+def parse_operations(text):
+    """
+    Splits the operations part of an EPD line in one pass. Operations end with ';',
+    and double-quoted operands may hold spaces and semicolons.
+
+    Parameters:
+    text (str): ie. 'bm Nf3 e4; id "position 1";'
+
+    Returns:
+    operations (dict): maps each opcode to its list of operands, ie.
+        {'bm': ['Nf3', 'e4'], 'id': ['position 1']}
+
+    """
+    operations = {}
+    tokens = []
+    token = ''
+    in_quotes = False
+    has_token = False
+    for char in text:
+        if in_quotes:
+            if char == '"':
+                in_quotes = False
+            else:
+                token += char
+        elif char == '"':
+            in_quotes = True
+            has_token = True
+        elif char == ';' or char.isspace():
+            if has_token:
+                tokens.append(token)
+                token = ''
+                has_token = False
+            if char == ';' and tokens:
+                operations[tokens[0]] = tokens[1:]
+                tokens = []
+        else:
+            token += char
+            has_token = True
+    if has_token:
+        tokens.append(token)
+    if tokens:
+        operations[tokens[0]] = tokens[1:]
+    return operations
+
+
+def parse_epd(line, line_number=None):
+    """
+    Parses one EPD or FEN line.
+
+    Parameters:
+    line (str): the line, ie. 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 bm e5;'
+    line_number (int): 0-indexed line of the file it came from, if any
+
+    Returns:
+    position (EpdPosition): the position and its operations
+
+    Raises:
+    ValueError: if the line has fewer than the four position fields
+
+    """
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f'invalid EPD line: {line!r}')
+    rest = fields[4] if len(fields) > 4 else ''
+
+    # A FEN line carries the two move clocks before any operations
+    clocks = rest.split(None, 2)
+    if len(clocks) >= 2 and clocks[0].isdigit() and clocks[1].isdigit():
+        halfmove_clock, fullmove_number = clocks[0], clocks[1]
+        rest = clocks[2] if len(clocks) > 2 else ''
+    else:
+        halfmove_clock, fullmove_number = '0', '1'
+
+    operations = parse_operations(rest) if rest else {}
+    if 'hmvc' in operations:
+        halfmove_clock = operations['hmvc'][0]
+    if 'fmvn' in operations:
+        fullmove_number = operations['fmvn'][0]
+    fen = f'{fields[0]} {fields[1]} {fields[2]} {fields[3]} {halfmove_clock} {fullmove_number}'
+    return EpdPosition(fen, operations, line_number)
+
+
+def iter_lines(path, start_line=0, end_line=None, use_mmap=True):
+    """
+    Yields the lines of a file one at a time, without reading the whole file.
+
+    Parameters:
+    path (str): the file
+    start_line (int): 0-indexed first line to yield
+    end_line (int): line to stop before, or None for the end of the file
+    use_mmap (bool): read through a memory map rather than buffered reads
+
+    Returns:
+    generator of (int, str): line numbers and lines, without the line ending
+
+    """
+    with open(path, 'rb') as file:
+        if not use_mmap:
+            for (line_number, line) in enumerate(file):
+                if end_line is not None and line_number >= end_line:
+                    return
+                if line_number >= start_line:
+                    yield (line_number, line.rstrip(b'\r\n').decode())
+            return
+
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return
+        with data:
+            size = len(data)
+            position = 0
+            line_number = 0
+            # Skipping lines is a search for the next newline, done in C
+            while line_number < start_line and position < size:
+                newline = data.find(b'\n', position)
+                position = size if newline < 0 else newline + 1
+                line_number += 1
+            while position < size and (end_line is None or line_number < end_line):
+                newline = data.find(b'\n', position)
+                if newline < 0:
+                    newline = size
+                yield (line_number, data[position:newline].rstrip(b'\r').decode())
+                position = newline + 1
+                line_number += 1
+
+
+def iter_epd(path, start_line=0, end_line=None, use_mmap=True):
+    """
+    Yields the positions in an EPD or FEN file, one line at a time. Blank lines and
+    lines starting with '#' are skipped.
+
+    Parameters:
+    path (str): the file
+    start_line (int): 0-indexed first line to read
+    end_line (int): line to stop before, or None for the end of the file
+    use_mmap (bool): read through a memory map rather than buffered reads
+
+    Returns:
+    generator of EpdPosition
+
+    """
+    for (line_number, line) in iter_lines(path, start_line, end_line, use_mmap):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield parse_epd(line, line_number)
+
+
+def iter_boards(path, start_line=0, end_line=None, use_mmap=True):
+    """
+    Yields a new Board for each position in an EPD or FEN file. See iter_epd.
+    """
+    for position in iter_epd(path, start_line, end_line, use_mmap):
+        yield Board.from_fen(position.fen)
+
+
+def count_lines(path):
+    """
+    Counts the lines in a file, including a last line without a line ending
+    """
+    lines = 0
+    last_byte = b'\n'
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(1 << 20)
+            if not chunk:
+                break
+            lines += chunk.count(b'\n')
+            last_byte = chunk[-1:]
+    return lines + (last_byte != b'\n')
+
+
+def get_shards(path, num_shards):
+    """
+    Splits a file into line ranges of nearly equal size, one per worker.
+
+    Parameters:
+    path (str): the file
+    num_shards (int): number of ranges
+
+    Returns:
+    shards (list): (start_line, end_line) pairs to pass to iter_epd, covering every line
+
+    """
+    lines = count_lines(path)
+    return [(lines * shard // num_shards, lines * (shard + 1) // num_shards)
+            for shard in range(num_shards)]
@@ -0,0 +1,153 @@
+""" This module implements the King piece """
+
+from src.bitboard import SQUARES, SQUARE_BITS, KING_ATTACKS, mask_from_squares
+from src.piece import BasicPiece
+
+# Castling rights are kept on the board as bit flags in a single int
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING_RIGHTS = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+
+# For each colour: (castling right, king destination, squares that must be empty,
+# squares the king stands on or passes over that must not be attacked)
+CASTLING_OPTIONS = {
+    'W': (
+        (WHITE_KINGSIDE, (6, 0), mask_from_squares([(5, 0), (6, 0)]),
+         mask_from_squares([(4, 0), (5, 0), (6, 0)])),
+        (WHITE_QUEENSIDE, (2, 0), mask_from_squares([(1, 0), (2, 0), (3, 0)]),
+         mask_from_squares([(4, 0), (3, 0), (2, 0)])),
+    ),
+    'B': (
+        (BLACK_KINGSIDE, (6, 7), mask_from_squares([(5, 7), (6, 7)]),
+         mask_from_squares([(4, 7), (5, 7), (6, 7)])),
+        (BLACK_QUEENSIDE, (2, 7), mask_from_squares([(1, 7), (2, 7), (3, 7)]),
+         mask_from_squares([(4, 7), (3, 7), (2, 7)])),
+    ),
+}
+KING_HOME_SQUARES = {'W': (4, 0), 'B': (4, 7)}
+
+
+class King(BasicPiece):
+    """
+    The King class. Contains all the functionality for a king on a chess board.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, colour, pos):
+        BasicPiece.__init__(self, colour, 'king', pos)
+
+    def update_all_moves(self, board):
+        self.all_moves = []
+        self.squares_defended = []
+
+        targets = KING_ATTACKS[self.pos[1] * 8 + self.pos[0]]
+        occupied = board.occupied
+        enemy_pieces = occupied & ~board.colour_bitboards[self.get_colour()]
+
+        while targets:
+            target_bit = targets & -targets
+            targets ^= target_bit
+            target_square = SQUARES[target_bit.bit_length() - 1]
+            self.squares_defended.append(target_square)
+            if not target_bit & occupied:
+                self.all_moves.append((target_square, 'N'))
+            elif target_bit & enemy_pieces:
+                self.all_moves.append((target_square, 'C'))
+
+        self.add_castling_moves(board)
+
+    def get_legal_moves(self, board):
+        """
+        Determine which of all moves are actually legal moves: the ones that do not
+        step onto a square the enemy attacks (see Board.get_king_danger_squares).
+
+        Updates the field `legal_moves` and returns it.
+        """
+        self.update_all_moves(board)
+        danger = board.get_king_danger_squares(self.get_colour())
+        self.legal_moves = [move for move in self.all_moves
+                            if not SQUARE_BITS[move[0][1] * 8 + move[0][0]] & danger]
+        return self.legal_moves
+
+    def get_legal_captures(self, board):
+        """
+        Returns only the captures onto squares the enemy does not defend, without
+        building the other moves or the castling moves. See BasicPiece.get_legal_captures.
+        """
+        colour = self.get_colour()
+        targets = (KING_ATTACKS[self.pos[1] * 8 + self.pos[0]]
+                   & board.colour_bitboards['B' if colour == 'W' else 'W']
+                   & ~board.get_king_danger_squares(colour))
+        captures = []
+        while targets:
+            target_bit = targets & -targets
+            targets ^= target_bit
+            captures.append((SQUARES[target_bit.bit_length() - 1], 'C'))
+        return captures
+
+    def get_legal_quiet_moves(self, board):
+        """
+        Returns only the moves onto empty squares the enemy does not attack, and the
+        castling moves, without building the captures. See BasicPiece.get_legal_quiet_moves.
+        """
+        targets = (KING_ATTACKS[self.pos[1] * 8 + self.pos[0]] & ~board.occupied
+                   & ~board.get_king_danger_squares(self.get_colour()))
+        moves = []
+        while targets:
+            target_bit = targets & -targets
+            targets ^= target_bit
+            moves.append((SQUARES[target_bit.bit_length() - 1], 'N'))
+        return moves + self.get_castling_moves(board)
+
+    def add_castling_moves(self, board):
+        """
+        Adds the castling moves that are currently allowed to all_moves, see
+        get_castling_moves.
+
+        Parameters:
+        board (object): current board state
+
+        Returns:
+        None
+
+        """
+        castling_moves = self.get_castling_moves(board)
+        if castling_moves:
+            self.all_moves.extend(castling_moves)
+
+    def get_castling_moves(self, board):
+        """
+        Returns the castling moves that are currently allowed, as ((file, rank), 'O').
+        The king must still have the right to castle, the squares between it and the
+        rook must be empty, and it may not castle out of, through, or into check, which
+        is read from the enemy's attack map (see Board.get_attack_map).
+
+        Parameters:
+        board (object): current board state
+
+        Returns:
+        moves (list): the castling moves
+
+        """
+        colour = self.get_colour()
+        castling_moves = []
+        if not board.castling_rights or self.pos != KING_HOME_SQUARES[colour]:
+            return castling_moves
+        rooks = board.get_piece_bitboard(colour, 'rook')
+        attacked = None
+        for (right, destination, empty_squares, king_path) in CASTLING_OPTIONS[colour]:
+            if not board.castling_rights & right or board.occupied & empty_squares:
+                continue
+            # The rook stands next to the last empty square on the king's side of the board
+            rook_square = (7, self.pos[1]) if destination[0] == 6 else (0, self.pos[1])
+            if not rooks & SQUARE_BITS[rook_square[1] * 8 + rook_square[0]]:
+                continue
+            if attacked is None:
+                attacked = board.get_attack_map('B' if colour == 'W' else 'W')
+            if attacked & king_path:
+                continue
+            castling_moves.append((destination, 'O'))
+        return castling_moves
@@ -1,6 +1,6 @@
 """ This module implements the Knight piece """
 
-from src.board import Board
+from src.bitboard import SQUARES, KNIGHT_ATTACKS
 from src.piece import BasicPiece
 
 class Knight(BasicPiece):
@@ -8,6 +8,8 @@ class Knight(BasicPiece):
     The Knight class. Contains all the functionality for a knight on a chess board.
     """
 
+    __slots__ = ()
+
     def __init__(self, colour, pos):
         BasicPiece.__init__(self, colour, 'knight', pos)
 
@@ -15,22 +17,17 @@ class Knight(BasicPiece):
         self.all_moves = []
         self.squares_defended = []
 
-        # Relative directions given clockwise from the 12-o-clock position
-        directions = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
-
-        for (rank, file) in directions:
-            target_square = (self.pos[0] + rank, self.pos[1] + file)
-            if not Board.is_valid_square(target_square):
-                continue
-
-            target_square_piece = board.get_piece_from_position(target_square)
-            if not target_square_piece:
+        # Every square the knight jumps to, regardless of what is on it
+        targets = KNIGHT_ATTACKS[self.pos[1] * 8 + self.pos[0]]
+        occupied = board.occupied
+        enemy_pieces = occupied & ~board.colour_bitboards[self.get_colour()]
+
+        while targets:
+            target_bit = targets & -targets
+            targets ^= target_bit
+            target_square = SQUARES[target_bit.bit_length() - 1]
+            self.squares_defended.append(target_square)
+            if not target_bit & occupied:
                 self.all_moves.append((target_square, "N"))
-                self.squares_defended.append(target_square)
-            elif target_square_piece:
-                if target_square_piece.get_colour() == self.get_colour():
-                    continue
-                elif target_square_piece.get_colour() != self.get_colour():
-                    self.all_moves.append((target_square, "C"))
-                    self.squares_defended.append(target_square)
-
+            elif target_bit & enemy_pieces:
+                self.all_moves.append((target_square, "C"))
@@ -0,0 +1,194 @@
+""" This module implements the compact integer move encoding.
+
+A move fits in 16 bits:
+    bits 0-5    square index the piece moves from (see src/bitboard.py)
+    bits 6-11   square index the piece moves to
+    bits 12-15  flags, below
+The value 0 (A1 to A1) is never a real move and stands for "no move".
+
+Move lists are `array('H')`, so generating, storing and sorting them allocates no
+tuples. encode_move_tuple and decode_move convert to and from the move history
+tuples that Board.make_move takes, and encode_target and decode_target convert to
+and from the ((file, rank), move_type) entries in a piece's all_moves.
+"""
+
+from array import array
+
+from src.bitboard import SQUARES
+
+QUIET = 0
+DOUBLE_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EN_PASSANT = 5
+# Promotions have bit 3 set. The low two bits give the piece, and bit 2 marks a capture
+PROMOTION = 8
+KNIGHT_PROMOTION = 8
+BISHOP_PROMOTION = 9
+ROOK_PROMOTION = 10
+QUEEN_PROMOTION = 11
+KNIGHT_PROMOTION_CAPTURE = 12
+BISHOP_PROMOTION_CAPTURE = 13
+ROOK_PROMOTION_CAPTURE = 14
+QUEEN_PROMOTION_CAPTURE = 15
+
+NO_MOVE = 0
+
+PROMOTION_TYPES = ('knight', 'bishop', 'rook', 'queen')
+PROMOTION_FLAGS = {'knight': 0, 'bishop': 1, 'rook': 2, 'queen': 3}
+
+# Move history type letter for each flag
+FLAG_MOVE_TYPES = ('N', 'N', 'O', 'O', 'C', 'E', 'N', 'N',
+                   'N', 'N', 'N', 'N', 'C', 'C', 'C', 'C')
+
+
+def encode_move(from_square, to_square, flags=QUIET):
+    """
+    Packs a move into an int.
+
+    Parameters:
+    from_square (int): square index the piece moves from
+    to_square (int): square index the piece moves to
+    flags (int): one of the flag constants in this module
+
+    Returns:
+    move (int): the 16-bit move
+
+    """
+    return from_square | to_square << 6 | flags << 12
+
+
+def move_from(move):
+    """
+    Returns the square index a move starts from
+    """
+    return move & 0x3F
+
+
+def move_to(move):
+    """
+    Returns the square index a move lands on
+    """
+    return (move >> 6) & 0x3F
+
+
+def move_flags(move):
+    """
+    Returns the flags of a move
+    """
+    return move >> 12
+
+
+def is_capture(move):
+    """
+    Tests whether a move captures, including en-passant and capturing promotions
+    """
+    return bool(move >> 12 & CAPTURE)
+
+
+def is_promotion(move):
+    """
+    Tests whether a move promotes a pawn
+    """
+    return bool(move >> 12 & PROMOTION)
+
+
+def promotion_type(move):
+    """
+    Returns the piece type a move promotes to, or None if it is not a promotion
+    """
+    if move >> 12 & PROMOTION:
+        return PROMOTION_TYPES[(move >> 12) & 3]
+    return None
+
+
+def new_move_list(moves=()):
+    """
+    Returns a move list: an array of unsigned 16-bit moves
+    """
+    return array('H', moves)
+
+
+def encode_target(from_pos, target):
+    """
+    Encodes an entry of a piece's all_moves list.
+
+    Parameters:
+    from_pos (tuple): square of the piece in (file, rank) format
+    target (tuple): the all_moves entry, ((file, rank), move_type)
+
+    Returns:
+    move (int): the 16-bit move, without double push or promotion flags
+
+    """
+    to_pos, move_type = target
+    from_square = from_pos[1] * 8 + from_pos[0]
+    to_square = to_pos[1] * 8 + to_pos[0]
+    if move_type == 'N':
+        flags = QUIET
+    elif move_type == 'C':
+        flags = CAPTURE
+    elif move_type == 'E':
+        flags = EN_PASSANT
+    else:
+        flags = KING_CASTLE if to_pos[0] > from_pos[0] else QUEEN_CASTLE
+    return from_square | to_square << 6 | flags << 12
+
+
+def decode_target(move):
+    """
+    Decodes a move into an all_moves entry, ((file, rank), move_type)
+    """
+    return (SQUARES[(move >> 6) & 0x3F], FLAG_MOVE_TYPES[move >> 12])
+
+
+def encode_move_tuple(move):
+    """
+    Encodes a move history tuple.
+
+    Parameters:
+    move (tuple of (piece, prev_square, new_square, move_type, ...)): the move, with an
+        optional sixth element naming the promotion piece type
+
+    Returns:
+    move (int): the 16-bit move
+
+    """
+    piece, prev_square, new_square, move_type = move[0], move[1], move[2], move[3]
+    promotion = move[5] if len(move) > 5 else None
+    from_square = prev_square[1] * 8 + prev_square[0]
+    to_square = new_square[1] * 8 + new_square[0]
+
+    if promotion:
+        flags = PROMOTION | PROMOTION_FLAGS[promotion] | (CAPTURE if move_type == 'C' else 0)
+    elif move_type == 'C':
+        flags = CAPTURE
+    elif move_type == 'E':
+        flags = EN_PASSANT
+    elif move_type == 'O':
+        flags = KING_CASTLE if new_square[0] > prev_square[0] else QUEEN_CASTLE
+    elif piece.get_piece_type() == 'pawn' and abs(new_square[1] - prev_square[1]) == 2:
+        flags = DOUBLE_PUSH
+    else:
+        flags = QUIET
+    return from_square | to_square << 6 | flags << 12
+
+
+def decode_move(move, board):
+    """
+    Decodes a move into a move history tuple for the given board.
+
+    Parameters:
+    move (int): the 16-bit move
+    board (Board): the position the move is played in, to look up the moving piece
+
+    Returns:
+    move (tuple): (piece, prev_square, new_square, move_type, marker, promotion)
+
+    """
+    flags = move >> 12
+    prev_square = SQUARES[move & 0x3F]
+    promotion = PROMOTION_TYPES[flags & 3] if flags & PROMOTION else None
+    return (board.get_piece_from_position(prev_square), prev_square,
+            SQUARES[(move >> 6) & 0x3F], FLAG_MOVE_TYPES[flags], None, promotion)
@@ -0,0 +1,247 @@
+""" This module orders moves for the alpha-beta search, best guesses first.
+
+Moves come out lazily, in stages:
+    1. the hash move from the transposition table, checked for legality on its own
+       piece, so no other move is generated if it cuts off
+    2. captures, en-passant and queen promotions, by MVV-LVA (most valuable victim,
+       then least valuable attacker)
+    3. the killer moves of the ply: quiet moves that cut off at the same distance
+       from the root elsewhere in the tree, each checked for legality on its own piece
+    4. the other quiet moves, by the history heuristic: how much each (from, to) move
+       of each colour has cut off anywhere in the tree, weighted by depth
+
+Captures and quiet moves are generated apart (see Board.get_legal_captures and
+Board.get_legal_quiet_moves), and the quiet moves are only generated and sorted once
+the earlier stages, killers included, failed to cut off.
+"""
+
+from src.move import encode_move_tuple, decode_move
+
+# Stages of MoveOrderer.order_moves
+HASH_STAGE = 0
+CAPTURE_STAGE = 1
+KILLER_STAGE = 2
+QUIET_STAGE = 3
+
+# Order of the piece types by value, for MVV-LVA
+PIECE_ORDER = {'pawn': 1, 'knight': 2, 'bishop': 3, 'rook': 4, 'queen': 5, 'king': 6}
+
+KILLERS_PER_PLY = 2
+MAX_PLY = 128
+# History scores are halved once any of them passes this, keeping them in range
+MAX_HISTORY = 1 << 20
+
+
+def mvv_lva(board, move):
+    """
+    Scores a capture or promotion for ordering: the victim's value first, then the
+    attacker's value, lowest first.
+
+    Parameters:
+    board (Board): the position the move is played in
+    move (tuple): the move history tuple
+
+    Returns:
+    score (int): higher for moves to try earlier
+
+    """
+    move_type = move[3]
+    if move_type == 'C':
+        victim = PIECE_ORDER[board.get_piece_from_position(move[2]).get_piece_type()]
+    elif move_type == 'E':
+        victim = PIECE_ORDER['pawn']
+    else:
+        victim = 0
+    if len(move) > 5 and move[5]:
+        victim += PIECE_ORDER[move[5]] - PIECE_ORDER['pawn']
+    return victim * 8 - PIECE_ORDER[move[0].get_piece_type()]
+
+
+def is_tactical(move):
+    """
+    Tests whether a move goes in the capture stage: captures, en-passant captures and
+    queen promotions
+    """
+    return move[3] == 'C' or move[3] == 'E' or (len(move) > 5 and move[5] == 'queen')
+
+
+def decode_legal_move(board, move):
+    """
+    Decodes a 16-bit move for the side to move if it is legal in the position,
+    generating the moves of the moving piece only.
+
+    Parameters:
+    board (Board): the position
+    move (int): the 16-bit encoded move
+
+    Returns:
+    move (tuple): the move history tuple, or None if the move is not legal
+
+    """
+    decoded = decode_move(move, board)
+    piece = decoded[0]
+    if piece is None or piece.get_colour() != board.colour_to_move:
+        return None
+    if decoded[5] and piece.get_piece_type() != 'pawn':
+        return None
+    target, move_type = decoded[2], decoded[3]
+    board.update_pins_and_checks(board.colour_to_move)
+    for legal_move in piece.get_legal_moves(board):
+        if legal_move[0] == target and legal_move[1] == move_type:
+            is_promotion = piece.get_piece_type() == 'pawn' and target[1] in (0, 7)
+            if is_promotion == bool(decoded[5]):
+                return decoded
+    return None
+
+
+class MoveOrderer():
+    """
+    Killer moves and history scores gathered during a search, and the staged move
+    generator that uses them.
+    """
+
+    def __init__(self):
+        self.killers = [[0] * KILLERS_PER_PLY for _ in range(MAX_PLY + 1)]
+        # Indexed by colour, then from_square * 64 + to_square
+        self.history = {'W': [0] * 4096, 'B': [0] * 4096}
+        self.stage = None
+
+        self.hash_move_nodes = 0
+        self.hash_move_generated = 0
+
+    def new_search(self):
+        """
+        Forgets the killer moves and ages the history scores, before a new search
+        """
+        for killers in self.killers:
+            killers[:] = [0] * KILLERS_PER_PLY
+        for history in self.history.values():
+            history[:] = [score >> 1 for score in history]
+        self.hash_move_nodes = self.hash_move_generated = 0
+
+    def add_killer(self, ply, move):
+        """
+        Records a quiet move that cut off at the given ply.
+
+        Parameters:
+        ply (int): distance from the root
+        move (int): the 16-bit encoded move
+
+        Returns:
+        None
+
+        """
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+    def add_history(self, colour, move, depth):
+        """
+        Rewards a quiet move that cut off, by the square of the depth it was searched to.
+
+        Parameters:
+        colour (str): 'W' or 'B', the side that made the move
+        move (int): the 16-bit encoded move
+        depth (int): depth the move was searched to
+
+        Returns:
+        None
+
+        """
+        history = self.history[colour]
+        index = move & 0xFFF
+        history[index] += depth * depth
+        if history[index] > MAX_HISTORY:
+            for history in self.history.values():
+                history[:] = [score >> 1 for score in history]
+
+    def get_hash_move(self, board, hash_move):
+        """
+        Returns the hash move as a move history tuple if it is legal in the position,
+        generating the moves of the moving piece only, or else None.
+        """
+        return decode_legal_move(board, hash_move)
+
+    def order_moves(self, board, ply, hash_move=0):
+        """
+        Yields the legal moves of the side to move in stages, see the module docstring.
+        The stage of the last move yielded is kept in `stage`.
+
+        Parameters:
+        board (Board): the position
+        ply (int): distance from the root, for the killer moves
+        hash_move (int): the 16-bit encoded best move from the transposition table, or 0
+
+        Returns:
+        generator of move history tuples
+
+        """
+        hash_tuple = None
+        if hash_move:
+            hash_tuple = self.get_hash_move(board, hash_move)
+            if hash_tuple is not None:
+                self.stage = HASH_STAGE
+                self.hash_move_nodes += 1
+                yield hash_tuple
+
+        if hash_tuple is not None:
+            self.hash_move_generated += 1
+        # Captures are generated on their own, so quiet moves are only built if none of
+        # them cuts off
+        tactical = [(mvv_lva(board, move), move) for move in board.get_legal_captures()
+                    if hash_tuple is None or encode_move_tuple(move) != hash_move]
+        self.stage = CAPTURE_STAGE
+        tactical.sort(key=lambda scored_move: scored_move[0], reverse=True)
+        for (_, move) in tactical:
+            yield move
+
+        # Queen promotions by a push go with the captures
+        for move in board.get_legal_quiet_moves(promotions_only=True):
+            if move[5] == 'queen' and (hash_tuple is None or encode_move_tuple(move) != hash_move):
+                yield move
+
+        # Each killer is checked on its own piece, like the hash move, so a killer that
+        # cuts off saves generating the quiet moves
+        self.stage = KILLER_STAGE
+        played = [hash_move] if hash_tuple is not None else []
+        for killer in self.killers[ply]:
+            if not killer or killer in played:
+                continue
+            move = decode_legal_move(board, killer)
+            if move is not None and not is_tactical(move):
+                played.append(killer)
+                yield move
+
+        self.stage = QUIET_STAGE
+        history = self.history[board.colour_to_move]
+        quiet = []
+        for move in board.get_legal_quiet_moves():
+            if move[5] == 'queen':
+                continue
+            encoded_move = encode_move_tuple(move)
+            if encoded_move not in played:
+                quiet.append((history[encoded_move & 0xFFF], len(quiet), move))
+        quiet.sort(key=lambda scored_move: scored_move[:2], reverse=True)
+        for (_, _, move) in quiet:
+            yield move
+
+    def get_stats(self):
+        """
+        Returns how often the hash move was tried before generating any other move.
+
+        Parameters:
+        None
+
+        Returns:
+        stats (dict): hash_move_nodes (nodes with a legal hash move), hash_move_generated
+            (those of them that went on to generate every move) and hash_cutoff_rate
+            (the fraction that never did)
+
+        """
+        return {
+            'hash_move_nodes': self.hash_move_nodes,
+            'hash_move_generated': self.hash_move_generated,
+            'hash_cutoff_rate': (1 - self.hash_move_generated / self.hash_move_nodes
+                                 if self.hash_move_nodes else 0.0),
+        }
@@ -1,14 +1,92 @@
 """ This module implements the Pawn piece """
 
-from src.board import Board
+from src.bitboard import FULL_BOARD, SQUARES, SQUARE_BITS, PAWN_ATTACKS, iter_bits
 from src.piece import BasicPiece
 
+# Rank of the square a pawn of each colour lands on when capturing en-passant
+EN_PASSANT_RANK = {'W': 5, 'B': 2}
+
+RANK_MASKS = [0xFF << (8 * rank) for rank in range(8)]
+NOT_FILE_A = 0xFEFEFEFEFEFEFEFE
+NOT_FILE_H = 0x7F7F7F7F7F7F7F7F
+# Squares a pawn of each colour promotes on
+PROMOTION_RANK = {'W': RANK_MASKS[7], 'B': RANK_MASKS[0]}
+
+# For each colour: (push shift, rank a double push lands on, ((capture shift, mask), ...)).
+# A shift is added to the square index of the pawn, so white moves up the board and
+# black down, and the masks drop the captures that would wrap round the board's edge
+PAWN_SHIFTS = {
+    'W': (8, RANK_MASKS[3], ((7, NOT_FILE_H), (9, NOT_FILE_A))),
+    'B': (-8, RANK_MASKS[4], ((-9, NOT_FILE_H), (-7, NOT_FILE_A))),
+}
+
+
+def shift_bits(bits, shift):
+    """
+    Moves every square of a bitboard by the same number of squares, towards H8 if the
+    shift is positive. Squares pushed off either end of the board are dropped.
+    """
+    if shift > 0:
+        return (bits << shift) & FULL_BOARD
+    return bits >> -shift
+
+
+def get_pawn_move_sets(colour, pawns, occupied, enemy, captures_only=False):
+    """
+    Generates the moves of all the pawns of a colour at once, by shifting the bitboard
+    of the pawns rather than looking at each pawn in turn. En-passant captures are not
+    included, see get_en_passant_pawns.
+
+    Parameters:
+    colour (str): 'W' or 'B'
+    pawns (int): bitboard of the pawns to move
+    occupied (int): bitboard of every piece on the board
+    enemy (int): bitboard of the enemy pieces
+    captures_only (bool): leave out the pushes
+
+    Returns:
+    move_sets (list): (shift, move_type, targets) for each capture direction, the single
+        pushes and the double pushes, in that order. targets is the bitboard of the
+        destination squares, and each of them is reached from its index minus shift
+
+    """
+    (push, double_rank, captures) = PAWN_SHIFTS[colour]
+    move_sets = [(shift, 'C', shift_bits(pawns, shift) & mask & enemy) for (shift, mask) in captures]
+    if not captures_only:
+        empty = ~occupied
+        single = shift_bits(pawns, push) & empty
+        move_sets.append((push, 'N', single))
+        move_sets.append((push + push, 'N', shift_bits(single, push) & empty & double_rank))
+    return move_sets
+
+
+def get_en_passant_pawns(colour, pawns, en_passant_square):
+    """
+    Returns the pawns that can capture en-passant: those an enemy pawn standing on the
+    en-passant square would attack.
+
+    Parameters:
+    colour (str): 'W' or 'B', the side capturing
+    pawns (int): bitboard of the pawns of that side
+    en_passant_square (tuple): the en-passant square in (file, rank) format, or None
+
+    Returns:
+    pawns (int): bitboard of the pawns that can capture, pins not taken into account
+
+    """
+    if not en_passant_square or en_passant_square[1] != EN_PASSANT_RANK[colour]:
+        return 0
+    enemy_colour = 'B' if colour == 'W' else 'W'
+    return PAWN_ATTACKS[enemy_colour][en_passant_square[1] * 8 + en_passant_square[0]] & pawns
+
 
 class Pawn(BasicPiece):
     """
     The Pawn class. Contains all the functionality for a pawn on a chess board.
     """
 
+    __slots__ = ()
+
     def __init__(self, colour, pos):
         BasicPiece.__init__(self, colour, 'pawn', pos)
         """
@@ -18,105 +96,62 @@ class Pawn(BasicPiece):
         self.previous_square = pos
 
     def update_all_moves(self, board):
-        self.all_moves = []
-        self.squares_defended = []
-
-
-        # TODO
-        # Refactor to remove repetition. Can use a *-1 to denote movement for black pieces
-
-        # Consider a white pawn
-        if self.get_colour() == 'W':
-            left_attacking_square = (self.pos[0] - 1, self.pos[1] + 1)
-            if Board.is_valid_square(left_attacking_square):
-                self.squares_defended.append(left_attacking_square)
-                if ( board.get_piece_from_position(left_attacking_square)
-                    and board.get_piece_from_position(left_attacking_square).get_colour() == 'B' ):
-                    self.all_moves.append((left_attacking_square, 'C'))
-            right_attacking_square = (self.pos[0] + 1, self.pos[1] + 1)
-            if Board.is_valid_square(right_attacking_square):
-                self.squares_defended.append(right_attacking_square)
-                if ( board.get_piece_from_position(right_attacking_square)
-                    and board.get_piece_from_position(right_attacking_square).get_colour() == 'B' ):
-                    self.all_moves.append((right_attacking_square, 'C'))
-
-            # This will always be a valid square since promotion would have occurred otherwise
-            # The only scenario would be if the board is built incorrectly
-            # Avoid this by preventing pawns from being placed on the first and last rank
-            square_ahead = (self.pos[0], self.pos[1] + 1)
-
-            if not board.get_piece_from_position(square_ahead):
-                self.all_moves.append((square_ahead, 'N'))
-
-                # Check for the two square move
-                two_squares_ahead = (self.pos[0], self.pos[1] + 2)
-
-                # check that the two square move is empty AND that the pawn has not yet moved
-                # ie. it is on the second rank
-                if not board.get_piece_from_position(two_squares_ahead) and self.previous_square[1] == 1:
-                    self.all_moves.append((two_squares_ahead, 'N'))
-
-            # Code for en-passant here
-            # Check that self is on the correct rank
-            if self.pos[1] == 4:
-                previous_board_move = board.get_last_move()
-                # Check that there has been a previous move
-                if previous_board_move:
-                    piece = previous_board_move[0]
-                    piece_old_pos = previous_board_move[1]
-                    piece_new_pos = previous_board_move[2]
-                    # Check that the previous move was a pawn move
-                    # and that it is on one of the adjacent files
-                    if ( piece.get_piece_type() == 'pawn' and
-                        (piece_new_pos[0] == self.pos[0] - 1 or
-                        piece_new_pos[0] == self.pos[0] + 1) ):
-                        # Check that the move was a two square move
-                        if piece_new_pos[1] == 4 and piece_old_pos[1] == 6:
-                            self.all_moves.append(((piece_new_pos[0], 5), 'E'))
-
-
-
-
-
-        # Consider a black pawn
-        if self.get_colour() == 'B':
-            left_attacking_square = (self.pos[0] - 1, self.pos[1] - 1)
-            if Board.is_valid_square(left_attacking_square):
-                self.squares_defended.append(left_attacking_square)
-                if ( board.get_piece_from_position(left_attacking_square) and
-                    board.get_piece_from_position(left_attacking_square).get_colour() == 'W' ):
-                    self.all_moves.append((left_attacking_square, 'C'))
-            right_attacking_square = (self.pos[0] + 1, self.pos[1] - 1)
-            if Board.is_valid_square(right_attacking_square):
-                self.squares_defended.append(right_attacking_square)
-                if ( board.get_piece_from_position(right_attacking_square) and
-                    board.get_piece_from_position(right_attacking_square).get_colour() == 'W' ):
-                    self.all_moves.append((right_attacking_square, 'C'))
-
-            # This will always be a valid square since promotion would have occurred otherwise
-            # The only scenario would be if the board is built incorrectly
-            # Avoid this by preventing pawns from being placed on the first and last rank
-            square_ahead = (self.pos[0], self.pos[1] - 1)
-
-            if not board.get_piece_from_position(square_ahead):
-                self.all_moves.append((square_ahead, 'N'))
-
-                # Check for the two square move
-                two_squares_ahead = (self.pos[0], self.pos[1] - 2)
-                if not board.get_piece_from_position(two_squares_ahead) and self.previous_square[1] == 6:
-                    self.all_moves.append((two_squares_ahead, 'N'))
-
-            # Code for en-passant here
-            if self.pos[1] == 3:
-                previous_board_move = board.get_last_move()
-                # Check that there is a previous move
-                if previous_board_move:
-                    piece = previous_board_move[0]
-                    piece_old_pos = previous_board_move[1]
-                    piece_new_pos = previous_board_move[2]
-                    # Check that the previous move was a pawn move
-                    # and that it is on one of the adjacent files
-                    if piece.get_piece_type() == 'pawn' and (piece_new_pos[0] == self.pos[0] - 1 or piece_new_pos[0] == self.pos[0] + 1):
-                        # CHeck that the move was a two square move
-                        if piece_new_pos[1] == 3 and piece_old_pos[1] == 1:
-                            self.all_moves.append(((piece_new_pos[0], 2), 'E'))
\ No newline at end of file
+        """
+        Updates the fields `all_moves` and `squares_defended` for this pawn alone, with
+        the same set-wise generator the board uses for all of its pawns at once
+        (see Board.update_pawn_moves).
+        """
+        colour = self.get_colour()
+        pawn_bit = SQUARE_BITS[self.pos[1] * 8 + self.pos[0]]
+        enemy = board.colour_bitboards['B' if colour == 'W' else 'W']
+        self.squares_defended = [SQUARES[index] for index in iter_bits(PAWN_ATTACKS[colour][pawn_bit.bit_length() - 1])]
+        self.all_moves = [(SQUARES[index], move_type)
+                          for (_, move_type, targets) in get_pawn_move_sets(colour, pawn_bit, board.occupied, enemy)
+                          for index in iter_bits(targets)]
+        en_passant_square = board.get_en_passant_square()
+        if get_en_passant_pawns(colour, pawn_bit, en_passant_square):
+            self.all_moves.append((en_passant_square, 'E'))
+
+    def get_legal_moves(self, board):
+        """
+        Determine which of all moves are actually legal moves. En-passant captures
+        remove a pawn from a square the move does not land on, so they are tested
+        on their own (see Board.is_legal_en_passant).
+
+        Updates the field `legal_moves` and returns it.
+        """
+        self.update_all_moves(board)
+        board.update_pins_and_checks(self.get_colour())
+        mask = board.get_move_mask(self)
+        legal_moves = []
+        for move in self.all_moves:
+            if move[1] == 'E':
+                if board.is_legal_en_passant(self, move[0]):
+                    legal_moves.append(move)
+            elif SQUARE_BITS[move[0][1] * 8 + move[0][0]] & mask:
+                legal_moves.append(move)
+        self.legal_moves = legal_moves
+        return legal_moves
+
+    def get_legal_captures(self, board):
+        """
+        Returns only the legal captures, including en-passant captures, without
+        building the pushes. See BasicPiece.get_legal_captures.
+        """
+        colour = self.get_colour()
+        board.update_pins_and_checks(colour)
+        attack_mask = PAWN_ATTACKS[colour][self.pos[1] * 8 + self.pos[0]]
+        targets = (attack_mask & board.colour_bitboards['B' if colour == 'W' else 'W']
+                   & board.get_move_mask(self))
+        captures = []
+        while targets:
+            target_bit = targets & -targets
+            targets ^= target_bit
+            captures.append((SQUARES[target_bit.bit_length() - 1], 'C'))
+
+        en_passant_square = board.get_en_passant_square()
+        if ( en_passant_square and en_passant_square[1] == EN_PASSANT_RANK[colour]
+            and attack_mask & SQUARE_BITS[en_passant_square[1] * 8 + en_passant_square[0]]
+            and board.is_legal_en_passant(self, en_passant_square) ):
+            captures.append((en_passant_square, 'E'))
+        return captures
@@ -0,0 +1,355 @@
+""" This module counts move generation paths (perft) to measure the speed and the
+correctness of the move generator.
+
+Run from the repository root, ie.
+    python -m src.perft "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1" 3
+    python -m src.perft --suite 3
+    python -m src.perft "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1" 5 --workers 8
+
+With --workers the tree is split a ply or two below the root and the subtrees are
+counted in separate processes, see parallel_perft_counts.
+"""
+
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from src.bitboard import square_name
+from src.board import Board, STARTING_FEN
+
+# Standard perft positions with their known node counts, keyed by depth
+REFERENCE_POSITIONS = [
+    ('startpos', STARTING_FEN,
+     {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     {1: 48, 2: 2039, 3: 97862, 4: 4085603}),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624}),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     {1: 44, 2: 1486, 3: 62379, 4: 2103487}),
+    ('position6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     {1: 46, 2: 2079, 3: 89890, 4: 3894594}),
+]
+
+PERFT_COUNTERS = ('nodes', 'captures', 'en_passant', 'castles', 'promotions', 'checks')
+
+# Plies below the root at which the tree is split for parallel perft: enough subtrees
+# to keep every worker busy, each big enough to be worth sending to a process
+SPLIT_DEPTH = 2
+
+
+def get_legal_moves(board):
+    """
+    Returns the legal moves for the side to move.
+
+    Parameters:
+    board (Board): the position
+
+    Returns:
+    moves (list): list of move tuples, see Board.get_legal_moves
+
+    """
+    return board.get_legal_moves()
+
+
+def filter_legal_moves(board):
+    """
+    Returns the legal moves for the side to move by making every pseudo-legal move
+    and testing whether it leaves the king in check. Much slower than
+    get_legal_moves; kept to cross-check the legal move generator.
+
+    Parameters:
+    board (Board): the position
+
+    Returns:
+    moves (list): list of move tuples, see Board.get_pseudo_legal_moves
+
+    """
+    colour = board.colour_to_move
+    legal_moves = []
+    for move in board.get_pseudo_legal_moves():
+        board.make_move(move)
+        if not board.is_in_check(colour):
+            legal_moves.append(move)
+        board.unmake_move()
+    return legal_moves
+
+
+def move_name(move):
+    """
+    Names a move tuple in coordinate notation, ie. 'e2e4' or 'a7a8q' for a promotion.
+    """
+    name = square_name(move[1]) + square_name(move[2])
+    if len(move) > 5 and move[5]:
+        name += 'n' if move[5] == 'knight' else move[5][0]
+    return name
+
+
+def perft(board, depth):
+    """
+    Counts the leaf nodes of the move tree to the given depth.
+
+    Parameters:
+    board (Board): the position to start from. It is restored before returning
+    depth (int): number of plies to search
+
+    Returns:
+    nodes (int): number of leaf nodes
+
+    """
+    if depth == 0:
+        return 1
+    moves = get_legal_moves(board)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def perft_divide(board, depth):
+    """
+    Counts the leaf nodes below each root move, for comparing against another engine.
+
+    Parameters:
+    board (Board): the position to start from
+    depth (int): number of plies to search, at least 1
+
+    Returns:
+    counts (dict): maps each root move, in coordinate notation (ie. 'e2e4', 'a7a8q'),
+        to its number of leaf nodes
+
+    """
+    counts = {}
+    for move in get_legal_moves(board):
+        board.make_move(move)
+        counts[move_name(move)] = perft(board, depth - 1)
+        board.unmake_move()
+    return counts
+
+
+def perft_counts(board, depth):
+    """
+    Counts the leaf nodes to the given depth, split by how the last move was made.
+
+    Parameters:
+    board (Board): the position to start from
+    depth (int): number of plies to search, at least 1
+
+    Returns:
+    counts (dict): counts keyed by each name in PERFT_COUNTERS
+
+    """
+    counts = dict.fromkeys(PERFT_COUNTERS, 0)
+    _count_leaves(board, depth, counts)
+    return counts
+
+
+def _count_leaves(board, depth, counts):
+    """
+    Recursive helper for perft_counts
+    """
+    for move in get_legal_moves(board):
+        board.make_move(move)
+        if depth == 1:
+            move_type = move[3]
+            counts['nodes'] += 1
+            if move_type == 'C':
+                counts['captures'] += 1
+            elif move_type == 'E':
+                counts['captures'] += 1
+                counts['en_passant'] += 1
+            elif move_type == 'O':
+                counts['castles'] += 1
+            if len(move) > 5 and move[5]:
+                counts['promotions'] += 1
+            if board.is_in_check(board.colour_to_move):
+                counts['checks'] += 1
+        else:
+            _count_leaves(board, depth - 1, counts)
+        board.unmake_move()
+
+
+def _subtree_fen(board):
+    """
+    Returns the position as a FEN string with the move clocks reset, which perft does
+    not depend on, so that transpositions give the same string
+    """
+    return board.to_fen().rsplit(' ', 2)[0] + ' 0 1'
+
+
+def split_positions(board, split_depth):
+    """
+    Plays every sequence of split_depth legal moves from the position, collecting the
+    positions reached. Positions reached by more than one sequence from the same root
+    move are only given once, with how many times they were reached.
+
+    Parameters:
+    board (Board): the position to start from. It is restored before returning
+    split_depth (int): number of plies to play, at least 1
+
+    Returns:
+    subtrees (dict): maps each root move, in coordinate notation, to a Counter of the
+        FEN strings of the positions reached through it
+
+    """
+    subtrees = {}
+    for move in get_legal_moves(board):
+        board.make_move(move)
+        positions = subtrees[move_name(move)] = Counter()
+        _collect_positions(board, split_depth - 1, positions)
+        board.unmake_move()
+    return subtrees
+
+
+def _collect_positions(board, depth, positions):
+    """
+    Recursive helper for split_positions
+    """
+    if depth == 0:
+        positions[_subtree_fen(board)] += 1
+        return
+    for move in get_legal_moves(board):
+        board.make_move(move)
+        _collect_positions(board, depth - 1, positions)
+        board.unmake_move()
+
+
+def _count_subtree(fen, depth):
+    """
+    Counts a subtree in a worker process. Only the FEN string and the counts cross the
+    process boundary, never a Board
+    """
+    return perft_counts(Board.from_fen(fen), depth)
+
+
+def parallel_perft_counts(fen, depth, workers=None, split_depth=SPLIT_DEPTH):
+    """
+    Counts the leaf nodes like perft_counts, sharing the work between processes: the
+    tree is split split_depth plies below the root (see split_positions) and each
+    distinct position there is counted by a worker, which is sent its FEN string and
+    the depth left. The partial counts are merged, multiplied by how many times each
+    position was reached.
+
+    Parameters:
+    fen (str): the position in Forsyth-Edwards Notation
+    depth (int): number of plies to search, at least 1
+    workers (int): number of processes, the number of CPUs if None
+    split_depth (int): plies below the root to split the tree at. Lowered to depth - 1
+        if the tree is not that deep
+
+    Returns:
+    counts (dict): counts keyed by each name in PERFT_COUNTERS, plus 'divide', which
+        maps each root move in coordinate notation to its number of leaf nodes
+
+    """
+    board = Board.from_fen(fen)
+    split_depth = min(split_depth, depth - 1)
+    if split_depth < 1:
+        counts = perft_counts(board, depth)
+        counts['divide'] = perft_divide(board, depth)
+        return counts
+
+    subtrees = split_positions(board, split_depth)
+    # A position reached through different root moves is still only counted once
+    tasks = sorted(set().union(*subtrees.values()))
+    workers = workers or os.cpu_count()
+    # Several subtrees go in each message, while leaving enough chunks for the workers
+    # that get the small subtrees to pick up more
+    chunksize = max(1, len(tasks) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = dict(zip(tasks, executor.map(_count_subtree, tasks,
+                                                [depth - split_depth] * len(tasks),
+                                                chunksize=chunksize)))
+
+    counts = dict.fromkeys(PERFT_COUNTERS, 0)
+    counts['divide'] = {}
+    for (root_move, positions) in subtrees.items():
+        nodes = 0
+        for (position, times) in positions.items():
+            for name in PERFT_COUNTERS:
+                counts[name] += results[position][name] * times
+            nodes += results[position]['nodes'] * times
+        counts['divide'][root_move] = nodes
+    return counts
+
+
+def run_perft(fen, depth, output=sys.stdout, workers=None):
+    """
+    Runs perft_counts on a position and reports the counts and nodes per second.
+
+    Parameters:
+    fen (str): the position in Forsyth-Edwards Notation
+    depth (int): number of plies to search
+    output (file): where to write the report
+    workers (int): if given, count in this many processes with parallel_perft_counts
+
+    Returns:
+    counts (dict): the perft counts, plus 'seconds' and 'nps'
+
+    """
+    start = time.perf_counter()
+    if workers:
+        counts = parallel_perft_counts(fen, depth, workers)
+        del counts['divide']
+    else:
+        counts = perft_counts(Board.from_fen(fen), depth)
+    seconds = time.perf_counter() - start
+    counts['seconds'] = seconds
+    counts['nps'] = counts['nodes'] / seconds if seconds > 0 else 0.0
+
+    output.write(f'{fen}\ndepth {depth}' + (f', {workers} workers' if workers else '') + '\n')
+    for name in PERFT_COUNTERS:
+        output.write(f'  {name:<11} {counts[name]}\n')
+    output.write(f'  {"time":<11} {seconds:.3f}s\n  {"nps":<11} {counts["nps"]:.0f}\n')
+    return counts
+
+
+def run_suite(max_depth, output=sys.stdout):
+    """
+    Runs perft on every reference position up to max_depth and checks the node counts.
+
+    Parameters:
+    max_depth (int): deepest depth to run for each position
+    output (file): where to write the report
+
+    Returns:
+    bool: True if every count matched, False otherwise
+
+    """
+    all_passed = True
+    total_nodes = 0
+    start = time.perf_counter()
+    for (name, fen, expected_counts) in REFERENCE_POSITIONS:
+        for depth in range(1, max_depth + 1):
+            if depth not in expected_counts:
+                continue
+            nodes = perft(Board.from_fen(fen), depth)
+            total_nodes += nodes
+            passed = nodes == expected_counts[depth]
+            all_passed = all_passed and passed
+            output.write(f'{name:<10} depth {depth}: {nodes:>9} '
+                         f'{"ok" if passed else "FAILED, expected " + str(expected_counts[depth])}\n')
+    seconds = time.perf_counter() - start
+    output.write(f'{total_nodes} nodes in {seconds:.3f}s ({total_nodes / seconds:.0f} nps)\n')
+    return all_passed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--suite':
+        sys.exit(0 if run_suite(int(sys.argv[2])) else 1)
+    elif len(sys.argv) == 3:
+        run_perft(sys.argv[1], int(sys.argv[2]))
+    elif len(sys.argv) == 5 and sys.argv[3] == '--workers':
+        run_perft(sys.argv[1], int(sys.argv[2]), workers=int(sys.argv[4]))
+    else:
+        sys.stderr.write('usage: python -m src.perft "<fen>" <depth> [--workers <count>]\n'
+                         '       python -m src.perft --suite <max depth>\n')
+        sys.exit(2)
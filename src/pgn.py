@@ -0,0 +1,228 @@
+""" This module reads and writes games in Portable Game Notation (PGN).
+
+Games are streamed out of files of any size one at a time (see iter_games). Each game
+keeps its tags and its moves in SAN, and is only replayed into a Board through
+parse_san and Board.make_move when asked, so scanning a database for tags costs no
+move generation. game_to_pgn writes a board's move history back out.
+"""
+
+import re
+
+from src.board import Board, STARTING_FEN
+from src.epd import iter_lines
+from src.san import parse_san, move_to_san
+
+# The tags every PGN game carries, in the order they are written
+SEVEN_TAG_ROSTER = (
+    ('Event', '?'), ('Site', '?'), ('Date', '????.??.??'), ('Round', '?'),
+    ('White', '?'), ('Black', '?'), ('Result', '*'),
+)
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+LINE_LENGTH = 80
+
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# Comments, variations, NAGs, move numbers, results and moves, in that order so that
+# ie. '1-0' is not read as a move number
+MOVETEXT_PATTERN = re.compile(
+    r'\{[^}]*\}|;[^\n]*|\(|\)|\$\d+|1-0|0-1|1/2-1/2|\*|\d+\.+|[^\s(){};$]+')
+
+
+class PgnGame():
+    """
+    One game read from a PGN file.
+    """
+
+    __slots__ = ('tags', 'movetext', '__moves', '__result')
+
+    def __init__(self, tags, movetext):
+        """
+        Parameters:
+        tags (dict): the tag pairs, ie. {'White': 'Carlsen, Magnus', 'Result': '1-0'}
+        movetext (str): the moves, comments and result as written in the file
+        """
+        self.tags = tags
+        self.movetext = movetext
+        self.__moves = None
+        self.__result = None
+
+    def __parse_movetext(self):
+        """
+        Splits the movetext into the SAN moves of the main line and the result.
+        Comments, variations and NAGs are skipped.
+        """
+        moves = []
+        result = self.tags.get('Result', '*')
+        variation_depth = 0
+        for token in MOVETEXT_PATTERN.findall(self.movetext):
+            first = token[0]
+            if first == '(':
+                variation_depth += 1
+            elif first == ')':
+                variation_depth -= 1
+            elif variation_depth or first in '{;$' or token[-1] == '.':
+                continue
+            elif token in RESULTS:
+                result = token
+            else:
+                moves.append(token)
+        self.__moves = moves
+        self.__result = result
+
+    def get_moves(self):
+        """
+        Returns the main line in SAN, ie. ['e4', 'e5', 'Nf3']
+        """
+        if self.__moves is None:
+            self.__parse_movetext()
+        return self.__moves
+
+    def get_result(self):
+        """
+        Returns the result, ie. '1-0', from the movetext or else the Result tag
+        """
+        if self.__moves is None:
+            self.__parse_movetext()
+        return self.__result
+
+    def get_start_fen(self):
+        """
+        Returns the position the game starts from: the FEN tag, or the standard start
+        """
+        return self.tags.get('FEN', STARTING_FEN)
+
+    def replay(self):
+        """
+        Plays the game's moves on a new board, through Board.make_move.
+
+        Parameters:
+        None
+
+        Returns:
+        board (Board): the final position. Its move history holds every move, with the
+            SAN disambiguation in each move's additional marker
+
+        Raises:
+        ValueError: if a move is illegal or ambiguous
+
+        """
+        board = Board.from_fen(self.get_start_fen())
+        for san in self.get_moves():
+            board.make_move(parse_san(board, san))
+        return board
+
+
+def _parse_games(lines):
+    """
+    Groups lines of PGN text into games. A tag line that follows movetext starts a new
+    game, unless it falls inside a comment.
+    """
+    tags = {}
+    movetext = []
+    open_comments = 0
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped[0] == '%':
+            continue
+        if stripped[0] == '[' and not open_comments:
+            if movetext:
+                yield PgnGame(tags, '\n'.join(movetext))
+                tags = {}
+                movetext = []
+            match = TAG_PATTERN.match(stripped)
+            if match:
+                tags[match.group(1)] = match.group(2).replace('\\"', '"').replace('\\\\', '\\')
+            continue
+        movetext.append(stripped)
+        open_comments += stripped.count('{') - stripped.count('}')
+    if tags or movetext:
+        yield PgnGame(tags, '\n'.join(movetext))
+
+
+def iter_games(path, use_mmap=True):
+    """
+    Yields the games in a PGN file one at a time, without reading the whole file.
+
+    Parameters:
+    path (str): the file
+    use_mmap (bool): read through a memory map rather than buffered reads
+
+    Returns:
+    generator of PgnGame
+
+    """
+    return _parse_games(line for (_, line) in iter_lines(path, use_mmap=use_mmap))
+
+
+def read_games(text):
+    """
+    Returns the games in a string of PGN text, see iter_games
+    """
+    return list(_parse_games(text.splitlines()))
+
+
+def game_to_pgn(board, tags=None):
+    """
+    Writes the moves made on a board as a PGN game. The moves are taken back to find
+    the starting position, each one written in SAN on the position before it, and then
+    the recorded move tuples are made again, so the board and its move history end up
+    as they were.
+
+    Parameters:
+    board (Board): the board, with every move made through make_move
+    tags (dict): tag pairs to write. Missing seven tag roster tags get their defaults
+
+    Returns:
+    pgn (str): the game, ending with a blank line
+
+    """
+    tags = dict(tags or {})
+    moves = board.get_move_history()
+    sans = []
+    while board.undo_stack:
+        # The check suffix is read off the position after the move, before taking it back
+        suffix = ''
+        if board.is_in_check(board.colour_to_move):
+            suffix = '+' if board.get_legal_moves() else '#'
+        move = board.unmake_move()
+        sans.append(move_to_san(board, move, suffix=False) + suffix)
+    sans.reverse()
+
+    start_fen = board.to_fen()
+    if start_fen != STARTING_FEN:
+        tags['SetUp'] = '1'
+        tags['FEN'] = start_fen
+
+    # Move numbers are kept with their move, so a line never ends on a number
+    tokens = []
+    for (move, san) in zip(moves, sans):
+        if board.colour_to_move == 'W':
+            san = f'{board.fullmove_number}. {san}'
+        elif not tokens:
+            san = f'{board.fullmove_number}... {san}'
+        tokens.append(san)
+        board.make_move(move)
+    tokens.append(tags.get('Result', '*'))
+
+    lines = []
+    for (name, default) in SEVEN_TAG_ROSTER:
+        lines.append(f'[{name} "{_escape(tags.pop(name, default))}"]')
+    for (name, value) in tags.items():
+        lines.append(f'[{name} "{_escape(value)}"]')
+    lines.append('')
+
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_LENGTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f'{line} {token}' if line else token
+    lines.append(line)
+    return '\n'.join(lines) + '\n\n'
+
+
+def _escape(value):
+    """
+    Escapes backslashes and quotes in a tag value
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
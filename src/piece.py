@@ -1,7 +1,12 @@
 """ This module implements a superclass piece, which defines the field and
 methods that most subclass pieces will implement."""
 
-from src.board import Board
+from src.attacks import get_piece_attacks
+from src.bitboard import FULL_BOARD, SQUARES, SQUARE_BITS, ray_attacks, sliding_attacks
+
+# Shared initial value for the move lists, so a new piece allocates no lists
+# until it generates its moves
+NO_SQUARES = ()
 
 class BasicPiece():
     """
@@ -9,38 +14,55 @@ class BasicPiece():
     respective subclass. This class contains the necessary fields and logical methods.
     """
 
+    # Pieces have no per-instance __dict__. Boards hold thousands of them in analysis caches
+    __slots__ = ('pos', 'legal_moves', '__colour', '__type', '__starting_square', '__hash',
+                 'previous_square', 'all_moves', 'squares_defended', 'is_pinned',
+                 'pinned_squares', 'is_active_piece', 'list_index')
+
     def __init__(self, colour, piece_type, pos):
         # Basic elements
         self.pos = pos
-        self.legal_moves = []
+        self.legal_moves = NO_SQUARES
 
         # "Private" fields
         self.__colour = colour
         self.__type = piece_type
         self.__starting_square = pos
+        self.__hash = hash((pos, colour, piece_type))
 
         # Other metadata
         self.previous_square = None
-        self.all_moves = []
-        self.squares_defended = []
+        self.all_moves = NO_SQUARES
+        self.squares_defended = NO_SQUARES
         self.is_pinned = False
-        self.pinned_squares = []
+        self.pinned_squares = NO_SQUARES
         self.is_active_piece = True
+        # Slot in the board's active piece list, kept by the board for O(1) removal
+        self.list_index = None
 
     def __eq__(self, other):
         """
         Dunder equality method. Relies on starting square 'private' variable
         Position is not used since inactive pieces no longer have a position.
         """
+        if self is other:
+            return True
         if isinstance(other, BasicPiece):
             # position alone should be sufficient for equality, but in extra redundancy with this
-            # Additionally, this method should not be called too frequently
             return (
-                self.get_starting_square() == other.get_starting_square() and
-                self.get_colour() == other.get_colour() and
-                self.get_piece_type() == other.get_piece_type())
+                self.__hash == other.__hash and
+                self.__starting_square == other.__starting_square and
+                self.__colour == other.__colour and
+                self.__type == other.__type)
         return False
 
+    def __hash__(self):
+        """
+        Dunder hash method. Hashes the same fields as the equality method, computed once
+        at instantiation since none of them can change.
+        """
+        return self.__hash
+
     def __neq__(self, other):
         """
         Dunder inequality method. Is the equality method with De Morgan's rule applied.
@@ -51,8 +73,6 @@ class BasicPiece():
             return (self.pos != other.pos or self.get_colour() != other.get_colour() or self.get_piece_type() != other.get_piece_type())
         return False
 
-    # For hashing, if necessary in the future, can define a field: starting_square
-
     def get_colour(self):
         """
         Get the colour of the piece.
@@ -108,17 +128,97 @@ class BasicPiece():
 
     def get_legal_moves(self, board):
         """
-        Determine which of all moves are actually legal moves.
+        Determine which of all moves are actually legal moves: the ones landing on a
+        square of the board's move mask for this piece, which answers any check and
+        keeps to the pin ray if the piece is pinned (see Board.get_move_mask).
+
+        Updates the field `legal_moves` and returns it.
         """
-        raise NotImplementedError("Subclass needs to define this.")
+        self.update_all_moves(board)
+        board.update_pins_and_checks(self.get_colour())
+        mask = board.get_move_mask(self)
+        if mask == FULL_BOARD:
+            self.legal_moves = self.all_moves
+        else:
+            self.legal_moves = [move for move in self.all_moves
+                                if SQUARE_BITS[move[0][1] * 8 + move[0][0]] & mask]
+        return self.legal_moves
+
+    def get_legal_captures(self, board):
+        """
+        Returns only the legal captures, straight from the piece's attacks, without
+        building the non-capture moves or touching `all_moves` and `legal_moves`.
 
+        Parameters:
+        board (object): current board state
+
+        Returns:
+        captures (list): ((file, rank), 'C') entries, like those in all_moves
+
+        """
+        colour = self.get_colour()
+        board.update_pins_and_checks(colour)
+        targets = (get_piece_attacks(self, self.pos[1] * 8 + self.pos[0], board.occupied)
+                   & board.colour_bitboards['B' if colour == 'W' else 'W']
+                   & board.get_move_mask(self))
+        captures = []
+        while targets:
+            target_bit = targets & -targets
+            targets ^= target_bit
+            captures.append((SQUARES[target_bit.bit_length() - 1], 'C'))
+        return captures
+
+    def get_legal_quiet_moves(self, board):
+        """
+        Returns only the legal moves onto empty squares, straight from the piece's
+        attacks, without building the captures or touching `all_moves` and `legal_moves`.
+
+        Parameters:
+        board (object): current board state
 
+        Returns:
+        moves (list): ((file, rank), 'N') entries, like those in all_moves
+
+        """
+        board.update_pins_and_checks(self.get_colour())
+        occupied = board.occupied
+        targets = (get_piece_attacks(self, self.pos[1] * 8 + self.pos[0], occupied)
+                   & ~occupied & board.get_move_mask(self))
+        moves = []
+        while targets:
+            target_bit = targets & -targets
+            targets ^= target_bit
+            moves.append((SQUARES[target_bit.bit_length() - 1], 'N'))
+        return moves
+
+
+
+    def update_sliding_moves(self, board, directions):
+        """
+        Sets the all_moves and squares_defended fields for a piece that slides
+        along the given directions. Every ray is resolved in one table lookup of its
+        first blocker (see src/bitboard.py) rather than by stepping square by square.
+
+        Parameters:
+        board (object): current board state
+
+        directions (tuple): the (file, rank) steps the piece slides along
+
+        Returns:
+        None
+
+        """
+        attacks = sliding_attacks(self.pos[1] * 8 + self.pos[0], directions, board.occupied)
+
+        self.all_moves = []
+        self.squares_defended = []
+        self.add_attacked_squares(attacks, board)
 
     def check_direction(self, file, rank, board):
         """
         Check available moves along a certain direction,
         specified by `file` and `rank` directions.
-        Sets the all_moves field in this object.
+        Adds to the all_moves and squares_defended fields in this object.
 
         Parameters:
         file (int): +1 for increasing file, or -1 for decreasing file
@@ -131,48 +231,35 @@ class BasicPiece():
         None
 
         """
-        is_xray = False
-        potential_pinned_piece = None
-        # For backtracking x_ray squares
-        num_moves = 0
-
-        check_square = (self.pos[0] + file, self.pos[1] + rank)
-        while Board.is_valid_square(check_square):
-            self.squares_defended.append(check_square)
-            piece_at_square = board.get_piece_from_position(check_square)
-            if not board.get_piece_from_position(check_square):
-                self.all_moves.append((check_square, 'N'))
-                num_moves += 1
-                check_square = (check_square[0] + file, check_square[1] + rank)
-            elif piece_at_square.get_colour() == self.get_colour():
-                break
-            elif piece_at_square.get_colour() != self.get_colour():
-                self.all_moves.append((check_square, 'C'))
-                num_moves += 1
-                potential_pinned_piece = piece_at_square
-                is_xray = True
-                break
-
-        # Exists to speed up pinned piece checks
-        if is_xray:
-            potential_pinned_squares = []
-            reverse_pinned_squares = [l[0] for l in self.all_moves[-num_moves:-1]]
-            reverse_pinned_squares.append(self.pos)
-            check_square = (check_square[0] + file, check_square[1] + rank)
-            while Board.is_valid_square(check_square):
-                piece_at_square = board.get_piece_from_position(check_square)
-                if not piece_at_square:
-                    potential_pinned_squares.append(check_square)
-                elif piece_at_square.get_colour() == self.get_colour():
-                    break
-                elif piece_at_square.get_colour() != self.get_colour():
-                    if piece_at_square.get_piece_type() == 'king':
-                        potential_pinned_piece.is_pinned = True
-                        potential_pinned_squares.extend(reverse_pinned_squares)
-                        potential_pinned_piece.pinned_squares = potential_pinned_squares[:]
-                    break
-                check_square = (check_square[0] + file, check_square[1] + rank)
+        if self.all_moves is NO_SQUARES:
+            self.all_moves = []
+        if self.squares_defended is NO_SQUARES:
+            self.squares_defended = []
+        square = self.pos[1] * 8 + self.pos[0]
+        self.add_attacked_squares(ray_attacks(square, (file, rank), board.occupied), board)
+
+    def add_attacked_squares(self, attacks, board):
+        """
+        Appends every attacked square to squares_defended, and to all_moves as a
+        capture ('C') or non-capture ('N') unless it holds a piece of the same colour.
 
+        Parameters:
+        attacks (int): bitboard of the attacked squares
 
+        board (object): current board state
 
+        Returns:
+        None
 
+        """
+        occupied = board.occupied
+        own_pieces = board.colour_bitboards[self.get_colour()]
+        while attacks:
+            attack_bit = attacks & -attacks
+            attacks ^= attack_bit
+            attacked_square = SQUARES[attack_bit.bit_length() - 1]
+            self.squares_defended.append(attacked_square)
+            if not attack_bit & occupied:
+                self.all_moves.append((attacked_square, 'N'))
+            elif not attack_bit & own_pieces:
+                self.all_moves.append((attacked_square, 'C'))
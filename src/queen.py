@@ -0,0 +1,21 @@
+""" This module implements the Queen piece """
+
+from src.bitboard import QUEEN_DIRECTIONS
+from src.piece import BasicPiece, NO_SQUARES
+
+class Queen(BasicPiece):
+    """
+    The Queen class. Contains all the functionality for a queen on a chess board.
+    """
+
+    __slots__ = ('xray_squares',)
+
+    def __init__(self, colour, pos):
+        BasicPiece.__init__(self, colour, 'queen', pos)
+        self.xray_squares = NO_SQUARES
+
+    def update_all_moves(self, board):
+        self.xray_squares = NO_SQUARES
+
+        # All eight rook and bishop directions in a single pass
+        self.update_sliding_moves(board, QUEEN_DIRECTIONS)
@@ -1,27 +1,21 @@
 """ This module implements the Rook piece """
 
-from src.board import Board
-from src.piece import BasicPiece
+from src.bitboard import ROOK_DIRECTIONS
+from src.piece import BasicPiece, NO_SQUARES
 
 class Rook(BasicPiece):
     """
     The Rook class. Contains all the functionality for a rook on a chess board.
     """
 
+    __slots__ = ('xray_squares',)
+
     def __init__(self, colour, pos):
         BasicPiece.__init__(self, colour, 'rook', pos)
-        self.xray_squares = []
+        self.xray_squares = NO_SQUARES
 
     def update_all_moves(self, board):
-        self.all_moves = []
-        self.xray_squares = []
-        self.squares_defended = []
+        self.xray_squares = NO_SQUARES
 
-        # Check up
-        self.check_direction( 0,  1, board)
-        # Check down
-        self.check_direction( 0, -1, board)
-        # Check right
-        self.check_direction( 1,  0, board)
-        # Check left
-        self.check_direction(-1,  0, board)
+        # Check up, down, right and left
+        self.update_sliding_moves(board, ROOK_DIRECTIONS)
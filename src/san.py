@@ -0,0 +1,172 @@
+""" This module reads and writes moves in Standard Algebraic Notation (SAN), ie. 'Nf3',
+'exd5', 'O-O' or 'e8=Q+', and matches them to the board's move history tuples.
+
+When two pieces of the same type can move to the same square, SAN names the file
+and/or rank the moving piece starts from, ie. 'Nbd7'. That text is kept in the move
+history tuple's additional marker field (the fifth element).
+"""
+
+from src.bitboard import parse_square, square_name
+
+# Piece type for each SAN piece letter. Pawn moves have no letter
+SAN_PIECE_TYPES = {'N': 'knight', 'B': 'bishop', 'R': 'rook', 'Q': 'queen', 'K': 'king'}
+
+SAN_LETTERS = {piece_type: letter for (letter, piece_type) in SAN_PIECE_TYPES.items()}
+
+# King destination file for each way of writing a castle
+SAN_CASTLES = {'O-O': 6, '0-0': 6, 'O-O-O': 2, '0-0-0': 2}
+
+
+def get_marker(board, move):
+    """
+    Works out the SAN disambiguation of a move: the file, rank or square the piece
+    starts from, if another piece of the same type could also move to the target.
+
+    Parameters:
+    board (Board): the position the move is played in
+    move (tuple): the move history tuple
+
+    Returns:
+    marker (str): '', a file letter, a rank digit or a square name
+
+    """
+    piece, prev_square, new_square = move[0], move[1], move[2]
+    piece_type = piece.get_piece_type()
+    if piece_type == 'pawn' or piece_type == 'king':
+        return ''
+    rivals = [
+        other for other in board.get_active_pieces(piece.get_colour())
+        if other is not piece and other.get_piece_type() == piece_type
+        and any(target == new_square for (target, _) in other.get_legal_moves(board))
+    ]
+    if not rivals:
+        return ''
+    return _disambiguate(prev_square, rivals)
+
+
+def move_to_san(board, move, suffix=True):
+    """
+    Writes a move in SAN.
+
+    Parameters:
+    board (Board): the position the move is played in. It is left unchanged
+    move (tuple): the move history tuple. Its additional marker is used for
+        disambiguation if set, otherwise it is worked out
+    suffix (bool): add '+' for check and '#' for mate
+
+    Returns:
+    san (str): the move, ie. 'Nbd7', 'exd6', 'O-O-O' or 'a8=Q#'
+
+    """
+    piece, prev_square, new_square, move_type = move[0], move[1], move[2], move[3]
+    promotion = move[5] if len(move) > 5 else None
+    piece_type = piece.get_piece_type()
+
+    if move_type == 'O':
+        san = 'O-O' if new_square[0] == 6 else 'O-O-O'
+    elif piece_type == 'pawn':
+        san = square_name(new_square)
+        if move_type == 'C' or move_type == 'E':
+            san = 'abcdefgh'[prev_square[0]] + 'x' + san
+        if promotion:
+            san += '=' + SAN_LETTERS[promotion]
+    else:
+        marker = move[4] if len(move) > 4 and move[4] is not None else get_marker(board, move)
+        san = (SAN_LETTERS[piece_type] + marker + ('x' if move_type == 'C' else '')
+               + square_name(new_square))
+
+    if suffix:
+        board.make_move(move)
+        colour = board.colour_to_move
+        if board.is_in_check(colour):
+            san += '+' if board.get_legal_moves() else '#'
+        board.unmake_move()
+    return san
+
+
+def parse_san(board, san):
+    """
+    Finds the legal move a SAN string stands for.
+
+    Parameters:
+    board (Board): the position the move is played in
+    san (str): the move, ie. 'Nbd7', 'exd6', 'O-O-O' or 'a8=Q#'. Check marks and
+        annotations ('+', '#', '!', '?') are ignored
+
+    Returns:
+    move (tuple): the move history tuple, see Board.get_legal_moves
+
+    Raises:
+    ValueError: if the string matches no legal move, or more than one
+
+    """
+    text = san.rstrip('+#!?')
+    if text in SAN_CASTLES:
+        destination_file = SAN_CASTLES[text]
+        king_square = board.get_king_square(board.colour_to_move)
+        if king_square is not None:
+            king = board.get_piece_from_position(king_square)
+            for (target, move_type) in king.get_legal_moves(board):
+                if move_type == 'O' and target[0] == destination_file:
+                    return (king, king_square, target, 'O', '', None)
+        raise ValueError(f'illegal move {san}')
+
+    promotion = None
+    if '=' in text:
+        text, promotion_letter = text.split('=')
+        promotion = SAN_PIECE_TYPES.get(promotion_letter.upper())
+    elif len(text) > 2 and text[-1] in 'NBRQ' and text[0] not in SAN_PIECE_TYPES:
+        # Promotions are sometimes written without the '=', ie. 'e8Q'
+        promotion = SAN_PIECE_TYPES[text[-1]]
+        text = text[:-1]
+
+    piece_type = SAN_PIECE_TYPES.get(text[0], 'pawn')
+    if piece_type != 'pawn':
+        text = text[1:]
+    if len(text) < 2:
+        raise ValueError(f'invalid move {san}')
+    target = parse_square(text[-2:])
+    # Whatever is left between the piece letter and the target square narrows down
+    # which piece moves: a file, a rank or both
+    from_file = from_rank = None
+    for char in text[:-2].replace('x', ''):
+        if 'a' <= char <= 'h':
+            from_file = ord(char) - ord('a')
+        elif '1' <= char <= '8':
+            from_rank = int(char) - 1
+
+    # Every piece of the type that can reach the target, so that the marker kept in
+    # the move is the shortest one that tells them apart
+    movers = []
+    for piece in board.get_active_pieces(board.colour_to_move):
+        if piece.get_piece_type() == piece_type:
+            for (move_target, move_type) in piece.get_legal_moves(board):
+                if move_target == target:
+                    movers.append((piece, move_type))
+    matches = [(piece, move_type) for (piece, move_type) in movers
+               if (from_file is None or piece.pos[0] == from_file)
+               and (from_rank is None or piece.pos[1] == from_rank)]
+    # A pawn move onto the last rank must name its promotion, and only then
+    if (piece_type == 'pawn' and (target[1] == 0 or target[1] == 7)) != (promotion is not None):
+        matches = []
+    if len(matches) != 1:
+        raise ValueError(f'{"ambiguous" if matches else "illegal"} move {san}')
+
+    piece, move_type = matches[0]
+    marker = ''
+    if len(movers) > 1 and piece_type != 'pawn':
+        rivals = [other for (other, _) in movers if other is not piece]
+        marker = _disambiguate(piece.pos, rivals)
+    return (piece, piece.pos, target, move_type, marker, promotion)
+
+
+def _disambiguate(prev_square, rivals):
+    """
+    Returns the shortest of file, rank or square that tells prev_square apart from
+    the squares of the rival pieces
+    """
+    if all(other.pos[0] != prev_square[0] for other in rivals):
+        return 'abcdefgh'[prev_square[0]]
+    if all(other.pos[1] != prev_square[1] for other in rivals):
+        return str(prev_square[1] + 1)
+    return square_name(prev_square)
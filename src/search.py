@@ -0,0 +1,410 @@
+""" This module searches for the best move with negamax alpha-beta.
+
+The search deepens one ply at a time (iterative deepening). Each iteration stores its
+results in the transposition table, so the next one searches the principal variation
+(PV) first and most of the tree is cut off early. The other moves are ordered by
+src/ordering.py. From ASPIRATION_DEPTH on, each iteration starts with a narrow window
+around the last score, and widens it only when the score falls outside. At the horizon
+a quiescence search plays out the captures, so the score is not taken mid-exchange.
+Positions are scored by src/evaluation.py. A search stops at a depth, node or time
+budget, and reports its depth, score, nodes, nodes per second and PV after every
+iteration.
+
+Scores are in centipawns from the side to move's point of view. A mate in n plies
+scores MATE_SCORE - n.
+
+Run from the repository root, ie.
+    python -m src.search "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1" 5
+    python -m src.search "<fen>" 64 --time 10
+"""
+
+import sys
+import time
+
+from src.board import Board
+from src.evaluation import evaluate
+from src.move import encode_move_tuple
+from src.ordering import MoveOrderer, is_tactical, mvv_lva
+from src.perft import move_name
+from src.see import see, get_capture_value
+from src.transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+INFINITE_SCORE = 1000000
+MATE_SCORE = 100000
+# Scores beyond this are mates, whose distance is counted from the root
+MATE_BOUND = MATE_SCORE - 1000
+MAX_PLY = 128
+
+ASPIRATION_DEPTH = 4
+ASPIRATION_WINDOW = 50
+# Margin for positional gains on top of a capture, in delta pruning
+DELTA_MARGIN = 200
+
+# How often, in nodes, the time budget is checked
+CHECK_INTERVAL = 1024
+
+
+class SearchStopped(Exception):
+    """
+    Raised inside the search when its node or time budget runs out
+    """
+
+
+def score_to_table(score, ply):
+    """
+    Converts a mate score from distance-to-root to distance-to-node before storing it
+    """
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """
+    Converts a stored mate score back to distance-to-root, see score_to_table
+    """
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def format_score(score):
+    """
+    Writes a score the way UCI engines do, ie. 'cp 35' or 'mate -2' (in moves)
+    """
+    if score > MATE_BOUND:
+        return f'mate {(MATE_SCORE - score + 1) // 2}'
+    if score < -MATE_BOUND:
+        return f'mate -{(MATE_SCORE + score) // 2}'
+    return f'cp {score}'
+
+
+class Search():
+    """
+    Iterative deepening alpha-beta search of one board.
+    """
+
+    def __init__(self, board, table=None, stop_event=None):
+        """
+        Parameters:
+        board (Board): the position to search. Moves are made and taken back on it,
+            and it is restored when the search returns
+        table (TranspositionTable): the table to use, kept between searches. A new
+            16 MB table is made if not given
+        stop_event (multiprocessing.Event): stops the search once set, like running out
+            of time, or None. Lets another process stop it (see src/smp.py)
+        """
+        self.board = board
+        self.table = table if table is not None else TranspositionTable()
+        self.stop_event = stop_event
+        self.ordering = MoveOrderer()
+        self.nodes = 0
+        self.max_nodes = None
+        self.deadline = None
+        self.next_check = CHECK_INTERVAL
+        # Principal variation found below each ply in the current iteration
+        self.pv_table = [[] for _ in range(MAX_PLY + 1)]
+
+    def search(self, max_depth=64, max_nodes=None, max_time=None, output=None, min_depth=1):
+        """
+        Searches the position one ply deeper at a time until a budget runs out.
+
+        Parameters:
+        max_depth (int): deepest iteration to run
+        max_nodes (int): stop after searching this many nodes, or None for no limit
+        max_time (float): stop after this many seconds, or None for no limit. No new
+            iteration is started once half of it has passed, since it would almost
+            certainly not finish
+        output (file): where to write a report line after each iteration, or None
+        min_depth (int): first iteration to run. Helper searches start deeper than
+            the main one, so that they do not all search the same depths at once
+
+        Returns:
+        result (dict): best_move (the move history tuple, None if there are no legal
+            moves; the first ordered move if no iteration finished), score, depth, pv
+            (list of move tuples), nodes, seconds, nps, and
+            iterations (one dict of depth, score, nodes, seconds, nps and pv per
+            completed iteration)
+
+        """
+        board = self.board
+        self.nodes = 0
+        self.max_nodes = max_nodes
+        start = time.perf_counter()
+        self.deadline = start + max_time if max_time is not None else None
+        self.next_check = CHECK_INTERVAL
+        self.table.new_search()
+        self.ordering.new_search()
+        undo_depth = len(board.undo_stack)
+
+        result = {'best_move': None, 'score': 0, 'depth': 0, 'pv': [], 'iterations': []}
+        score = 0
+        for depth in range(min_depth, max_depth + 1):
+            try:
+                score = self._search_root(depth, score)
+            except SearchStopped:
+                # Take back the moves of the unfinished iteration
+                while len(board.undo_stack) > undo_depth:
+                    board.unmake_move()
+                break
+
+            seconds = time.perf_counter() - start
+            pv = list(self.pv_table[0])
+            iteration = {
+                'depth': depth,
+                'score': score,
+                'nodes': self.nodes,
+                'seconds': seconds,
+                'nps': self.nodes / seconds if seconds > 0 else 0.0,
+                'pv': pv,
+            }
+            result['iterations'].append(iteration)
+            result.update(best_move=pv[0] if pv else None, score=score, depth=depth, pv=pv)
+            if output is not None:
+                output.write(f'info depth {depth} score {format_score(score)} nodes {self.nodes} '
+                             f'nps {iteration["nps"]:.0f} time {seconds * 1000:.0f} '
+                             f'pv {" ".join(move_name(move) for move in pv)}\n')
+
+            # Stop on a forced mate, no legal moves, or too little time for another iteration
+            if not pv or abs(score) > MATE_BOUND and MATE_SCORE - abs(score) <= depth:
+                break
+            if self.deadline is not None and time.perf_counter() > start + max_time / 2:
+                break
+
+        if not result['iterations']:
+            # Stopped inside the first iteration: still answer with the first move in
+            # the search's order, the hash move if the table holds one
+            entry = self.table.probe(board.zobrist_key)
+            result['best_move'] = next(self.ordering.order_moves(board, 0, entry[3] if entry else 0),
+                                       None)
+
+        seconds = time.perf_counter() - start
+        result.update(nodes=self.nodes, seconds=seconds,
+                      nps=self.nodes / seconds if seconds > 0 else 0.0)
+        return result
+
+    def _search_root(self, depth, last_score):
+        """
+        Runs one iteration, in an aspiration window around the last iteration's score
+        from ASPIRATION_DEPTH on. The window is widened on the side the score fell
+        outside of until the score lands inside it.
+        """
+        if depth < ASPIRATION_DEPTH:
+            return self.negamax(depth, -INFINITE_SCORE, INFINITE_SCORE, 0)
+        delta = ASPIRATION_WINDOW
+        alpha = max(last_score - delta, -INFINITE_SCORE)
+        beta = min(last_score + delta, INFINITE_SCORE)
+        while True:
+            score = self.negamax(depth, alpha, beta, 0)
+            if score <= alpha and alpha > -INFINITE_SCORE:
+                alpha = max(score - delta, -INFINITE_SCORE)
+            elif score >= beta and beta < INFINITE_SCORE:
+                beta = min(score + delta, INFINITE_SCORE)
+            else:
+                return score
+            delta *= 2
+
+    def _check_budget(self):
+        """
+        Raises SearchStopped once the node or time budget has run out, or the stop
+        event is set
+        """
+        self.next_check = self.nodes + CHECK_INTERVAL
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchStopped()
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            raise SearchStopped()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchStopped()
+
+    def _is_draw(self):
+        """
+        Tests for the fifty move rule, or a repetition of the position since the last
+        capture or pawn move. A single repetition is scored as a draw in the search.
+        """
+        board = self.board
+        if board.halfmove_clock >= 100:
+            return True
+        undo_stack = board.undo_stack
+        key = board.zobrist_key
+        # Each undo record holds the key of the position before its move, so the
+        # positions with the same side to move are every second record back
+        for index in range(len(undo_stack) - 2, max(len(undo_stack) - 1 - board.halfmove_clock, 0) - 1, -2):
+            if undo_stack[index][7] == key:
+                return True
+        return False
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        Searches a position with alpha-beta.
+
+        Parameters:
+        depth (int): plies left to search. Moves out of check search one ply deeper
+        alpha (int): score the side to move is already sure of
+        beta (int): score the opponent is already sure of
+        ply (int): distance from the root
+
+        Returns:
+        score (int): the position's score if it lies between alpha and beta, or else a
+            bound beyond the one it failed
+
+        """
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self._check_budget()
+        board = self.board
+        pv_table = self.pv_table
+        pv_table[ply] = []
+        if ply and self._is_draw():
+            return 0
+        if ply >= MAX_PLY:
+            return evaluate(board)
+
+        key = board.zobrist_key
+        hash_move = 0
+        entry = self.table.probe(key)
+        if entry is not None:
+            (entry_depth, entry_score, bound, hash_move) = entry
+            if ply and entry_depth >= depth:
+                entry_score = score_from_table(entry_score, ply)
+                if (bound == EXACT or bound == LOWER_BOUND and entry_score >= beta
+                        or bound == UPPER_BOUND and entry_score <= alpha):
+                    return entry_score
+
+        in_check = board.is_in_check(board.colour_to_move)
+        if in_check:
+            depth += 1
+        if depth <= 0:
+            return self.quiescence(alpha, beta, ply)
+
+        original_alpha = alpha
+        best_score = -INFINITE_SCORE
+        best_move = None
+        ordering = self.ordering
+        for move in ordering.order_moves(board, ply, hash_move):
+            board.make_move(move)
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    pv_table[ply] = [move] + pv_table[ply + 1]
+                    if alpha >= beta:
+                        if not is_tactical(move):
+                            encoded_move = encode_move_tuple(move)
+                            ordering.add_killer(ply, encoded_move)
+                            ordering.add_history(board.colour_to_move, encoded_move, depth)
+                        break
+        if best_move is None:
+            return -MATE_SCORE + ply if in_check else 0
+
+        if best_score >= beta:
+            bound = LOWER_BOUND
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+        self.table.store(key, depth, score_to_table(best_score, ply), bound,
+                         encode_move_tuple(best_move))
+        return best_score
+
+    def quiescence(self, alpha, beta, ply):
+        """
+        Searches captures only, until the position is quiet, so that the score at the
+        horizon is not taken in the middle of an exchange. The side to move may stand
+        pat on the static score instead of capturing. Captures that cannot raise the
+        score to alpha even winning the piece for free (delta pruning), or that lose
+        material in the exchange (see src/see.py), are skipped. In check every move is
+        searched, since standing pat is not an option.
+
+        Parameters:
+        alpha (int): score the side to move is already sure of
+        beta (int): score the opponent is already sure of
+        ply (int): distance from the root
+
+        Returns:
+        score (int): the position's score, bounded like negamax
+
+        """
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self._check_budget()
+        board = self.board
+        pv_table = self.pv_table
+        pv_table[ply] = []
+        if ply >= MAX_PLY:
+            return evaluate(board)
+
+        in_check = board.is_in_check(board.colour_to_move)
+        if in_check:
+            best_score = -INFINITE_SCORE
+            moves = board.get_legal_moves()
+            if not moves:
+                return -MATE_SCORE + ply
+            scored_moves = [(mvv_lva(board, move) if is_tactical(move) else -100, move) for move in moves]
+        else:
+            best_score = evaluate(board)
+            if best_score >= beta:
+                return best_score
+            if best_score > alpha:
+                alpha = best_score
+            scored_moves = []
+            for move in board.get_legal_captures():
+                if not (len(move) > 5 and move[5]):
+                    if best_score + get_capture_value(board, move) + DELTA_MARGIN <= alpha:
+                        continue
+                    if see(board, move) < 0:
+                        continue
+                elif move[5] != 'queen':
+                    continue
+                scored_moves.append((mvv_lva(board, move), move))
+        scored_moves.sort(key=lambda scored_move: scored_move[0], reverse=True)
+
+        for (_, move) in scored_moves:
+            board.make_move(move)
+            score = -self.quiescence(-beta, -alpha, ply + 1)
+            board.unmake_move()
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    pv_table[ply] = [move] + pv_table[ply + 1]
+                    if alpha >= beta:
+                        break
+        return best_score
+
+
+def run_search(fen, max_depth, max_time=None, output=sys.stdout):
+    """
+    Searches a position and reports each iteration and the best move.
+
+    Parameters:
+    fen (str): the position in Forsyth-Edwards Notation
+    max_depth (int): deepest iteration to run
+    max_time (float): time budget in seconds, or None for no limit
+    output (file): where to write the report
+
+    Returns:
+    result (dict): see Search.search
+
+    """
+    result = Search(Board.from_fen(fen)).search(max_depth, max_time=max_time, output=output)
+    best_move = move_name(result['best_move']) if result['best_move'] else '(none)'
+    output.write(f'bestmove {best_move}\n')
+    return result
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        run_search(sys.argv[1], int(sys.argv[2]))
+    elif len(sys.argv) == 5 and sys.argv[3] == '--time':
+        run_search(sys.argv[1], int(sys.argv[2]), float(sys.argv[4]))
+    else:
+        sys.stderr.write('usage: python -m src.search "<fen>" <max depth> [--time <seconds>]\n')
+        sys.exit(2)
@@ -0,0 +1,90 @@
+""" This module implements static exchange evaluation (SEE): the material a capture wins
+or loses once every piece bearing on the square has joined in, each side always
+recapturing with its least valuable attacker and free to stop when that would lose.
+
+No move is made on the board. Captured and capturing pieces are taken out of a copy
+of the occupancy, so sliders lined up behind them (x-rays) join in, see
+Board.get_attackers. Pins are not taken into account.
+"""
+
+from src.bitboard import SQUARE_BITS
+
+# Piece values in centipawns for exchanges. The king can only take last
+SEE_VALUES = {'pawn': 100, 'knight': 320, 'bishop': 330, 'rook': 500, 'queen': 900, 'king': 20000}
+
+# Attackers are tried from least to most valuable
+SEE_ORDER = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+
+
+def get_capture_value(board, move):
+    """
+    Returns what a move captures, plus what a promotion gains, in centipawns.
+
+    Parameters:
+    board (Board): the position the move is played in
+    move (tuple): the move history tuple
+
+    Returns:
+    value (int): material gained by the move itself, before any recapture
+
+    """
+    move_type = move[3]
+    if move_type == 'C':
+        value = SEE_VALUES[board.get_piece_from_position(move[2]).get_piece_type()]
+    elif move_type == 'E':
+        value = SEE_VALUES['pawn']
+    else:
+        value = 0
+    if len(move) > 5 and move[5]:
+        value += SEE_VALUES[move[5]] - SEE_VALUES['pawn']
+    return value
+
+
+def see(board, move):
+    """
+    Statically evaluates the exchange a move starts on its target square.
+
+    Parameters:
+    board (Board): the position the move is played in
+    move (tuple): the move history tuple, normally a capture
+
+    Returns:
+    score (int): material won (or lost, if negative) by the side making the move
+
+    """
+    piece, prev_square, new_square = move[0], move[1], move[2]
+    target = new_square[1] * 8 + new_square[0]
+    occupied = board.occupied ^ SQUARE_BITS[prev_square[1] * 8 + prev_square[0]]
+    if move[3] == 'E':
+        occupied ^= SQUARE_BITS[prev_square[1] * 8 + new_square[0]]
+
+    promotion = move[5] if len(move) > 5 else None
+    # gains[n] is what the side making the nth capture has won if the exchange stops there
+    gains = [get_capture_value(board, move)]
+    # Value of the piece now standing on the target square, which the next capture takes
+    on_square = SEE_VALUES[promotion or piece.get_piece_type()]
+    colour = 'B' if piece.get_colour() == 'W' else 'W'
+
+    attackers = board.get_attackers(target, occupied)
+    while True:
+        pieces = board.piece_bitboards[colour]
+        own_attackers = attackers & board.colour_bitboards[colour]
+        if not own_attackers:
+            break
+        for piece_type in SEE_ORDER:
+            candidates = own_attackers & pieces[piece_type]
+            if candidates:
+                break
+        if piece_type == 'king' and attackers & ~own_attackers:
+            # The king cannot take a defended piece
+            break
+        gains.append(on_square - gains[-1])
+        on_square = SEE_VALUES[piece_type]
+        occupied ^= candidates & -candidates
+        attackers = board.get_attackers(target, occupied)
+        colour = 'B' if colour == 'W' else 'W'
+
+    # Each side stops the exchange where that is better for it than going on
+    for index in range(len(gains) - 1, 0, -1):
+        gains[index - 1] = -max(-gains[index - 1], gains[index])
+    return gains[0]
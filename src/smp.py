@@ -0,0 +1,143 @@
+""" This module searches one position with several processes at once (Lazy SMP).
+
+Python threads cannot search in parallel because of the GIL, so the helpers are
+processes. Each process runs its own iterative deepening search of the same root
+(src/search.py) on its own board, and the only thing they share is the transposition
+table, a SharedTranspositionTable (src/transposition.py). A process reaching a position
+another one has already searched takes the score or the best move from the table, so
+the processes spread out over the tree by themselves and the main search finds most of
+its tree already done. Every second helper starts one ply deeper than the others, so
+that they do not all search the same depth at once.
+
+The main search, in the calling process, decides the move and keeps the budgets. Once
+it returns, the helpers are stopped through a multiprocessing Event.
+
+Run from the repository root, ie.
+    python -m src.smp "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1" 6 --workers 8
+"""
+
+import multiprocessing
+import os
+import queue
+import sys
+
+from src.board import Board
+from src.perft import move_name
+from src.search import Search
+from src.transposition import SharedTranspositionTable
+
+# Deepest iteration of the helpers, which normally run until they are stopped
+HELPER_MAX_DEPTH = 64
+# Seconds to wait for a helper to report after it was told to stop
+HELPER_TIMEOUT = 10
+
+
+def _helper_search(fen, table_name, table_mb, generation, min_depth, stop_event, results):
+    """
+    Runs a helper search in its own process until the stop event is set, then puts
+    the nodes it searched and its deepest completed iteration on the results queue
+    """
+    table = SharedTranspositionTable(table_mb, name=table_name)
+    # Search.search starts a new generation, the same one as the main search's
+    table.generation = generation
+    try:
+        search = Search(Board.from_fen(fen), table, stop_event)
+        result = search.search(HELPER_MAX_DEPTH, min_depth=min_depth)
+        results.put((result['nodes'], result['depth']))
+    finally:
+        table.close()
+
+
+def parallel_search(fen, max_depth=64, workers=None, max_nodes=None, max_time=None,
+                    table=None, table_mb=16, output=None):
+    """
+    Searches a position with Lazy SMP: the main search in this process, and helper
+    processes searching the same position and sharing its transposition table.
+
+    Parameters:
+    fen (str): the position in Forsyth-Edwards Notation
+    max_depth (int): deepest iteration of the main search
+    workers (int): number of processes searching, this one included. The number of
+        CPUs if None
+    max_nodes (int): node budget of the main search, or None for no limit
+    max_time (float): time budget in seconds, or None for no limit
+    table (SharedTranspositionTable): the table to use, kept between searches. If not
+        given, a table of table_mb megabytes is made for the search and freed after it
+    table_mb (float): size of the table made for the search, in megabytes
+    output (file): where the main search writes a line after each iteration, or None
+
+    Returns:
+    result (dict): the main search's result (see Search.search), plus workers,
+        helper_nodes and helper_depths (the nodes and the deepest completed iteration
+        of each helper that reported), total_nodes and total_nps
+
+    """
+    workers = workers or os.cpu_count()
+    own_table = table is None
+    if own_table:
+        table = SharedTranspositionTable(table_mb)
+    stop_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    helpers = [multiprocessing.Process(target=_helper_search, daemon=True,
+                                       args=(fen, table.name, table.size_mb, table.generation,
+                                             1 + helper % 2, stop_event, results))
+               for helper in range(1, workers)]
+    try:
+        for helper in helpers:
+            helper.start()
+        result = Search(Board.from_fen(fen), table).search(max_depth, max_nodes, max_time, output)
+    finally:
+        stop_event.set()
+        helper_results = []
+        for _ in helpers:
+            try:
+                helper_results.append(results.get(timeout=HELPER_TIMEOUT))
+            except queue.Empty:
+                break
+        for helper in helpers:
+            helper.join(HELPER_TIMEOUT)
+        if own_table:
+            table.close()
+
+    helper_nodes = [nodes for (nodes, _) in helper_results]
+    total_nodes = result['nodes'] + sum(helper_nodes)
+    result.update(workers=workers, helper_nodes=helper_nodes,
+                  helper_depths=[depth for (_, depth) in helper_results], total_nodes=total_nodes,
+                  total_nps=total_nodes / result['seconds'] if result['seconds'] > 0 else 0.0)
+    return result
+
+
+def run_parallel_search(fen, max_depth, workers=None, max_time=None, output=sys.stdout):
+    """
+    Searches a position with parallel_search and reports each iteration, the nodes
+    searched by all the processes, and the best move.
+
+    Parameters:
+    fen (str): the position in Forsyth-Edwards Notation
+    max_depth (int): deepest iteration to run
+    workers (int): number of processes, the number of CPUs if None
+    max_time (float): time budget in seconds, or None for no limit
+    output (file): where to write the report
+
+    Returns:
+    result (dict): see parallel_search
+
+    """
+    result = parallel_search(fen, max_depth, workers, max_time=max_time, output=output)
+    best_move = move_name(result['best_move']) if result['best_move'] else '(none)'
+    output.write(f'info string workers {result["workers"]} nodes {result["total_nodes"]} '
+                 f'nps {result["total_nps"]:.0f}\n')
+    output.write(f'bestmove {best_move}\n')
+    return result
+
+
+if __name__ == '__main__':
+    options = dict(zip(sys.argv[3::2], sys.argv[4::2]))
+    if len(sys.argv) >= 3 and len(sys.argv) % 2 == 1 and set(options) <= {'--workers', '--time'}:
+        run_parallel_search(sys.argv[1], int(sys.argv[2]),
+                            int(options['--workers']) if '--workers' in options else None,
+                            float(options['--time']) if '--time' in options else None)
+    else:
+        sys.stderr.write('usage: python -m src.smp "<fen>" <max depth> [--workers <count>] '
+                         '[--time <seconds>]\n')
+        sys.exit(2)
@@ -0,0 +1,337 @@
+""" This module implements a fixed-size transposition table for the search.
+
+Entries live in two preallocated `array('Q')` buffers (keys and packed data), so the
+table never grows and storing an entry allocates nothing. The table is split into
+buckets of two entries: the first entry is depth-preferred and the second is always
+replaced.
+
+SharedTranspositionTable keeps the same buffers in a multiprocessing.shared_memory block,
+so that several search processes can use one table (see src/smp.py). Entries are written
+without locks: the key word holds the key XORed with the data word, so an entry whose two
+words were written by different processes at the same time fails to match its key and
+reads as a miss.
+"""
+
+from array import array
+from multiprocessing import shared_memory
+
+# Bound types for the stored score
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+BYTES_PER_ENTRY = 16
+ENTRIES_PER_BUCKET = 2
+
+# Layout of the packed data word, from the lowest bit:
+# best move (16 bits), depth (8 bits), bound (2 bits), generation (6 bits), score (32 bits)
+_MOVE_MASK = 0xFFFF
+_DEPTH_SHIFT = 16
+_BOUND_SHIFT = 24
+_GENERATION_SHIFT = 26
+_SCORE_SHIFT = 32
+_SCORE_OFFSET = 1 << 31
+MAX_DEPTH = 0xFF
+_GENERATION_MASK = 0x3F
+
+
+def pack_entry(depth, score, bound, best_move, generation=0):
+    """
+    Packs the fields of an entry into a single 64-bit data word.
+
+    Parameters:
+    depth (int): depth the score was searched to, from 0 to 255
+    score (int): the score, a signed 32-bit value
+    bound (int): EXACT, LOWER_BOUND or UPPER_BOUND
+    best_move (int): 16-bit encoded move, 0 for none (see src/move.py)
+    generation (int): search generation the entry was stored in
+
+    Returns:
+    data (int): the packed data word
+
+    """
+    return (best_move
+            | min(max(depth, 0), MAX_DEPTH) << _DEPTH_SHIFT
+            | bound << _BOUND_SHIFT
+            | (generation & _GENERATION_MASK) << _GENERATION_SHIFT
+            | (score + _SCORE_OFFSET) << _SCORE_SHIFT)
+
+
+def unpack_entry(data):
+    """
+    Unpacks a data word into its fields.
+
+    Parameters:
+    data (int): a data word made by pack_entry
+
+    Returns:
+    entry (tuple): (depth, score, bound, best_move)
+
+    """
+    return ((data >> _DEPTH_SHIFT) & MAX_DEPTH,
+            (data >> _SCORE_SHIFT) - _SCORE_OFFSET,
+            (data >> _BOUND_SHIFT) & 3,
+            data & _MOVE_MASK)
+
+
+def get_num_buckets(size_mb):
+    """
+    Returns the number of buckets that fit in size_mb megabytes, rounded down to a power
+    of two so that the bucket index is a bit mask
+    """
+    num_buckets = max(1, int(size_mb * 1024 * 1024) // (BYTES_PER_ENTRY * ENTRIES_PER_BUCKET))
+    return 1 << (num_buckets.bit_length() - 1)
+
+
+class TranspositionTable():
+    """
+    A fixed-size hash table of search results, keyed by Zobrist key.
+    """
+
+    def __init__(self, size_mb=16):
+        """
+        Allocates the table.
+
+        Parameters:
+        size_mb (float): memory to use, in megabytes. The number of buckets is rounded
+            down to a power of two so that the bucket index is a bit mask.
+        """
+        num_buckets = get_num_buckets(size_mb)
+        self.num_buckets = num_buckets
+        self.bucket_mask = num_buckets - 1
+        self._allocate(num_buckets * ENTRIES_PER_BUCKET)
+        self._reset_counters()
+
+    def _allocate(self, num_entries):
+        """
+        Sets up the `keys` and `data` buffers, one 64-bit word per entry each
+        """
+        self.keys = array('Q', bytes(8 * num_entries))
+        self.data = array('Q', bytes(8 * num_entries))
+
+    def _reset_counters(self):
+        """
+        Resets the search generation and the statistics
+        """
+        self.generation = 0
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def get_size_bytes(self):
+        """
+        Returns the memory held by the entry buffers, in bytes
+        """
+        return (len(self.keys) + len(self.data)) * 8
+
+    def new_search(self):
+        """
+        Starts a new search generation. Depth-preferred entries from older
+        generations can then be replaced by shallower ones.
+        """
+        self.generation = (self.generation + 1) & _GENERATION_MASK
+
+    def clear(self):
+        """
+        Empties the table and resets the counters
+        """
+        self._allocate(len(self.keys))
+        self._reset_counters()
+
+    def probe(self, key):
+        """
+        Looks up a position.
+
+        Parameters:
+        key (int): the position's Zobrist key
+
+        Returns:
+        entry (tuple): (depth, score, bound, best_move), or None if the position is not stored
+
+        """
+        index = (key & self.bucket_mask) * ENTRIES_PER_BUCKET
+        keys = self.keys
+        if keys[index] == key:
+            self.hits += 1
+            return unpack_entry(self.data[index])
+        if keys[index + 1] == key:
+            self.hits += 1
+            return unpack_entry(self.data[index + 1])
+        self.misses += 1
+        if keys[index] or keys[index + 1]:
+            # The bucket holds other positions that share this index
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, bound, best_move=0):
+        """
+        Stores a search result. The depth-preferred entry is replaced if it holds the
+        same position, a result from an older search, or a shallower result.
+        Otherwise the always-replace entry is overwritten.
+
+        Parameters:
+        key (int): the position's Zobrist key
+        depth (int): depth the score was searched to
+        score (int): the score
+        bound (int): EXACT, LOWER_BOUND or UPPER_BOUND
+        best_move (int): 16-bit encoded move, 0 for none (see src/move.py)
+
+        Returns:
+        None
+
+        """
+        index = (key & self.bucket_mask) * ENTRIES_PER_BUCKET
+        keys = self.keys
+        data = self.data
+        self.stores += 1
+
+        stored_key = keys[index]
+        stored_data = data[index]
+        if ( stored_key == key or not stored_key
+            or (stored_data >> _GENERATION_SHIFT) & _GENERATION_MASK != self.generation
+            or depth >= (stored_data >> _DEPTH_SHIFT) & MAX_DEPTH ):
+            if stored_key == key and not best_move:
+                # Keep the best move from the earlier search of this position
+                best_move = stored_data & _MOVE_MASK
+            keys[index] = key
+            data[index] = pack_entry(depth, score, bound, best_move, self.generation)
+            return
+
+        if keys[index + 1] == key and not best_move:
+            best_move = data[index + 1] & _MOVE_MASK
+        keys[index + 1] = key
+        data[index + 1] = pack_entry(depth, score, bound, best_move, self.generation)
+
+    def hashfull(self):
+        """
+        Estimates how full the table is, in permille, from the first 1000 entries
+        """
+        sample = min(1000, len(self.keys))
+        used = sum(1 for index in range(sample) if self.keys[index])
+        return used * 1000 // sample
+
+    def get_stats(self):
+        """
+        Returns the probe and store counters.
+
+        Parameters:
+        None
+
+        Returns:
+        stats (dict): hits, misses, collisions, stores, hit_rate, hashfull and size_bytes
+
+        """
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'hashfull': self.hashfull(),
+            'size_bytes': self.get_size_bytes(),
+        }
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    A transposition table in shared memory, used by several processes at once. See the
+    module docstring for how entries are checked.
+    """
+
+    def __init__(self, size_mb=16, name=None):
+        """
+        Creates the table, or attaches to one made by another process.
+
+        Parameters:
+        size_mb (float): memory to use, in megabytes, as for TranspositionTable. It must
+            be the same in every process attached to the table
+        name (str): the `name` of an existing table to attach to, or None to create one.
+            The processes attaching should be started from the creating one with
+            multiprocessing, so that they share its record of the block and leave
+            freeing it to the creator
+        """
+        self.size_mb = size_mb
+        self.name = name
+        TranspositionTable.__init__(self, size_mb)
+
+    def _allocate(self, num_entries):
+        """
+        Creates the shared block, or attaches to the one named by `name`, and maps the
+        `keys` and `data` buffers onto its two halves
+        """
+        size = 8 * num_entries
+        if self.name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=2 * size)
+            self.owner = True
+        else:
+            self.memory = shared_memory.SharedMemory(name=self.name)
+            self.owner = False
+        self.name = self.memory.name
+        self.keys = self.memory.buf[:size].cast('Q')
+        self.data = self.memory.buf[size:2 * size].cast('Q')
+
+    def clear(self):
+        """
+        Empties the table for every process using it, and resets this process' counters
+        """
+        self.memory.buf[:len(self.keys) * 16] = bytes(len(self.keys) * 16)
+        self._reset_counters()
+
+    def close(self):
+        """
+        Detaches this process from the table, and frees the memory if this process
+        created it. The table cannot be used afterwards.
+        """
+        self.keys.release()
+        self.data.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def probe(self, key):
+        """
+        Looks up a position, see TranspositionTable.probe. An entry only matches if its
+        key word is the key XORed with its data word.
+        """
+        index = (key & self.bucket_mask) * ENTRIES_PER_BUCKET
+        keys = self.keys
+        data = self.data
+        first = data[index]
+        if keys[index] ^ first == key:
+            self.hits += 1
+            return unpack_entry(first)
+        second = data[index + 1]
+        if keys[index + 1] ^ second == key:
+            self.hits += 1
+            return unpack_entry(second)
+        self.misses += 1
+        if keys[index] or keys[index + 1]:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, bound, best_move=0):
+        """
+        Stores a search result, with the same replacement policy as
+        TranspositionTable.store. The data word is written first and the checked key
+        word after it, so a reader sees either the whole entry or a miss.
+        """
+        index = (key & self.bucket_mask) * ENTRIES_PER_BUCKET
+        keys = self.keys
+        data = self.data
+        self.stores += 1
+
+        stored_data = data[index]
+        stored_key = keys[index] ^ stored_data
+        if ( stored_key == key or not keys[index]
+            or (stored_data >> _GENERATION_SHIFT) & _GENERATION_MASK != self.generation
+            or depth >= (stored_data >> _DEPTH_SHIFT) & MAX_DEPTH ):
+            if stored_key == key and not best_move:
+                best_move = stored_data & _MOVE_MASK
+        else:
+            index += 1
+            stored_data = data[index]
+            if keys[index] ^ stored_data == key and not best_move:
+                best_move = stored_data & _MOVE_MASK
+        entry = pack_entry(depth, score, bound, best_move, self.generation)
+        data[index] = entry
+        keys[index] = key ^ entry
+
@@ -0,0 +1,48 @@
+""" This module holds the random keys used to hash board positions (Zobrist hashing).
+
+A position's key is the XOR of one key per (colour, piece type, square) on the board,
+plus a key for black to move, one for the castling rights and one for the file of a
+capturable en-passant square. The board keeps its key up to date by XOR-ing keys in
+and out as pieces are added, removed and moved.
+"""
+
+import random
+
+# Fixed seed so that keys agree between runs and between processes
+_random = random.Random(0x5EED_C4E55)
+
+
+def _random_key():
+    """
+    Returns a random 64-bit key
+    """
+    return _random.getrandbits(64)
+
+
+ZOBRIST_PIECES = {
+    (colour, piece_type): [_random_key() for _ in range(64)]
+    for colour in ('W', 'B')
+    for piece_type in ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+}
+ZOBRIST_BLACK_TO_MOVE = _random_key()
+ZOBRIST_CASTLING = [_random_key() for _ in range(16)]
+ZOBRIST_EN_PASSANT_FILE = [_random_key() for _ in range(8)]
+
+
+def get_piece_keys(colour, piece_type):
+    """
+    Returns the 64 square keys for a kind of piece. Piece types outside the standard
+    six (ie. in tests) get their own keys the first time they are seen.
+
+    Parameters:
+    colour (str): 'W' or 'B'
+    piece_type (str): type of piece (pawn, bishop, knight, etc...)
+
+    Returns:
+    keys (list): one 64-bit key per square index
+
+    """
+    keys = ZOBRIST_PIECES.get((colour, piece_type))
+    if keys is None:
+        keys = ZOBRIST_PIECES[(colour, piece_type)] = [_random_key() for _ in range(64)]
+    return keys
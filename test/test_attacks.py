@@ -0,0 +1,86 @@
+""" This module runs tests for the incremental attack map """
+
+import unittest
+from src.attacks import get_piece_attacks
+from src.bitboard import iter_bits
+from src.board import Board
+from src.perft import get_legal_moves, REFERENCE_POSITIONS
+
+
+class TestAttackMap(unittest.TestCase):
+    """
+    Run tests comparing the incremental attack map against a full rebuild.
+    """
+
+    def check_against_rebuild(self, board):
+        """
+        Compare the board's incremental attack map with one built from scratch
+        """
+        board.attack_map.update()
+        counts = {'W': [0] * 64, 'B': [0] * 64}
+        for piece in board.active_white_pieces + board.active_black_pieces:
+            square = piece.pos[1] * 8 + piece.pos[0]
+            for attacked in iter_bits(get_piece_attacks(piece, square, board.occupied)):
+                counts[piece.get_colour()][attacked] += 1
+        for colour in ('W', 'B'):
+            self.assertEqual(board.attack_map.attacks[colour],
+                             board._compute_attacks(colour, board.occupied))
+            self.assertEqual(board.attack_map.counts[colour], counts[colour])
+
+    def check_tree(self, board, depth):
+        """
+        Walk the move tree, checking the attack map and the regenerated move lists
+        after every move and every take back
+        """
+        self.check_against_rebuild(board)
+        board.update_moves()
+        for piece in board.active_white_pieces + board.active_black_pieces:
+            moves = sorted(piece.all_moves)
+            piece.update_all_moves(board)
+            self.assertEqual(moves, sorted(piece.all_moves), piece.get_piece_type())
+        if depth == 0:
+            return
+        for move in get_legal_moves(board):
+            board.make_move(move)
+            self.check_tree(board, depth - 1)
+            board.unmake_move()
+            self.check_against_rebuild(board)
+
+    def test_incremental_updates(self):
+        """
+        Ensure the incremental map matches a full rebuild through captures, castles,
+        en-passant and promotions
+        """
+        for (name, fen, _) in REFERENCE_POSITIONS:
+            if name not in ('kiwipete', 'position3', 'position4'):
+                continue
+            with self.subTest(position=name):
+                board = Board.from_fen(fen)
+                board.track_attacks()
+                self.check_tree(board, 2)
+
+    def test_attack_counts(self):
+        """
+        Ensure squares count every attacker
+        """
+        board = Board.from_fen()
+        self.assertEqual(board.get_attack_count((5, 2), 'W'), 3) # F3: E2, G2 and the G1 knight
+        self.assertEqual(board.get_attack_count((3, 0), 'W'), 1) # D1 is defended by the king
+        self.assertEqual(board.get_attack_count((4, 3), 'W'), 0)
+        self.assertEqual(board.get_attack_count((5, 5), 'B'), 3)
+
+    def test_regenerates_a_fraction(self):
+        """
+        Ensure a quiet move only regenerates the pieces it touches
+        """
+        board = Board.from_fen('r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10')
+        board.update_moves()
+        board.make_move((board.get_piece_from_position((7, 1)), (7, 1), (7, 2), 'N', None, None))
+        regenerated = board.update_moves()
+        self.assertLess(len(regenerated), 8)
+        stats = board.attack_map.get_stats()
+        self.assertLess(stats['fraction'], 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
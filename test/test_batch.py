@@ -0,0 +1,124 @@
+""" This module runs tests for the NumPy position batch """
+
+import unittest
+from src.batch import PositionBatch, popcount, np
+from src.board import Board
+from src.evaluation import evaluate, MG_VALUES, EG_VALUES, PHASE_WEIGHTS, PHASE_MAX
+from src.perft import REFERENCE_POSITIONS
+
+FENS = [fen for (_, fen, _) in REFERENCE_POSITIONS] + [
+    'r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3',
+    '8/8/4k3/8/2Q5/8/4K3/8 b - - 12 60',
+    'rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 3',
+]
+
+
+def count_mobility(board):
+    """
+    Counts mobility the slow way, from each piece's pseudo-legal moves
+    """
+    mobility = 0
+    for piece in board.active_white_pieces + board.active_black_pieces:
+        if piece.get_piece_type() in ('knight', 'bishop', 'rook', 'queen'):
+            piece.update_all_moves(board)
+            count = len(piece.all_moves)
+            mobility += count if piece.get_colour() == 'W' else -count
+    return mobility
+
+
+def count_material(board):
+    """
+    Counts the tapered material balance the slow way, piece by piece, white minus black
+    """
+    mg_score = eg_score = phase = 0
+    for piece in board.active_white_pieces + board.active_black_pieces:
+        piece_type = piece.get_piece_type()
+        sign = 1 if piece.get_colour() == 'W' else -1
+        mg_score += sign * MG_VALUES[piece_type]
+        eg_score += sign * EG_VALUES[piece_type]
+        phase += PHASE_WEIGHTS[piece_type]
+    phase = min(phase, PHASE_MAX)
+    return int((mg_score * phase + eg_score * (PHASE_MAX - phase)) / PHASE_MAX)
+
+
+@unittest.skipUnless(np, 'NumPy is not installed')
+class TestBatch(unittest.TestCase):
+    """
+    Run tests for packing positions and evaluating them as a batch.
+    """
+
+    def test_packing(self):
+        """
+        Ensure positions packed from FENs and from Boards are the same, and unpack back
+        """
+        from_fens = PositionBatch.from_fens(FENS)
+        from_boards = PositionBatch.from_boards([Board.from_fen(fen) for fen in FENS])
+        self.assertEqual(len(from_fens), len(FENS))
+        for name in ('pieces', 'white_to_move', 'castling_rights', 'en_passant',
+                     'halfmove_clock', 'fullmove_number'):
+            self.assertTrue(np.array_equal(getattr(from_fens, name), getattr(from_boards, name)), name)
+        for (index, fen) in enumerate(FENS):
+            self.assertEqual(from_fens.get_fen(index), Board.from_fen(fen).to_fen())
+
+    def test_bitboards(self):
+        """
+        Ensure the batch's bitboards match the board's
+        """
+        batch = PositionBatch.from_fens(FENS)
+        white = batch.get_bitboards((1, 2, 3, 4, 5, 6))
+        knights = batch.get_bitboards((-2,))
+        self.assertTrue(np.array_equal(popcount(white), [bin(int(bitboard)).count('1') for bitboard in white]))
+        self.assertEqual(int(popcount(white)[0]), 16)
+        for (index, board) in enumerate(batch.to_boards()):
+            self.assertEqual(int(white[index]), board.colour_bitboards['W'])
+            self.assertEqual(int(knights[index]), board.piece_bitboards['B']['knight'])
+
+    def test_evaluate(self):
+        """
+        Ensure without mobility the batch scores every position as evaluation.evaluate
+        """
+        batch = PositionBatch.from_fens(FENS)
+        scores = batch.evaluate(mobility_weight=0)
+        for (index, fen) in enumerate(FENS):
+            self.assertEqual(int(scores[index]), evaluate(Board.from_fen(fen)), fen)
+        self.assertEqual(int(scores[0]), 0)
+
+    def test_material(self):
+        """
+        Ensure the material balance matches the material of the pieces on the board
+        """
+        fens = FENS + ['4k3/8/8/8/8/8/8/R3K3 w - - 0 1', '4k3/3q4/8/8/8/8/PPP5/4K3 b - - 0 1']
+        material = PositionBatch.from_fens(fens).get_material()
+        for (index, fen) in enumerate(fens):
+            self.assertEqual(int(material[index]), count_material(Board.from_fen(fen)), fen)
+        self.assertEqual(int(material[0]), 0)
+        self.assertGreater(int(material[-2]), 0)
+        self.assertLess(int(material[-1]), 0)
+
+    def test_mobility(self):
+        """
+        Ensure the set-wise mobility counts each piece's moves, and its sign follows the
+        side to move in the score
+        """
+        batch = PositionBatch.from_fens(FENS)
+        mobility = batch.get_mobility()
+        for (index, fen) in enumerate(FENS):
+            self.assertEqual(int(mobility[index]), count_mobility(Board.from_fen(fen)), fen)
+
+        # Only the side to move differs, so the scores are opposite
+        batch = PositionBatch.from_fens([FENS[-2], FENS[-2].replace(' b ', ' w ')])
+        scores = batch.evaluate()
+        self.assertEqual(int(scores[0]), -int(scores[1]))
+        self.assertLess(int(scores[0]), 0)
+
+    def test_empty(self):
+        """
+        Ensure an empty batch evaluates to an empty array
+        """
+        batch = PositionBatch.from_fens([])
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(batch.evaluate().shape, (0,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+""" This module runs tests for the benchmarks """
+
+import io
+import unittest
+from src.batch import np
+from src.benchmark import benchmark_fen, benchmark_pgn, benchmark_batch, benchmark_smp, BENCHMARK_FENS
+
+
+class TestBenchmark(unittest.TestCase):
+    """
+    Run each benchmark on a tiny workload, checking its report.
+    """
+
+    def test_fen(self):
+        """
+        Ensure the FEN benchmark reports positions per second
+        """
+        output = io.StringIO()
+        results = benchmark_fen(12, output=output)
+        self.assertEqual(results['count'], 12)
+        self.assertGreater(results['parse_per_second'], 0)
+        self.assertIn('positions/s', output.getvalue())
+
+    def test_pgn(self):
+        """
+        Ensure the PGN benchmark reports games per second
+        """
+        output = io.StringIO()
+        results = benchmark_pgn(3, output=output)
+        self.assertEqual(results['count'], 3)
+        self.assertGreater(results['replay_per_second'], 0)
+        self.assertIn('games/s', output.getvalue())
+
+    @unittest.skipUnless(np, 'NumPy is not installed')
+    def test_batch(self):
+        """
+        Ensure the batch benchmark reports positions per second
+        """
+        output = io.StringIO()
+        results = benchmark_batch(12, output=output)
+        self.assertEqual(results['count'], 12)
+        self.assertGreater(results['evaluate_per_second'], 0)
+        self.assertIn('positions/s', output.getvalue())
+
+    def test_smp(self):
+        """
+        Ensure the parallel search benchmark reports the time to depth of each worker count
+        """
+        output = io.StringIO()
+        results = benchmark_smp(2, BENCHMARK_FENS[:1], worker_counts=(1, 2), output=output)
+        self.assertEqual(results['workers'], [1, 2])
+        self.assertEqual(results['speedup'][0], 1.0)
+        self.assertGreater(results['nodes'][1], 0)
+        self.assertIn('2 workers: depth 2', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -138,6 +138,7 @@ class TestBishop(unittest.TestCase):
         king = board.add_piece(BasicPiece('W', 'king', (1, 1))) # A white king on B2
 
         bishop.update_all_moves(board)
+        board.update_pins_and_checks('W')
         all_moves = bishop.all_moves
 
         self.assertTrue(len(all_moves) == 5)
@@ -0,0 +1,105 @@
+""" This module runs tests for the bitboard helpers """
+
+import unittest
+from src.bitboard import (SQUARES, square_index, square_bit, iter_bits,
+                          iter_squares, popcount, mask_from_squares,
+                          KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS,
+                          rook_attacks, bishop_attacks, queen_attacks,
+                          BETWEEN, square_name, parse_square)
+
+
+class TestBitboard(unittest.TestCase):
+    """
+    Run tests for the bitboard helper functions.
+    """
+
+    def test_square_index(self):
+        """
+        Ensure that squares map onto bit indices as rank * 8 + file
+        """
+        self.assertEqual(square_index((0, 0)), 0) # A1
+        self.assertEqual(square_index((7, 0)), 7) # H1
+        self.assertEqual(square_index((0, 1)), 8) # A2
+        self.assertEqual(square_index((7, 7)), 63) # H8
+
+        for index in range(64):
+            with self.subTest(i=index):
+                self.assertEqual(square_index(SQUARES[index]), index)
+                self.assertEqual(square_bit(SQUARES[index]), 1 << index)
+
+    def test_square_names(self):
+        """
+        Ensure squares convert to and from algebraic names
+        """
+        self.assertEqual(square_name((0, 0)), 'a1')
+        self.assertEqual(square_name((4, 1)), 'e2')
+        self.assertEqual(square_name((7, 7)), 'h8')
+        self.assertEqual(parse_square('e2'), (4, 1))
+        self.assertEqual(parse_square('h8'), (7, 7))
+
+    def test_iteration(self):
+        """
+        Ensure that set bits are iterated lowest first
+        """
+        mask = mask_from_squares([(3, 3), (0, 0), (7, 7)]) # D4, A1, H8
+
+        self.assertEqual(popcount(mask), 3)
+        self.assertEqual(list(iter_bits(mask)), [0, 27, 63])
+        self.assertEqual(list(iter_squares(mask)), [(0, 0), (3, 3), (7, 7)])
+        self.assertEqual(list(iter_bits(0)), [])
+
+    def test_jump_tables(self):
+        """
+        Ensure the knight, king and pawn tables drop squares off the board
+        """
+        self.assertEqual(popcount(KNIGHT_ATTACKS[square_index((3, 3))]), 8) # D4
+        self.assertEqual(popcount(KNIGHT_ATTACKS[square_index((0, 0))]), 2) # A1
+        self.assertEqual(KNIGHT_ATTACKS[square_index((0, 0))],
+                         mask_from_squares([(1, 2), (2, 1)]))
+
+        self.assertEqual(popcount(KING_ATTACKS[square_index((3, 3))]), 8) # D4
+        self.assertEqual(popcount(KING_ATTACKS[square_index((7, 7))]), 3) # H8
+
+        self.assertEqual(PAWN_ATTACKS['W'][square_index((0, 1))], square_bit((1, 2))) # A2
+        self.assertEqual(PAWN_ATTACKS['W'][square_index((4, 1))],
+                         mask_from_squares([(3, 2), (5, 2)])) # E2
+        self.assertEqual(PAWN_ATTACKS['B'][square_index((7, 6))], square_bit((6, 5))) # H7
+
+    def test_sliding_attacks(self):
+        """
+        Ensure the ray lookups stop at, and include, the first blocker in each direction
+        """
+        # Rook on D4 on an empty board
+        self.assertEqual(popcount(rook_attacks(square_index((3, 3)), 0)), 14)
+        # Bishop on A1 on an empty board
+        self.assertEqual(popcount(bishop_attacks(square_index((0, 0)), 0)), 7)
+        # Queen on D4 on an empty board
+        self.assertEqual(popcount(queen_attacks(square_index((3, 3)), 0)), 27)
+
+        # Rook on D4, blockers on D6 and B4
+        occupied = mask_from_squares([(3, 3), (3, 5), (1, 3)])
+        self.assertEqual(rook_attacks(square_index((3, 3)), occupied), mask_from_squares(
+            [(3, 4), (3, 5), (3, 2), (3, 1), (3, 0),
+             (2, 3), (1, 3), (4, 3), (5, 3), (6, 3), (7, 3)]))
+
+        # Bishop on D4, blockers on F6 and C3
+        occupied = mask_from_squares([(3, 3), (5, 5), (2, 2)])
+        self.assertEqual(bishop_attacks(square_index((3, 3)), occupied), mask_from_squares(
+            [(4, 4), (5, 5), (2, 2), (2, 4), (1, 5), (0, 6),
+             (4, 2), (5, 1), (6, 0)]))
+
+    def test_between(self):
+        """
+        Ensure BETWEEN holds the squares strictly between two aligned squares
+        """
+        self.assertEqual(BETWEEN[square_index((4, 0))][square_index((4, 7))],
+                         mask_from_squares([(4, rank) for rank in range(1, 7)]))
+        self.assertEqual(BETWEEN[square_index((6, 6))][square_index((1, 1))],
+                         mask_from_squares([(5, 5), (4, 4), (3, 3), (2, 2)]))
+        self.assertEqual(BETWEEN[square_index((0, 0))][square_index((1, 1))], 0)
+        # Squares that do not share a line
+        self.assertEqual(BETWEEN[square_index((0, 0))][square_index((1, 2))], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,33 @@
 import unittest
-from src.board import Board
+from src.bitboard import FULL_BOARD, mask_from_squares
+from src.board import (Board, STARTING_FEN, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE,
+                       BLACK_QUEENSIDE)
+from src.pawn import Pawn
 from src.piece import BasicPiece
+from src.rook import Rook
+
+
+def snapshot(board):
+    """
+    Captures everything make_move and unmake_move touch, for comparisons
+    """
+    return (
+        [row[:] for row in board.board],
+        board.occupied,
+        dict(board.colour_bitboards),
+        {colour: dict(bitboards) for colour, bitboards in board.piece_bitboards.items()},
+        board.active_white_pieces[:],
+        board.active_black_pieces[:],
+        board.inactive_pieces[:],
+        [(piece.pos, piece.previous_square)
+         for piece in board.active_white_pieces + board.active_black_pieces],
+        board.castling_rights,
+        board.en_passant_square,
+        board.halfmove_clock,
+        board.fullmove_number,
+        board.colour_to_move,
+        board.get_move_history(),
+    )
 
 class TestBoard(unittest.TestCase):
     """
@@ -78,6 +105,55 @@ class TestBoard(unittest.TestCase):
         self.assertIn(piece_1, board.inactive_pieces)
         self.assertIn(piece_2, board.inactive_pieces)
 
+    def test_piece_list_slots(self):
+        """
+        Ensure removal fills the slot with the last piece and keeps the slot indices in sync
+        """
+        board = Board()
+        pieces = [board.add_piece(BasicPiece("W", "NA", (file, 0))) for file in range(5)]
+
+        board.remove_piece_by_square((1, 0))
+        self.assertEqual(board.active_white_pieces,
+                         [pieces[0], pieces[4], pieces[2], pieces[3]])
+        board.remove_piece_by_square((3, 0))
+        self.assertEqual(board.active_white_pieces, [pieces[0], pieces[4], pieces[2]])
+        for index, piece in enumerate(board.active_white_pieces):
+            with self.subTest(i=index):
+                self.assertEqual(piece.list_index, index)
+
+        board.refresh_all_active_pieces()
+        self.assertEqual(board.active_white_pieces, [pieces[0], pieces[2], pieces[4]])
+        self.assertEqual(pieces[4].list_index, 2)
+
+    def test_bitboards(self):
+        """
+        Ensure the occupancy bitboards follow pieces being added and removed
+        """
+        board = Board()
+        # create a white piece on A1
+        board.add_piece(BasicPiece("W", "rook", (0, 0)))
+        # create a black piece on H8
+        board.add_piece(BasicPiece("B", "rook", (7, 7)))
+        # create a black piece on D5
+        board.add_piece(BasicPiece("B", "pawn", (3, 4)))
+
+        self.assertEqual(board.get_occupancy(), (1 << 0) | (1 << 63) | (1 << 35))
+        self.assertEqual(board.get_occupancy('W'), 1 << 0)
+        self.assertEqual(board.get_occupancy('B'), (1 << 63) | (1 << 35))
+        self.assertEqual(board.get_piece_bitboard('B', 'rook'), 1 << 63)
+        self.assertEqual(board.get_piece_bitboard('B', 'pawn'), 1 << 35)
+        self.assertEqual(board.get_piece_bitboard('W', 'pawn'), 0)
+
+        board.remove_piece_by_square((7, 7))
+        self.assertEqual(board.get_occupancy('B'), 1 << 35)
+        self.assertEqual(board.get_piece_bitboard('B', 'rook'), 0)
+
+        board.remove_all_pieces()
+        self.assertEqual(board.get_occupancy(), 0)
+        self.assertEqual(len(board.active_white_pieces), 0)
+        self.assertEqual(len(board.active_black_pieces), 0)
+        self.assertEqual(len(board.inactive_pieces), 3)
+
     def test_move_history(self):
         """
         Ensure that the moves get added to the history
@@ -99,6 +175,188 @@ class TestBoard(unittest.TestCase):
         self.assertTupleEqual(move_2, move_history[1])
 
 
+    def test_make_and_unmake_move(self):
+        """
+        Ensure that a quiet move and a capture are made in place and undone exactly
+        """
+        board = Board()
+        rook = board.add_piece(Rook('W', (0, 0))) # A white rook on A1
+        pawn_1 = board.add_piece(Pawn('B', (0, 5))) # A black pawn on A6
+        pawn_2 = board.add_piece(Pawn('B', (3, 6))) # A black pawn on D7
+        board.add_piece(Pawn('W', (4, 1))) # A white pawn on E2
+        before = snapshot(board)
+
+        board.make_move((rook, (0, 0), (0, 5), 'C'))
+        self.assertIs(board.get_piece_from_position((0, 5)), rook)
+        self.assertIsNone(board.get_piece_from_position((0, 0)))
+        self.assertEqual(rook.pos, (0, 5))
+        self.assertFalse(pawn_1.is_active_piece)
+        self.assertNotIn(pawn_1, board.active_black_pieces)
+        self.assertEqual(board.get_occupancy('B'), 1 << 51)
+        self.assertEqual(board.colour_to_move, 'B')
+        self.assertEqual(board.castling_rights & WHITE_QUEENSIDE, 0)
+        self.assertEqual(board.castling_rights & WHITE_KINGSIDE, WHITE_KINGSIDE)
+        self.assertEqual(board.get_last_move(), (rook, (0, 0), (0, 5), 'C'))
+
+        after_capture = snapshot(board)
+        board.make_move((pawn_2, (3, 6), (3, 4), 'N'))
+        self.assertEqual(board.en_passant_square, (3, 5))
+        self.assertEqual(board.fullmove_number, 2)
+
+        board.unmake_move()
+        self.assertEqual(snapshot(board), after_capture)
+        board.unmake_move()
+        self.assertEqual(snapshot(board), before)
+        self.assertTrue(pawn_1.is_active_piece)
+        self.assertIs(board.active_black_pieces[0], pawn_1)
+
+    def test_make_special_moves(self):
+        """
+        Ensure that en-passant, castling and promotion are made and undone exactly
+        """
+        board = Board()
+        king = board.add_piece(BasicPiece('W', 'king', (4, 0))) # A white king on E1
+        rook = board.add_piece(Rook('W', (7, 0))) # A white rook on H1
+        white_pawn = board.add_piece(Pawn('W', (4, 4))) # A white pawn on E5
+        promoting_pawn = board.add_piece(Pawn('W', (0, 6))) # A white pawn on A7
+        black_pawn = board.add_piece(Pawn('B', (3, 6))) # A black pawn on D7
+        board.colour_to_move = 'B'
+        before = snapshot(board)
+
+        # En-passant after a two square move
+        board.make_move((black_pawn, (3, 6), (3, 4), 'N'))
+        white_pawn.update_all_moves(board)
+        self.assertIn(((3, 5), 'E'), white_pawn.all_moves)
+        board.make_move((white_pawn, (4, 4), (3, 5), 'E'))
+        self.assertIsNone(board.get_piece_from_position((3, 4)))
+        self.assertFalse(black_pawn.is_active_piece)
+        board.unmake_move()
+        self.assertIs(board.get_piece_from_position((3, 4)), black_pawn)
+
+        # Castling moves the rook with the king
+        board.make_move((king, (4, 0), (6, 0), 'O'))
+        self.assertIs(board.get_piece_from_position((6, 0)), king)
+        self.assertIs(board.get_piece_from_position((5, 0)), rook)
+        self.assertEqual(board.castling_rights, BLACK_KINGSIDE | BLACK_QUEENSIDE)
+        board.unmake_move()
+        self.assertEqual(rook.pos, (7, 0))
+
+        # Promotion swaps the pawn for a new piece
+        board.make_move((promoting_pawn, (0, 6), (0, 7), 'N', None, 'queen'))
+        queen = board.get_piece_from_position((0, 7))
+        self.assertEqual(queen.get_piece_type(), 'queen')
+        self.assertIn(queen, board.active_white_pieces)
+        self.assertNotIn(promoting_pawn, board.active_white_pieces)
+        queen_move = (queen, (0, 7), (0, 3), 'N', None, None)
+        board.make_move(queen_move)
+        board.unmake_move()
+        board.unmake_move()
+
+        # Made again, the promotion brings back the same piece, so the moves recorded
+        # after it can be made again too
+        board.make_move((promoting_pawn, (0, 6), (0, 7), 'N', None, 'queen'))
+        self.assertIs(board.get_piece_from_position((0, 7)), queen)
+        board.make_move(queen_move)
+        self.assertIs(board.get_piece_from_position((0, 3)), queen)
+        self.assertEqual(board.active_white_pieces.count(queen), 1)
+        board.unmake_move()
+        board.unmake_move()
+
+        board.unmake_move()
+        self.assertEqual(snapshot(board), before)
+        self.assertEqual(board.undo_stack, [])
+
+    def test_from_fen(self):
+        """
+        Ensure a FEN string sets up the pieces and the game state
+        """
+        board = Board.from_fen('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b Kq e3 0 1')
+
+        self.assertEqual(len(board.active_white_pieces), 16)
+        self.assertEqual(len(board.active_black_pieces), 16)
+        self.assertEqual(board.get_piece_from_position((4, 0)).get_piece_type(), 'king')
+        self.assertEqual(board.get_piece_from_position((4, 6)).get_colour(), 'B')
+        self.assertEqual(board.get_piece_from_position((4, 6)).get_piece_type(), 'queen')
+        self.assertEqual(board.colour_to_move, 'B')
+        self.assertEqual(board.castling_rights, WHITE_KINGSIDE | BLACK_QUEENSIDE)
+        self.assertEqual(board.get_en_passant_square(), (4, 2))
+        self.assertEqual(board.get_king_square('B'), (4, 7))
+
+        # The one-pass parser must agree with adding the same pieces one at a time
+        slow_board = Board()
+        for piece in board.active_white_pieces + board.active_black_pieces:
+            slow_board.add_piece(type(piece)(piece.get_colour(), piece.pos))
+        self.assertEqual(board.occupied, slow_board.occupied)
+        self.assertEqual(board.colour_bitboards, slow_board.colour_bitboards)
+        self.assertEqual(board.piece_bitboards, slow_board.piece_bitboards)
+        for pieces in (board.active_white_pieces, board.active_black_pieces):
+            self.assertEqual([piece.list_index for piece in pieces], list(range(len(pieces))))
+        self.assertEqual(board.zobrist_key, board.compute_zobrist_key())
+
+    def test_to_fen(self):
+        """
+        Ensure positions are written back in Forsyth-Edwards Notation
+        """
+        for fen in (STARTING_FEN, '8/8/8/8/8/8/8/8 w - - 0 1',
+                    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b Kq e3 0 1',
+                    'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8'):
+            self.assertEqual(Board.from_fen(fen).to_fen(), fen)
+
+        board = Board.from_fen()
+        board.make_move((board.get_piece_from_position((4, 1)), (4, 1), (4, 3), 'N', None, None))
+        self.assertEqual(board.to_fen(), 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1')
+
+    def test_is_square_attacked(self):
+        """
+        Ensure attacks are found for every kind of piece
+        """
+        board = Board.from_fen('4k3/8/8/3p4/8/2N5/8/R3K3 w - - 0 1')
+
+        self.assertTrue(board.is_square_attacked((0, 7), 'W')) # rook on A8 file
+        self.assertTrue(board.is_square_attacked((3, 4), 'W')) # knight on D5
+        self.assertTrue(board.is_square_attacked((4, 3), 'B')) # pawn on E4
+        self.assertTrue(board.is_square_attacked((4, 6), 'B')) # king on E7
+        self.assertFalse(board.is_square_attacked((3, 3), 'B')) # pawns do not attack forwards
+        self.assertFalse(board.is_in_check('W'))
+        self.assertFalse(board.is_in_check('B'))
+
+    def test_pins_and_checks(self):
+        """
+        Ensure checkers, the check mask and pins are found from the king square
+        """
+        # White king on E1, knight on E2 pinned by the rook on E8, bishop on B4 giving check
+        board = Board.from_fen('4r1k1/8/8/8/1b6/8/4N3/4K3 w - - 0 1')
+        board.update_pins_and_checks()
+        knight = board.get_piece_from_position((4, 1))
+
+        self.assertEqual(board.checkers, mask_from_squares([(1, 3)]))
+        self.assertEqual(board.check_mask, mask_from_squares([(1, 3), (2, 2), (3, 1)]))
+        self.assertTrue(board.white_in_check)
+        self.assertEqual(board.pinned, mask_from_squares([(4, 1)]))
+        self.assertTrue(knight.is_pinned)
+        self.assertEqual(len(knight.pinned_squares), 6)
+        self.assertIn((4, 7), knight.pinned_squares)
+        # A pinned knight can never answer the check
+        self.assertEqual(board.get_move_mask(knight), 0)
+
+        # Once the rook is gone the pin is released
+        board.remove_piece_by_square((4, 7))
+        board.update_pins_and_checks()
+        self.assertFalse(knight.is_pinned)
+        self.assertEqual(board.pinned, 0)
+        self.assertEqual(board.get_move_mask(knight), board.check_mask)
+
+        # Double check leaves only king moves
+        board = Board.from_fen('4r1k1/8/8/8/1b6/8/8/4K3 w - - 0 1')
+        board.update_pins_and_checks()
+        self.assertEqual(board.check_mask, 0)
+
+        board = Board.from_fen(STARTING_FEN)
+        board.update_pins_and_checks()
+        self.assertEqual(board.checkers, 0)
+        self.assertEqual(board.check_mask, FULL_BOARD)
+        self.assertFalse(board.white_in_check)
+
 
 if __name__ == '__main__':
     unittest.main()
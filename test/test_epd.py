@@ -0,0 +1,99 @@
+""" This module runs tests for the EPD and FEN loader """
+
+import os
+import tempfile
+import unittest
+from src.epd import (parse_epd, parse_operations, iter_epd, iter_boards, count_lines,
+                     get_shards)
+from src.perft import move_name
+
+EPD_LINES = [
+    '# Opening test positions',
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - bm e4 d4; id "start; both";',
+    '',
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - bm dxc8=Q; hmvc 1; fmvn 8; id "pos5";',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - bm Rxf4; id "pos3";',
+]
+
+
+class TestEpd(unittest.TestCase):
+    """
+    Run tests for parsing and streaming EPD files.
+    """
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.epd')
+        with os.fdopen(handle, 'w') as file:
+            file.write('\n'.join(EPD_LINES))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_parse_operations(self):
+        """
+        Ensure operations split on semicolons outside of quotes
+        """
+        self.assertEqual(parse_operations('bm Nf3 e4; id "a b;c"; c0 "";'),
+                         {'bm': ['Nf3', 'e4'], 'id': ['a b;c'], 'c0': ['']})
+        self.assertEqual(parse_operations('acd 12'), {'acd': ['12']})
+
+    def test_parse_epd(self):
+        """
+        Ensure EPD and FEN lines give full FEN strings
+        """
+        position = parse_epd(EPD_LINES[4])
+        self.assertEqual(position.fen, 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8')
+        self.assertEqual(position.get_id(), 'pos5')
+        self.assertEqual(position.get_best_moves(), ['dxc8=Q'])
+        self.assertEqual([move_name(move) for move in position.get_best_move_tuples()], ['d7c8q'])
+
+        position = parse_epd(EPD_LINES[3])
+        self.assertEqual(position.fen, EPD_LINES[3])
+        self.assertEqual(position.operations, {})
+        self.assertIsNone(position.get_id())
+
+        with self.assertRaises(ValueError):
+            parse_epd('8/8/8 w')
+
+    def test_streaming(self):
+        """
+        Ensure every position is read, with and without the memory map
+        """
+        positions = list(iter_epd(self.path))
+        self.assertEqual([position.line_number for position in positions], [1, 3, 4, 5])
+        self.assertEqual(positions[0].get_id(), 'start; both')
+        self.assertEqual(positions[0].get_best_moves(), ['e4', 'd4'])
+        self.assertEqual([position.fen for position in iter_epd(self.path, use_mmap=False)],
+                         [position.fen for position in positions])
+
+        boards = list(iter_boards(self.path))
+        self.assertEqual(boards[1].to_fen(), EPD_LINES[3])
+        self.assertEqual([move_name(move) for move in positions[3].get_best_move_tuples(boards[3])],
+                         ['b4f4'])
+
+    def test_shards(self):
+        """
+        Ensure shards cover every line exactly once
+        """
+        self.assertEqual(count_lines(self.path), len(EPD_LINES))
+        for num_shards in (1, 2, 4, 7):
+            shards = get_shards(self.path, num_shards)
+            self.assertEqual(len(shards), num_shards)
+            for use_mmap in (True, False):
+                line_numbers = [position.line_number for (start, end) in shards
+                                for position in iter_epd(self.path, start, end, use_mmap)]
+                self.assertEqual(line_numbers, [1, 3, 4, 5])
+
+    def test_empty_file(self):
+        """
+        Ensure an empty file yields nothing
+        """
+        with open(self.path, 'w'):
+            pass
+        self.assertEqual(list(iter_epd(self.path)), [])
+        self.assertEqual(count_lines(self.path), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+""" This module runs tests for the static evaluation """
+
+import unittest
+from src.board import Board, STARTING_FEN
+from src.evaluation import evaluate, compute_scores, PHASE_MAX
+from src.perft import REFERENCE_POSITIONS, get_legal_moves
+from src.queen import Queen
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+
+def mirror_fen(fen):
+    """
+    Returns the position with the colours swapped and the board flipped
+    """
+    fields = fen.split()
+    placement = '/'.join(reversed(fields[0].split('/'))).swapcase()
+    colour = 'b' if fields[1] == 'w' else 'w'
+    castling = ''.join(sorted(fields[2].swapcase())) if fields[2] != '-' else '-'
+    return f'{placement} {colour} {castling} - 0 1'
+
+
+class TestEvaluation(unittest.TestCase):
+    """
+    Run tests for the evaluation and the board's running totals.
+    """
+
+    def assert_totals(self, board):
+        """
+        Check the board's running totals against computing them from scratch
+        """
+        self.assertEqual((board.mg_score, board.eg_score, board.game_phase), compute_scores(board))
+
+    def test_symmetry(self):
+        """
+        Ensure equal positions score 0 and mirrored positions score the same
+        """
+        self.assertEqual(evaluate(Board.from_fen(STARTING_FEN)), 0)
+        self.assertEqual(evaluate(Board.from_fen(STARTING_FEN.replace(' w ', ' b '))), 0)
+        self.assertEqual(Board.from_fen(STARTING_FEN).game_phase, PHASE_MAX)
+        self.assertEqual(Board.from_fen('4k3/pp6/8/8/8/8/PP6/4K3 w - - 0 1').game_phase, 0)
+        for (_, fen, _) in REFERENCE_POSITIONS:
+            with self.subTest(fen=fen):
+                self.assertEqual(evaluate(Board.from_fen(fen)), evaluate(Board.from_fen(mirror_fen(fen))))
+
+        # An extra queen is worth about a queen to the side that has it, and as much
+        # against the side that does not
+        board = Board.from_fen('4k3/8/8/8/8/8/8/3QK3 w - - 0 1')
+        self.assertGreater(evaluate(board), 900)
+        board = Board.from_fen('4k3/8/8/8/8/8/8/3QK3 b - - 0 1')
+        self.assertLess(evaluate(board), -900)
+
+    def test_running_totals(self):
+        """
+        Ensure the totals are kept through captures, castles, promotions and en-passant,
+        and restored when moves are taken back
+        """
+        for (_, fen, _) in REFERENCE_POSITIONS:
+            board = Board.from_fen(fen)
+            with self.subTest(fen=fen):
+                self.assert_totals(board)
+                before = (board.mg_score, board.eg_score, board.game_phase)
+                for move in get_legal_moves(board):
+                    board.make_move(move)
+                    self.assert_totals(board)
+                    for reply in get_legal_moves(board):
+                        board.make_move(reply)
+                        self.assert_totals(board)
+                        board.unmake_move()
+                    board.unmake_move()
+                self.assertEqual((board.mg_score, board.eg_score, board.game_phase), before)
+
+    def test_add_and_remove(self):
+        """
+        Ensure adding and removing pieces by hand updates the totals
+        """
+        board = Board.from_fen(KIWIPETE)
+        score = evaluate(board)
+        board.add_piece(Queen('W', (3, 2)))
+        self.assert_totals(board)
+        self.assertGreater(evaluate(board), score + 900)
+        board.remove_piece_by_square((3, 2))
+        self.assert_totals(board)
+        self.assertEqual(evaluate(board), score)
+
+
+if __name__ == '__main__':
+    unittest.main()
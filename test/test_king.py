@@ -0,0 +1,107 @@
+""" This module runs tests for the King class """
+
+import unittest
+from src.king import King, WHITE_KINGSIDE, BLACK_QUEENSIDE
+from src.rook import Rook
+from src.pawn import Pawn
+from src.bitboard import square_bit
+from src.board import Board
+
+
+class TestKing(unittest.TestCase):
+    """
+    Run tests for the King class.
+    """
+
+    def test_basic_instantiation(self):
+        """
+        Ensure that piece is created and fields are instantiated correctly
+        """
+
+        king = King('W', (4, 0)) # A king on E1
+        self.assertEqual(king.get_colour(), 'W')
+        self.assertEqual(king.get_piece_type(), 'king')
+        self.assertEqual(king.pos, (4, 0))
+
+    def test_non_captures_and_captures(self):
+        """
+        Ensure that the king moves one square in every direction
+        """
+
+        board = Board()
+        board.castling_rights = 0
+        king = board.add_piece(King('W', (3, 3))) # A white king on D4
+        pawn_1 = board.add_piece(Pawn('W', (3, 4))) # A white pawn on D5
+        pawn_2 = board.add_piece(Pawn('B', (4, 4))) # A black pawn on E5
+
+        king.update_all_moves(board)
+        all_moves = king.all_moves
+
+        self.assertEqual(len(all_moves), 7)
+        self.assertNotIn(((3, 4), 'N'), all_moves)
+        self.assertIn(((4, 4), 'C'), all_moves)
+        self.assertIn(((2, 2), 'N'), all_moves)
+        self.assertEqual(len(king.squares_defended), 8)
+
+        # A king in the corner
+        corner_king = board.add_piece(King('B', (7, 7))) # A black king on H8
+        corner_king.update_all_moves(board)
+        self.assertEqual(len(corner_king.all_moves), 3)
+
+    def test_castling(self):
+        """
+        Ensure castling is only offered with the right, an empty path and no attacks on the path
+        """
+
+        board = Board()
+        king = board.add_piece(King('W', (4, 0))) # A white king on E1
+        board.add_piece(Rook('W', (7, 0))) # A white rook on H1
+        board.add_piece(Rook('W', (0, 0))) # A white rook on A1
+
+        king.update_all_moves(board)
+        self.assertIn(((6, 0), 'O'), king.all_moves)
+        self.assertIn(((2, 0), 'O'), king.all_moves)
+
+        # Only the kingside right left
+        board.castling_rights = WHITE_KINGSIDE | BLACK_QUEENSIDE
+        king.update_all_moves(board)
+        self.assertIn(((6, 0), 'O'), king.all_moves)
+        self.assertNotIn(((2, 0), 'O'), king.all_moves)
+
+        # A black rook on F8 attacks F1, which the king would pass over
+        board.add_piece(Rook('B', (5, 7)))
+        king.update_all_moves(board)
+        self.assertNotIn(((6, 0), 'O'), king.all_moves)
+
+        # A black rook on E8 gives check, so no castling at all
+        board.remove_piece_by_square((5, 7))
+        board.add_piece(Rook('B', (4, 7)))
+        king.update_all_moves(board)
+        self.assertNotIn(((6, 0), 'O'), king.all_moves)
+
+    def test_king_safety(self):
+        """
+        Ensure the king's legal moves avoid every attacked square, including the
+        square behind it on a checking ray
+        """
+        board = Board()
+        king = board.add_piece(King('W', (4, 3))) # A white king on E4
+        board.add_piece(Rook('B', (0, 3))) # A black rook on A4 giving check
+        board.add_piece(Pawn('B', (5, 5))) # A black pawn on F6
+
+        attacks = board.get_attack_map('B')
+        self.assertTrue(attacks & square_bit((4, 3)))
+        self.assertTrue(attacks & square_bit((6, 4))) # the pawn attacks G5
+        self.assertFalse(attacks & square_bit((5, 3))) # the king blocks the rook from F4
+
+        legal_moves = king.get_legal_moves(board)
+        self.assertNotIn(((5, 3), 'N'), legal_moves) # still on the rook's rank
+        self.assertNotIn(((3, 3), 'N'), legal_moves)
+        self.assertNotIn(((4, 4), 'N'), legal_moves) # attacked by the pawn
+        self.assertIn(((4, 2), 'N'), legal_moves)
+        self.assertIn(((5, 4), 'N'), legal_moves)
+        self.assertEqual(len(legal_moves), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
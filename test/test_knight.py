@@ -79,6 +79,25 @@ class TestKnight(unittest.TestCase):
         self.assertIn(((5, 2), 'C'), all_moves)
         self.assertIn(((4, 1), 'C'), all_moves)
 
+    def test_squares_defended(self):
+        """
+        Ensure that squares_defended includes squares holding pieces of the same colour
+        """
+
+        board = Board()
+
+        knight = board.add_piece(Knight('W', (3, 3))) # A white knight on D4
+        pawn_1 = board.add_piece(Pawn('W', (1, 2))) # A white pawn on B3
+        pawn_2 = board.add_piece(Pawn('B', (5, 2))) # A black pawn on F3
+
+        knight.update_all_moves(board)
+
+        self.assertEqual(len(knight.squares_defended), 8)
+        self.assertIn((1, 2), knight.squares_defended)
+        self.assertIn((5, 2), knight.squares_defended)
+        self.assertEqual(len(knight.all_moves), 7)
+        self.assertNotIn(((1, 2), 'C'), knight.all_moves)
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,104 @@
+""" This module runs tests for the compact move encoding """
+
+import unittest
+from src.board import Board
+from src.move import (encode_move, move_from, move_to, move_flags, is_capture, is_promotion,
+                      promotion_type, new_move_list, encode_target, decode_target,
+                      encode_move_tuple, decode_move, QUIET, DOUBLE_PUSH, KING_CASTLE,
+                      QUEEN_CASTLE, EN_PASSANT, QUEEN_PROMOTION_CAPTURE, KNIGHT_PROMOTION)
+from src.perft import get_legal_moves, move_name, REFERENCE_POSITIONS
+
+
+class TestMove(unittest.TestCase):
+    """
+    Run tests for the 16-bit moves.
+    """
+
+    def test_fields(self):
+        """
+        Test packing and unpacking the fields of a move
+        """
+        move = encode_move(12, 28, DOUBLE_PUSH)
+        self.assertEqual(move_from(move), 12)
+        self.assertEqual(move_to(move), 28)
+        self.assertEqual(move_flags(move), DOUBLE_PUSH)
+        self.assertFalse(is_capture(move))
+        self.assertFalse(is_promotion(move))
+        self.assertIsNone(promotion_type(move))
+
+        move = encode_move(54, 63, QUEEN_PROMOTION_CAPTURE)
+        self.assertTrue(is_capture(move))
+        self.assertTrue(is_promotion(move))
+        self.assertEqual(promotion_type(move), 'queen')
+        self.assertLess(move, 1 << 16)
+
+        self.assertTrue(is_capture(encode_move(36, 43, EN_PASSANT)))
+        self.assertFalse(is_capture(encode_move(4, 6, KING_CASTLE)))
+        self.assertFalse(is_capture(encode_move(4, 2, QUEEN_CASTLE)))
+        self.assertEqual(promotion_type(encode_move(48, 56, KNIGHT_PROMOTION)), 'knight')
+
+    def test_targets(self):
+        """
+        Test converting all_moves entries
+        """
+        self.assertEqual(encode_target((4, 1), ((4, 3), 'N')), encode_move(12, 28, QUIET))
+        self.assertEqual(decode_target(encode_target((4, 0), ((6, 0), 'O'))), ((6, 0), 'O'))
+        self.assertEqual(decode_target(encode_target((4, 0), ((2, 0), 'O'))), ((2, 0), 'O'))
+        self.assertEqual(decode_target(encode_target((3, 4), ((4, 5), 'E'))), ((4, 5), 'E'))
+
+    def test_move_list(self):
+        """
+        Test that move lists hold 16-bit moves
+        """
+        moves = new_move_list([encode_move(12, 28, DOUBLE_PUSH), 0])
+        self.assertEqual(moves.itemsize, 2)
+        self.assertEqual(list(moves), [encode_move(12, 28, DOUBLE_PUSH), 0])
+
+    def test_round_trip(self):
+        """
+        Test that every legal move in the reference positions encodes and decodes back
+        to a move that plays the same way
+        """
+        for (name, fen, _) in REFERENCE_POSITIONS:
+            board = Board.from_fen(fen)
+            for move in get_legal_moves(board):
+                encoded = encode_move_tuple(move)
+                decoded = decode_move(encoded, board)
+                self.assertIs(decoded[0], move[0], name)
+                self.assertEqual(move_name(decoded), move_name(move), name)
+                self.assertEqual(decoded[3], move[3], name)
+                self.assertEqual(encode_move_tuple(decoded), encoded, name)
+
+    def test_encoded_moves(self):
+        """
+        Test that the board's encoded moves match its pseudo-legal moves
+        """
+        positions = [(name, fen) for (name, fen, _) in REFERENCE_POSITIONS] + [
+            ('en passant', 'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3'),
+            ('promotions', '1r2k3/2P5/8/8/8/8/5p2/4K1N1 b - - 0 1'),
+        ]
+        for (name, fen) in positions:
+            board = Board.from_fen(fen)
+            all_moves = [piece.all_moves for piece in board._active_pieces(board.colour_to_move)]
+            encoded = sorted(board.get_encoded_moves())
+            # The codes come from the bitboards, not from the pieces' move lists
+            self.assertEqual([piece.all_moves for piece in board._active_pieces(board.colour_to_move)],
+                             all_moves, name)
+            expected = sorted(encode_move_tuple(move) for move in board.get_pseudo_legal_moves())
+            self.assertEqual(encoded, expected, name)
+
+    def test_make_encoded_move(self):
+        """
+        Test playing an encoded move and taking it back
+        """
+        board = Board.from_fen(REFERENCE_POSITIONS[0][1])
+        key = board.zobrist_key
+        board.make_encoded_move(encode_move(12, 28, DOUBLE_PUSH))
+        self.assertEqual(board.get_piece_from_position((4, 3)).get_piece_type(), 'pawn')
+        self.assertEqual(board.en_passant_square, (4, 2))
+        board.unmake_move()
+        self.assertEqual(board.zobrist_key, key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+""" This module runs tests for ordering moves in the search """
+
+import unittest
+from src.board import Board
+from src.move import encode_move_tuple
+from src.ordering import (MoveOrderer, mvv_lva, HASH_STAGE, CAPTURE_STAGE, KILLER_STAGE,
+                          QUIET_STAGE)
+from src.perft import move_name
+from src.san import parse_san
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+
+class TestOrdering(unittest.TestCase):
+    """
+    Run tests for the staged move ordering.
+    """
+
+    def test_all_moves(self):
+        """
+        Ensure every legal move is yielded once, captures first by MVV-LVA
+        """
+        board = Board.from_fen(KIWIPETE)
+        orderer = MoveOrderer()
+        moves = list(orderer.order_moves(board, 0))
+        self.assertEqual(sorted(move_name(move) for move in moves),
+                         sorted(move_name(move) for move in board.get_legal_moves()))
+
+        captures = [move for move in moves if move[3] == 'C']
+        self.assertEqual(moves[:len(captures)], captures)
+        scores = [mvv_lva(board, move) for move in captures]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        # Queen takes knight before pawn takes pawn, before knight takes pawn
+        names = [move_name(move) for move in captures]
+        self.assertLess(names.index('f3f6'), names.index('g2h3'))
+        self.assertLess(names.index('g2h3'), names.index('e5g6'))
+
+    def test_hash_move(self):
+        """
+        Ensure a legal hash move comes first and is not repeated, and others are ignored
+        """
+        board = Board.from_fen(KIWIPETE)
+        orderer = MoveOrderer()
+        hash_move = encode_move_tuple(parse_san(board, 'O-O'))
+        moves = orderer.order_moves(board, 0, hash_move)
+        self.assertEqual(move_name(next(moves)), 'e1g1')
+        self.assertEqual(orderer.stage, HASH_STAGE)
+        rest = [move_name(move) for move in moves]
+        self.assertNotIn('e1g1', rest)
+        self.assertEqual(len(rest), 47)
+
+        # A move from a black piece's square is not legal for white
+        illegal_move = encode_move_tuple(parse_san(Board.from_fen(KIWIPETE.replace(' w ', ' b ')), 'Qc5'))
+        self.assertIsNone(orderer.get_hash_move(board, illegal_move))
+        first = next(orderer.order_moves(board, 0, illegal_move))
+        self.assertEqual(orderer.stage, CAPTURE_STAGE)
+        self.assertEqual(first[3], 'C')
+
+    def test_killers_and_history(self):
+        """
+        Ensure killer moves come right after the captures, then quiets by history
+        """
+        board = Board.from_fen(KIWIPETE)
+        orderer = MoveOrderer()
+        killer = encode_move_tuple(parse_san(board, 'a3'))
+        orderer.add_killer(3, killer)
+        orderer.add_history('W', encode_move_tuple(parse_san(board, 'Rb1')), 4)
+
+        stages = []
+        names = []
+        for move in orderer.order_moves(board, 3):
+            stages.append(orderer.stage)
+            names.append(move_name(move))
+        first_quiet = stages.index(KILLER_STAGE)
+        self.assertEqual(names[first_quiet], 'a2a3')
+        self.assertEqual(stages[first_quiet + 1], QUIET_STAGE)
+        self.assertEqual(names[first_quiet + 1], 'a1b1')
+        self.assertEqual(stages, sorted(stages))
+
+        # A killer that cuts off is yielded before any quiet move is generated
+        orderer.add_killer(5, killer)
+        calls = []
+        get_legal_quiet_moves = board.get_legal_quiet_moves
+        board.get_legal_quiet_moves = lambda promotions_only=False: (
+            calls.append(promotions_only) or get_legal_quiet_moves(promotions_only))
+        for move in orderer.order_moves(board, 5):
+            if orderer.stage == KILLER_STAGE:
+                break
+        self.assertEqual(move_name(move), 'a2a3')
+        self.assertEqual(calls, [True])
+        del board.get_legal_quiet_moves
+
+        # Killers that are not legal quiet moves here are skipped
+        orderer.add_killer(6, encode_move_tuple(parse_san(board, 'Qxf6')))
+        orderer.add_killer(6, encode_move_tuple(parse_san(board, 'Bxa6')) ^ 0x3F)
+        stages = [orderer.stage for _ in orderer.order_moves(board, 6)]
+        self.assertNotIn(KILLER_STAGE, stages)
+        self.assertEqual(len(stages), 48)
+
+        # The killer only applies at its own ply
+        names = [move_name(move) for move in orderer.order_moves(board, 4)]
+        self.assertEqual(names[first_quiet], 'a1b1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
 """ This module runs tests for the Pawn class """
 
 import unittest
-from src.pawn import Pawn
+from src.pawn import Pawn, get_pawn_move_sets
 from src.board import Board
+from src.perft import REFERENCE_POSITIONS
 
 
 class TestPawn(unittest.TestCase):
@@ -174,16 +175,42 @@ class TestPawn(unittest.TestCase):
         self.assertIn(((5, 2), "E"), third_black_pawn_all_moves)
 
 
-
-
-
-
-
-
-
-
-
+    def test_move_sets(self):
+        """
+        Ensure captures by shifting do not wrap round the edge of the board
+        """
+        # White pawns on A2 and H2, black pieces on B3 and G3, and on A4 where H2 would
+        # land if its capture wrapped round
+        pawns = (1 << 8) | (1 << 15)
+        enemy = (1 << 17) | (1 << 22) | (1 << 24)
+        move_sets = get_pawn_move_sets('W', pawns, pawns | enemy, enemy)
+        captures = [targets for (_, move_type, targets) in move_sets if move_type == 'C']
+        self.assertEqual(captures[0] | captures[1], (1 << 17) | (1 << 22))
+        self.assertEqual(get_pawn_move_sets('W', pawns, pawns | enemy, enemy, captures_only=True)[2:], [])
+
+        # Black pawns on A7 and H7, both blocked, with a white piece on B6 and on H5 where
+        # A7 would land if its capture wrapped round
+        pawns = (1 << 48) | (1 << 55)
+        enemy = (1 << 47) | (1 << 40) | (1 << 41) | (1 << 39)
+        move_sets = get_pawn_move_sets('B', pawns, pawns | enemy, enemy)
+        self.assertEqual(move_sets[0][2] | move_sets[1][2], 1 << 41)
+        self.assertEqual(move_sets[2], (-8, 'N', 0))
+        self.assertEqual(move_sets[3], (-16, 'N', 0))
+
+    def test_update_pawn_moves(self):
+        """
+        Ensure splitting the moves of all pawns gives each pawn the moves it finds on its own
+        """
+        for (_, fen, _) in REFERENCE_POSITIONS:
+            board = Board.from_fen(fen)
+            for colour in ('W', 'B'):
+                pawns = board.update_pawn_moves(colour)
+                together = [(pawn, sorted(pawn.all_moves), sorted(pawn.squares_defended)) for pawn in pawns]
+                for (pawn, all_moves, squares_defended) in together:
+                    pawn.update_all_moves(board)
+                    self.assertEqual(sorted(pawn.all_moves), all_moves, fen)
+                    self.assertEqual(sorted(pawn.squares_defended), squares_defended, fen)
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
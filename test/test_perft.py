@@ -0,0 +1,168 @@
+""" This module runs the perft regression suite against the reference positions """
+
+import io
+import unittest
+from src.board import Board
+from src.perft import (REFERENCE_POSITIONS, perft, perft_counts, perft_divide, run_suite,
+                       get_legal_moves, filter_legal_moves, move_name, split_positions,
+                       parallel_perft_counts)
+
+# Reference positions by name, as (fen, node counts by depth)
+POSITIONS = {name: (fen, counts) for (name, fen, counts) in REFERENCE_POSITIONS}
+
+
+class TestPerft(unittest.TestCase):
+    """
+    Run perft on the standard positions. Any change to the move generator has to keep
+    these counts exact.
+    """
+
+    def check_counts(self, name, max_depth):
+        """
+        Compare the node counts of one reference position up to max_depth
+        """
+        fen, expected_counts = POSITIONS[name]
+        board = Board.from_fen(fen)
+        for depth in range(1, max_depth + 1):
+            with self.subTest(position=name, depth=depth):
+                self.assertEqual(perft(board, depth), expected_counts[depth])
+
+    def test_reference_positions(self):
+        """
+        Ensure the node counts match the known values at shallow depths
+        """
+        self.check_counts('startpos', 3)
+        self.check_counts('kiwipete', 2)
+        self.check_counts('position3', 3)
+        self.check_counts('position4', 2)
+        self.check_counts('position5', 2)
+        self.check_counts('position6', 2)
+
+    def test_counts_by_move_kind(self):
+        """
+        Ensure captures, en-passant, castles, promotions and checks are counted correctly
+        """
+        counts = perft_counts(Board.from_fen(POSITIONS['startpos'][0]), 3)
+        self.assertEqual(counts, {'nodes': 8902, 'captures': 34, 'en_passant': 0,
+                                  'castles': 0, 'promotions': 0, 'checks': 12})
+
+        counts = perft_counts(Board.from_fen(POSITIONS['kiwipete'][0]), 2)
+        self.assertEqual(counts, {'nodes': 2039, 'captures': 351, 'en_passant': 1,
+                                  'castles': 91, 'promotions': 0, 'checks': 3})
+
+        counts = perft_counts(Board.from_fen(POSITIONS['position3'][0]), 3)
+        self.assertEqual(counts, {'nodes': 2812, 'captures': 209, 'en_passant': 2,
+                                  'castles': 0, 'promotions': 0, 'checks': 267})
+
+        counts = perft_counts(Board.from_fen(POSITIONS['position4'][0]), 2)
+        self.assertEqual(counts, {'nodes': 264, 'captures': 87, 'en_passant': 0,
+                                  'castles': 6, 'promotions': 48, 'checks': 10})
+
+    def check_legal_moves(self, board, depth):
+        """
+        Walk the move tree, comparing the legal move generator against making every
+        pseudo-legal move and testing for check. The captures-only and quiets-only
+        generators must give exactly the captures and the other moves among them
+        """
+        moves = get_legal_moves(board)
+        self.assertEqual(sorted(map(move_name, moves)),
+                         sorted(map(move_name, filter_legal_moves(board))))
+        self.assertEqual(sorted(move_name(move) for move in moves if move[3] in 'CE'),
+                         sorted(map(move_name, board.get_legal_captures())))
+        quiets = sorted(move_name(move) for move in moves if move[3] not in 'CE')
+        self.assertEqual(quiets, sorted(map(move_name, board.get_legal_quiet_moves())))
+        self.assertEqual([name for name in quiets if len(name) == 5],
+                         sorted(map(move_name, board.get_legal_quiet_moves(promotions_only=True))))
+        if depth > 1:
+            for move in moves:
+                board.make_move(move)
+                self.check_legal_moves(board, depth - 1)
+                board.unmake_move()
+
+    def test_legal_move_generator(self):
+        """
+        Ensure the legal move generator agrees with make-and-test on pins, checks
+        and en-passant corner cases
+        """
+        fens = [fen for (fen, _) in POSITIONS.values()] + [
+            # En-passant would expose the king along the rank
+            '8/8/8/KPp4r/8/8/8/7k w - c6 0 1',
+            # En-passant captures the pawn giving check
+            '8/8/8/2k5/3Pp3/8/8/4K3 b - d3 0 1',
+            # Double check: only king moves
+            '4r1k1/8/8/8/1b6/8/3N4/4K3 w - - 0 1',
+        ]
+        for fen in fens:
+            with self.subTest(fen=fen):
+                self.check_legal_moves(Board.from_fen(fen), 2)
+
+        moves = {move_name(move) for move in get_legal_moves(Board.from_fen(fens[-3]))}
+        self.assertNotIn('b5c6', moves)
+        moves = {move_name(move) for move in get_legal_moves(Board.from_fen(fens[-2]))}
+        self.assertIn('e4d3', moves)
+
+    def test_board_is_restored(self):
+        """
+        Ensure perft leaves the board as it found it
+        """
+        board = Board.from_fen(POSITIONS['kiwipete'][0])
+        squares = [row[:] for row in board.board]
+        occupied = board.occupied
+        perft(board, 2)
+        self.assertEqual(squares, board.board)
+        self.assertEqual(occupied, board.occupied)
+        self.assertEqual(board.get_move_history(), [])
+
+    def test_divide(self):
+        """
+        Ensure perft_divide splits the count by root move
+        """
+        counts = perft_divide(Board.from_fen(POSITIONS['startpos'][0]), 2)
+        self.assertEqual(len(counts), 20)
+        self.assertEqual(sum(counts.values()), 400)
+        self.assertEqual(counts['e2e4'], 20)
+        self.assertEqual(counts['g1f3'], 20)
+
+    def test_split_positions(self):
+        """
+        Ensure splitting the tree keeps every path, with transpositions given once
+        """
+        board = Board.from_fen(POSITIONS['startpos'][0])
+        subtrees = split_positions(board, 2)
+        self.assertEqual(len(subtrees), 20)
+        self.assertEqual(sum(sum(positions.values()) for positions in subtrees.values()), 400)
+        self.assertEqual(board.get_move_history(), [])
+        self.assertEqual(len(subtrees['e2e4']), 20)
+
+        # 1. e3 e6 2. d3 and 1. d3 e6 2. e3 reach the same position, and it is only counted once
+        subtrees = split_positions(board, 3)
+        distinct = set().union(*subtrees.values())
+        self.assertEqual(sum(sum(positions.values()) for positions in subtrees.values()), 8902)
+        self.assertLess(len(distinct), 8902)
+
+    def test_parallel_counts(self):
+        """
+        Ensure the counts merged from worker processes match counting in one process
+        """
+        fen = POSITIONS['kiwipete'][0]
+        counts = parallel_perft_counts(fen, 3, workers=2)
+        divide = counts.pop('divide')
+        self.assertEqual(counts, perft_counts(Board.from_fen(fen), 3))
+        self.assertEqual(divide, perft_divide(Board.from_fen(fen), 3))
+
+        # Positions where the split reaches a checkmate or the last ply
+        fen = POSITIONS['position4'][0]
+        self.assertEqual(parallel_perft_counts(fen, 2, workers=2, split_depth=3)['nodes'], 264)
+        self.assertEqual(parallel_perft_counts(fen, 1, workers=2)['nodes'], 6)
+
+    def test_suite_report(self):
+        """
+        Ensure the suite runner reports success on correct counts
+        """
+        output = io.StringIO()
+        self.assertTrue(run_suite(1, output))
+        self.assertIn('nps', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+""" This module runs tests for reading and writing PGN games """
+
+import os
+import tempfile
+import unittest
+from src.board import Board
+from src.pgn import read_games, iter_games, game_to_pgn
+from src.san import parse_san
+
+GAMES = '''[Event "Casual"]
+[Site "?"]
+[White "Morphy, Paul"]
+[Black "Duke Karl / Count Isouard"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 d6 3. d4 Bg4 {This is a weak move
+already. [Not a tag]} 4. dxe5 Bxf3 5. Qxf3 dxe5 6. Bc4 Nf6 7. Qb3 $1 Qe7
+8. Nc3 (8. Qxb7 Qb4+ 9. Qxb4 Bxb4+) c6 9. Bg5 b5 10. Nxb5 cxb5 11. Bxb5+ Nbd7
+12. O-O-O Rd8 13. Rxd7 Rxd7 14. Rd1 Qe6 15. Bxd7+ Nxd7 16. Qb8+ Nxb8 17. Rd8# 1-0
+
+[Event "Short"]
+[Result "*"]
+
+1. d4 d5 ; a rest of line comment
+2. c4 *
+'''
+
+OPERA_FEN = '1n1Rkb1r/p4ppp/4q3/4p1B1/4P3/8/PPP2PPP/2K5 b k - 1 17'
+
+
+class TestPgn(unittest.TestCase):
+    """
+    Run tests reading, replaying and writing games.
+    """
+
+    def test_read_games(self):
+        """
+        Ensure tags, moves and results are read, skipping comments, variations and NAGs
+        """
+        games = read_games(GAMES)
+        self.assertEqual(len(games), 2)
+        opera, short = games
+        self.assertEqual(opera.tags['White'], 'Morphy, Paul')
+        self.assertEqual(opera.tags['Black'], 'Duke Karl / Count Isouard')
+        self.assertEqual(opera.get_result(), '1-0')
+        moves = opera.get_moves()
+        self.assertEqual(len(moves), 33)
+        self.assertEqual(moves[:6], ['e4', 'e5', 'Nf3', 'd6', 'd4', 'Bg4'])
+        self.assertEqual(moves[14], 'Nc3')
+        self.assertEqual(moves[-1], 'Rd8#')
+        self.assertEqual(short.get_moves(), ['d4', 'd5', 'c4'])
+        self.assertEqual(short.get_result(), '*')
+
+    def test_replay(self):
+        """
+        Ensure a game replays to its final position, keeping SAN markers in the history
+        """
+        board = read_games(GAMES)[0].replay()
+        self.assertEqual(board.to_fen(), OPERA_FEN)
+        self.assertEqual(len(board.move_history), 33)
+        # 11... Nbd7: the other knight on f6 can also reach d7
+        self.assertEqual(board.move_history[21][4], 'b')
+
+        with self.assertRaises(ValueError):
+            read_games('1. e4 e5 2. Ke3 *')[0].replay()
+
+    def test_round_trip(self):
+        """
+        Ensure a written game reads back to the same moves and position
+        """
+        board = read_games(GAMES)[0].replay()
+        text = game_to_pgn(board, {'White': 'Morphy, Paul', 'Result': '1-0'})
+        self.assertEqual(board.to_fen(), OPERA_FEN)
+        self.assertTrue(text.startswith('[Event "?"]\n'))
+        self.assertIn('11. Bxb5+ Nbd7', text)
+        self.assertIn('17. Rd8# 1-0', text)
+        self.assertTrue(all(len(line) <= 80 for line in text.splitlines()))
+
+        game = read_games(text)[0]
+        self.assertEqual(game.get_moves(), read_games(GAMES)[0].get_moves())
+        self.assertEqual(game.replay().to_fen(), OPERA_FEN)
+
+        # A game from a set position carries it in a FEN tag
+        fen = 'k7/8/8/8/8/8/8/K1N1N3 b - - 0 1'
+        board = Board.from_fen(fen)
+        board.make_move(parse_san(board, 'Ka7'))
+        board.make_move(parse_san(board, 'Ncd3'))
+        text = game_to_pgn(board)
+        self.assertIn(f'[FEN "{fen}"]', text)
+        self.assertIn('1... Ka7 2. Ncd3 *', text)
+        self.assertEqual(read_games(text)[0].replay().to_fen(), board.to_fen())
+
+    def test_promoted_piece_round_trip(self):
+        """
+        Ensure a game where a promoted piece moves on is written and read back, with the
+        promoted piece counted for disambiguation, and the board and its move history
+        are left as they were
+        """
+        fen = '7k/P7/8/8/5N2/8/8/K7 w - - 0 1'
+        board = Board.from_fen(fen)
+        for san in ('a8=N', 'Kh7', 'Nb6', 'Kh8', 'Nbd5', 'Kh7'):
+            board.make_move(parse_san(board, san))
+        end_fen = board.to_fen()
+        history = board.get_move_history()
+        text = game_to_pgn(board)
+        self.assertIn('1. a8=N Kh7 2. Nb6 Kh8 3. Nbd5 Kh7 *', text)
+        self.assertEqual(board.to_fen(), end_fen)
+        # The recorded moves themselves are made again, markers and all
+        self.assertEqual(len(board.move_history), len(history))
+        for (move, recorded) in zip(board.move_history, history):
+            self.assertIs(move, recorded)
+        self.assertEqual(read_games(text)[0].replay().to_fen(), end_fen)
+
+        while board.undo_stack:
+            board.unmake_move()
+        self.assertEqual(board.to_fen(), fen)
+        self.assertEqual(len(board.active_white_pieces), 3)
+
+    def test_iter_games(self):
+        """
+        Ensure games are streamed from a file the same way with or without mmap
+        """
+        handle, path = tempfile.mkstemp(suffix='.pgn')
+        try:
+            with os.fdopen(handle, 'w') as file:
+                file.write(GAMES)
+            for use_mmap in (True, False):
+                games = list(iter_games(path, use_mmap=use_mmap))
+                self.assertEqual([game.get_moves() for game in games],
+                                 [game.get_moves() for game in read_games(GAMES)])
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
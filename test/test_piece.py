@@ -0,0 +1,48 @@
+""" This module runs tests for the BasicPiece class """
+
+import unittest
+from src.piece import BasicPiece
+from src.knight import Knight
+from src.queen import Queen
+
+
+class TestBasicPiece(unittest.TestCase):
+    """
+    Run tests for the BasicPiece class.
+    """
+
+    def test_equality_and_hash(self):
+        """
+        Ensure equal pieces hash equally, so pieces can be used in sets and as dict keys
+        """
+        piece_1 = Knight('W', (1, 0)) # A knight starting on B1
+        piece_2 = Knight('W', (1, 0))
+        piece_3 = Knight('B', (1, 0))
+        piece_4 = BasicPiece('W', 'bishop', (1, 0))
+
+        self.assertEqual(piece_1, piece_2)
+        self.assertEqual(hash(piece_1), hash(piece_2))
+        self.assertNotEqual(piece_1, piece_3)
+        self.assertNotEqual(piece_1, piece_4)
+        self.assertEqual(len({piece_1, piece_2, piece_3, piece_4}), 3)
+
+        # Equality and hash follow the starting square, not the current position
+        piece_1.move_piece((2, 2))
+        self.assertEqual(piece_1, piece_2)
+        self.assertEqual(hash(piece_1), hash(piece_2))
+
+    def test_compact_representation(self):
+        """
+        Ensure pieces keep no per-instance dict and keep their getters
+        """
+        queen = Queen('B', (3, 7)) # A black queen on D8
+        self.assertFalse(hasattr(queen, '__dict__'))
+        self.assertEqual(queen.get_colour(), 'B')
+        self.assertEqual(queen.get_piece_type(), 'queen')
+        self.assertEqual(queen.get_starting_square(), (3, 7))
+        with self.assertRaises(AttributeError):
+            queen.some_new_field = 1
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -138,12 +138,12 @@ class TestQueen(unittest.TestCase):
         pawn_1 = board.add_piece(Pawn('W', (1, 1))) # A white pawn on B2
         pawn_2 = board.add_piece(Pawn('W', (6, 1))) # A white pawn on G2
         pawn_3 = board.add_piece(Pawn('W', (6, 6))) # A white pawn on G7
-        pawn_4 = board.add_piece(Pawn('B', (6, 1))) # A black pawn on D5
+        pawn_4 = board.add_piece(Pawn('B', (3, 4))) # A black pawn on D5
 
         queen.update_all_moves(board)
         all_moves = queen.all_moves
 
-        self.assertTrue(len(all_moves) == 5)
+        self.assertTrue(len(all_moves) == 16)
         self.assertIn(((0, 7), "N"), all_moves)
         self.assertIn(((2, 5), "N"), all_moves)
 
@@ -180,7 +180,7 @@ class TestQueen(unittest.TestCase):
         queen.update_all_moves(board)
         squares_defended = queen.squares_defended
 
-        self.assertTrue(len(squares_defended) == 5)
+        self.assertTrue(len(squares_defended) == 20)
         self.assertIn(((1, 1)), squares_defended)
         self.assertIn(((3, 3)), squares_defended)
         self.assertIn(((4, 4)), squares_defended)
@@ -221,6 +221,7 @@ class TestQueen(unittest.TestCase):
         king = board.add_piece(BasicPiece('W', 'king', (6, 2))) # A white king on G3
 
         queen.update_all_moves(board)
+        board.update_pins_and_checks('W')
         all_moves = queen.all_moves
 
         self.assertTrue(len(all_moves) == 15)
@@ -158,6 +158,7 @@ class TestRook(unittest.TestCase):
         king = board.add_piece(BasicPiece('W', 'king', (6, 2))) # A white king on G3
 
         rook.update_all_moves(board)
+        board.update_pins_and_checks('W')
         all_moves = rook.all_moves
 
         self.assertTrue(len(all_moves) == 10)
@@ -0,0 +1,67 @@
+""" This module runs tests for reading Standard Algebraic Notation """
+
+import unittest
+from src.board import Board
+from src.perft import move_name
+from src.san import parse_san, move_to_san
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+
+class TestSan(unittest.TestCase):
+    """
+    Run tests matching SAN strings to legal moves.
+    """
+
+    def test_parse_san(self):
+        """
+        Ensure pieces, pawns, castles and disambiguation are matched
+        """
+        board = Board.from_fen(KIWIPETE)
+        self.assertEqual(move_name(parse_san(board, 'O-O')), 'e1g1')
+        self.assertEqual(move_name(parse_san(board, 'O-O-O')), 'e1c1')
+        self.assertEqual(move_name(parse_san(board, 'Qxf6')), 'f3f6')
+        self.assertEqual(move_name(parse_san(board, 'dxe6')), 'd5e6')
+        self.assertEqual(move_name(parse_san(board, 'Nxf7+')), 'e5f7')
+        self.assertEqual(move_name(parse_san(board, 'a4!?')), 'a2a4')
+        with self.assertRaises(ValueError):
+            parse_san(board, 'Ke3')
+
+        # Both knights can reach D3
+        board = Board.from_fen('k7/8/8/8/8/8/8/K1N1N3 w - - 0 1')
+        self.assertEqual(move_name(parse_san(board, 'Ncd3')), 'c1d3')
+        self.assertEqual(move_name(parse_san(board, 'Ned3')), 'e1d3')
+        with self.assertRaises(ValueError):
+            parse_san(board, 'Nd3')
+
+    def test_promotions(self):
+        """
+        Ensure promotions are matched with or without the '='
+        """
+        board = Board.from_fen('rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8')
+        self.assertEqual(move_name(parse_san(board, 'dxc8=N')), 'd7c8n')
+        self.assertEqual(move_name(parse_san(board, 'dxc8Q')), 'd7c8q')
+        with self.assertRaises(ValueError):
+            parse_san(board, 'dxc8')
+
+    def test_move_to_san(self):
+        """
+        Ensure moves are written with disambiguation, captures and check marks
+        """
+        board = Board.from_fen(KIWIPETE)
+        for san in ('O-O', 'O-O-O', 'Qxf6', 'dxe6', 'Nxf7', 'a4', 'Bxa6', 'Nc4'):
+            self.assertEqual(move_to_san(board, parse_san(board, san)), san)
+        board = Board.from_fen('k7/8/8/8/8/8/8/K1N1N3 w - - 0 1')
+        move = parse_san(board, 'Ned3')
+        self.assertEqual(move[4], 'e')
+        self.assertEqual(move_to_san(board, move[:4] + (None, None)), 'Ned3')
+        board = Board.from_fen('k7/8/1K6/8/8/8/8/7R w - - 0 1')
+        self.assertEqual(move_to_san(board, parse_san(board, 'Rh8')), 'Rh8#')
+        self.assertEqual(move_to_san(board, parse_san(board, 'Rh7')), 'Rh7')
+        self.assertEqual(move_to_san(board, parse_san(board, 'Rh7'), suffix=False), 'Rh7')
+        board = Board.from_fen('k7/8/8/8/8/8/8/K6R w - - 0 1')
+        self.assertEqual(move_to_san(board, parse_san(board, 'Rh8')), 'Rh8+')
+
+
+if __name__ == '__main__':
+    unittest.main()
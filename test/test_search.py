@@ -0,0 +1,128 @@
+""" This module runs tests for the alpha-beta search """
+
+import io
+import threading
+import unittest
+from src.board import Board
+from src.perft import move_name
+from src.search import Search, MATE_SCORE, score_to_table, score_from_table, format_score
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+
+class TestSearch(unittest.TestCase):
+    """
+    Run tests searching small positions.
+    """
+
+    def test_mates(self):
+        """
+        Ensure forced mates are found and scored by their distance
+        """
+        board = Board.from_fen('6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1')
+        result = Search(board).search(4)
+        self.assertEqual(move_name(result['best_move']), 'd1d8')
+        self.assertEqual(result['score'], MATE_SCORE - 1)
+        self.assertEqual(result['depth'], 1)
+
+        # Mate in two moves, three plies
+        board = Board.from_fen('k7/8/1K6/8/8/8/8/1Q6 w - - 0 1')
+        result = Search(board).search(5)
+        self.assertEqual(result['score'], MATE_SCORE - 3)
+
+        # No legal moves
+        board = Board.from_fen('k7/1Q6/1K6/8/8/8/8/8 b - - 0 1')
+        result = Search(board).search(3)
+        self.assertIsNone(result['best_move'])
+
+    def test_budget(self):
+        """
+        Ensure the node budget stops the search and the board is restored
+        """
+        board = Board.from_fen(KIWIPETE)
+        result = Search(board).search(10, max_nodes=3000)
+        self.assertLess(result['depth'], 10)
+        self.assertLess(result['nodes'], 3000 + 1024)
+        self.assertEqual(board.to_fen(), KIWIPETE)
+        self.assertEqual(len(board.undo_stack), 0)
+        self.assertEqual(board.zobrist_key, board.compute_zobrist_key())
+
+    def test_stop_event(self):
+        """
+        Ensure a set stop event stops the search, and the first iteration can be skipped
+        """
+        board = Board.from_fen(KIWIPETE)
+        stop_event = threading.Event()
+        stop_event.set()
+        result = Search(board, stop_event=stop_event).search(10)
+        self.assertEqual(result['depth'], 0)
+        self.assertLessEqual(result['nodes'], 1024)
+        self.assertEqual(board.to_fen(), KIWIPETE)
+        # A move is still given, the first the search would have tried
+        legal_moves = [move_name(move) for move in board.get_legal_moves()]
+        self.assertIn(move_name(result['best_move']), legal_moves)
+        result = Search(board).search(10, max_nodes=1)
+        self.assertEqual(result['depth'], 0)
+        self.assertIn(move_name(result['best_move']), legal_moves)
+
+        # Without legal moves there is still none
+        board = Board.from_fen('k7/1Q6/1K6/8/8/8/8/8 b - - 0 1')
+        self.assertIsNone(Search(board, stop_event=stop_event).search(3)['best_move'])
+        board = Board.from_fen(KIWIPETE)
+
+        result = Search(board).search(3, min_depth=2)
+        self.assertEqual([iteration['depth'] for iteration in result['iterations']], [2, 3])
+
+    def test_report(self):
+        """
+        Ensure each iteration is reported with a legal principal variation
+        """
+        board = Board.from_fen(KIWIPETE)
+        output = io.StringIO()
+        result = Search(board).search(3, output=output)
+        self.assertEqual([iteration['depth'] for iteration in result['iterations']], [1, 2, 3])
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[2].startswith('info depth 3 score cp '))
+        self.assertIn(' nps ', lines[2])
+
+        # Every PV move is legal where it is played. Captures from the quiescence
+        # search may follow the three plies
+        self.assertGreaterEqual(len(result['pv']), 3)
+        for move in result['pv']:
+            names = [move_name(legal_move) for legal_move in board.get_legal_moves()]
+            self.assertIn(move_name(move), names)
+            board.make_move(move)
+
+    def test_quiescence(self):
+        """
+        Ensure captures at the horizon are played out before scoring
+        """
+        # The pawn is defended by the rook, so taking it loses the queen
+        board = Board.from_fen('3rk3/8/8/3p4/8/8/8/3QK3 w - - 0 1')
+        result = Search(board).search(1)
+        self.assertNotEqual(move_name(result['best_move']), 'd1d5')
+        self.assertGreater(result['score'], 0)
+
+        # Undefended, it is won
+        board = Board.from_fen('4k3/8/8/3p4/8/8/8/3QK3 w - - 0 1')
+        result = Search(board).search(1)
+        self.assertEqual(move_name(result['best_move']), 'd1d5')
+
+        # Standing pat: the side to move need not capture
+        search = Search(Board.from_fen(KIWIPETE))
+        self.assertGreaterEqual(search.quiescence(-1000, 1000, 0), 0)
+
+    def test_scores(self):
+        """
+        Ensure mate scores are converted and written correctly
+        """
+        for score in (MATE_SCORE - 5, -MATE_SCORE + 8, 42):
+            self.assertEqual(score_from_table(score_to_table(score, 7), 7), score)
+        self.assertEqual(format_score(MATE_SCORE - 3), 'mate 2')
+        self.assertEqual(format_score(-MATE_SCORE + 4), 'mate -2')
+        self.assertEqual(format_score(-35), 'cp -35')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+""" This module runs tests for static exchange evaluation """
+
+import unittest
+from src.board import Board
+from src.san import parse_san
+from src.see import see
+
+
+class TestSee(unittest.TestCase):
+    """
+    Run tests evaluating exchanges.
+    """
+
+    def test_see(self):
+        """
+        Ensure exchanges are scored with least valuable attackers and x-rays
+        """
+        cases = [
+            # Undefended pawn
+            ('1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1', 'Rxe5', 100),
+            # Knight for pawn, even with the rook and queen lined up behind
+            ('1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1', 'Nxe5', -220),
+            # Queen takes a pawn defended by a rook
+            ('3rk3/8/8/3p4/8/8/8/3QK3 w - - 0 1', 'Qxd5', -800),
+            # Pawn takes pawn, the knight recaptures and the rook takes back
+            ('4k3/8/2n5/3p4/4P3/8/8/3RK3 w - - 0 1', 'exd5', 100),
+            # The king can only recapture an undefended piece
+            ('8/8/4k3/3p4/8/8/8/3RK3 w - - 0 1', 'Rxd5', -400),
+            ('8/8/4k3/3p4/8/1B6/8/3RK3 w - - 0 1', 'Rxd5', 100),
+            # En-passant
+            ('4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1', 'exd6', 100),
+        ]
+        for (fen, san, expected) in cases:
+            with self.subTest(fen=fen, san=san):
+                board = Board.from_fen(fen)
+                self.assertEqual(see(board, parse_san(board, san)), expected)
+                self.assertEqual(board.to_fen(), fen)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+""" This module runs tests for the parallel (Lazy SMP) search """
+
+import io
+import multiprocessing
+import unittest
+from src.board import Board
+from src.perft import move_name
+from src.search import Search, MATE_SCORE
+from src.smp import parallel_search, run_parallel_search
+from src.transposition import SharedTranspositionTable
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+
+class TestSMP(unittest.TestCase):
+    """
+    Run tests searching with helper processes.
+    """
+
+    def test_parallel_search(self):
+        """
+        Ensure the helpers report back, are stopped, and the main search still finds the move
+        """
+        result = parallel_search('6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1', 3, workers=3)
+        self.assertEqual(move_name(result['best_move']), 'd1d8')
+        self.assertEqual(result['score'], MATE_SCORE - 1)
+        self.assertEqual(result['workers'], 3)
+        self.assertEqual(len(result['helper_nodes']), 2)
+        self.assertEqual(result['total_nodes'], result['nodes'] + sum(result['helper_nodes']))
+        self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_shared_table(self):
+        """
+        Ensure the main search finds the helpers' results in a table kept between searches
+        """
+        table = SharedTranspositionTable(1)
+        self.addCleanup(table.close)
+        result = parallel_search(KIWIPETE, 3, workers=2, table=table)
+        self.assertEqual(result['depth'], 3)
+        self.assertGreater(table.get_stats()['stores'], 0)
+        self.assertIsNotNone(table.probe(Board.from_fen(KIWIPETE).zobrist_key))
+
+        # With one worker the search is the same as Search with the shared table
+        table = SharedTranspositionTable(1)
+        self.addCleanup(table.close)
+        single = parallel_search(KIWIPETE, 3, workers=1, table=table)
+        expected = Search(Board.from_fen(KIWIPETE)).search(3)
+        self.assertEqual(single['helper_nodes'], [])
+        self.assertEqual(move_name(single['best_move']), move_name(expected['best_move']))
+        self.assertEqual(single['nodes'], expected['nodes'])
+
+    def test_report(self):
+        """
+        Ensure the runner reports the nodes of every process and the best move
+        """
+        output = io.StringIO()
+        run_parallel_search(KIWIPETE, 2, workers=2, output=output)
+        self.assertIn('info string workers 2 nodes', output.getvalue())
+        self.assertIn('bestmove', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
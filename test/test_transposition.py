@@ -0,0 +1,149 @@
+""" This module runs tests for the TranspositionTable and SharedTranspositionTable classes """
+
+import multiprocessing
+import unittest
+from src.transposition import (TranspositionTable, SharedTranspositionTable, EXACT, LOWER_BOUND,
+                               UPPER_BOUND, pack_entry, unpack_entry)
+
+
+def store_in_shared_table(name, size_mb, key):
+    """
+    Stores an entry from another process
+    """
+    table = SharedTranspositionTable(size_mb, name=name)
+    table.store(key, 7, 123, LOWER_BOUND, 456)
+    table.close()
+
+
+class TestTranspositionTable(unittest.TestCase):
+    """
+    Run tests for the TranspositionTable class.
+    """
+
+    def make_table(self, size_mb):
+        """
+        Makes the kind of table under test
+        """
+        return TranspositionTable(size_mb)
+
+    def test_sizing(self):
+        """
+        Ensure the table is preallocated to a power of two buckets within the size limit
+        """
+        table = self.make_table(1)
+        self.assertEqual(table.num_buckets, 32768)
+        self.assertEqual(table.get_size_bytes(), 1024 * 1024)
+
+        table = self.make_table(3)
+        self.assertLessEqual(table.get_size_bytes(), 3 * 1024 * 1024)
+        self.assertEqual(table.num_buckets & (table.num_buckets - 1), 0)
+
+    def test_packing(self):
+        """
+        Ensure entries survive packing, including negative scores
+        """
+        for entry in [(0, 0, EXACT, 0), (12, -31999, LOWER_BOUND, 0xFFFF), (255, 123456, UPPER_BOUND, 4242)]:
+            with self.subTest(entry=entry):
+                self.assertEqual(unpack_entry(pack_entry(*entry)), entry)
+
+    def test_store_and_probe(self):
+        """
+        Ensure stored results are found again and the counters are kept
+        """
+        table = self.make_table(1)
+        key = 0x1234_5678_9ABC_DEF0
+        self.assertIsNone(table.probe(key))
+
+        table.store(key, 5, -40, UPPER_BOUND, 77)
+        self.assertEqual(table.probe(key), (5, -40, UPPER_BOUND, 77))
+
+        # Storing again without a best move keeps the old one
+        table.store(key, 6, 15, EXACT)
+        self.assertEqual(table.probe(key), (6, 15, EXACT, 77))
+
+        stats = table.get_stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['stores'], 2)
+
+    def test_replacement_policy(self):
+        """
+        Ensure deep results stay in the depth-preferred entry while shallow ones go
+        to the always-replace entry
+        """
+        table = self.make_table(1)
+        stride = table.num_buckets
+        deep_key, shallow_key, other_key = 5, 5 + stride, 5 + 2 * stride
+
+        table.store(deep_key, 10, 1, EXACT, 1)
+        table.store(shallow_key, 2, 2, EXACT, 2)
+        table.store(other_key, 3, 3, EXACT, 3)
+
+        self.assertEqual(table.probe(deep_key), (10, 1, EXACT, 1))
+        # The always-replace entry was taken by the latest shallow store
+        self.assertIsNone(table.probe(shallow_key))
+        self.assertEqual(table.probe(other_key), (3, 3, EXACT, 3))
+        self.assertEqual(table.collisions, 1)
+
+        # After a new search, the old deep entry can be replaced
+        table.new_search()
+        table.store(shallow_key, 1, 4, LOWER_BOUND, 4)
+        self.assertEqual(table.probe(shallow_key), (1, 4, LOWER_BOUND, 4))
+        self.assertIsNone(table.probe(deep_key))
+
+    def test_clear(self):
+        """
+        Ensure clear empties the table and resets the counters
+        """
+        table = self.make_table(1)
+        table.store(99, 1, 1, EXACT)
+        table.probe(99)
+        table.clear()
+        self.assertIsNone(table.probe(99))
+        self.assertEqual(table.hits, 0)
+        self.assertEqual(table.hashfull(), 0)
+
+
+
+class TestSharedTranspositionTable(TestTranspositionTable):
+    """
+    Run the same tests for the SharedTranspositionTable class, and tests sharing it
+    between processes.
+    """
+
+    def make_table(self, size_mb):
+        table = SharedTranspositionTable(size_mb)
+        self.addCleanup(table.close)
+        return table
+
+    def test_shared_between_processes(self):
+        """
+        Ensure an entry stored by another process is found in this one
+        """
+        table = self.make_table(1)
+        key = 0x0F0F_0F0F_1234_5678
+        process = multiprocessing.Process(target=store_in_shared_table, args=(table.name, 1, key))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(table.probe(key), (7, 123, LOWER_BOUND, 456))
+
+    def test_torn_entry(self):
+        """
+        Ensure an entry whose data word does not go with its key word reads as a miss
+        """
+        table = self.make_table(1)
+        key = 0xDEAD_BEEF
+        table.store(key, 4, 10, EXACT, 9)
+        index = (key & table.bucket_mask) * 2
+        # Another process overwrote the data word only
+        table.data[index] = pack_entry(12, -500, UPPER_BOUND, 3)
+        self.assertIsNone(table.probe(key))
+        # Its key word follows, and the entry is whole again
+        other_key = key + table.num_buckets
+        table.keys[index] = other_key ^ table.data[index]
+        self.assertEqual(table.probe(other_key), (12, -500, UPPER_BOUND, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
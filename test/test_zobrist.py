@@ -0,0 +1,84 @@
+""" This module runs tests for the Zobrist keys kept by the Board """
+
+import unittest
+from src.board import Board
+from src.perft import get_legal_moves, move_name
+from src.zobrist import ZOBRIST_BLACK_TO_MOVE
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+
+def play(board, *names):
+    """
+    Plays moves given in coordinate notation, ie. 'g1f3'
+    """
+    for name in names:
+        moves = {move_name(move): move for move in get_legal_moves(board)}
+        board.make_move(moves[name])
+
+
+class TestZobrist(unittest.TestCase):
+    """
+    Run tests for incremental Zobrist hashing.
+    """
+
+    def check_tree(self, board, depth):
+        """
+        Walk the move tree, checking the incremental key against a full recompute
+        """
+        self.assertEqual(board.zobrist_key, board.compute_zobrist_key())
+        if depth == 0:
+            return
+        for move in get_legal_moves(board):
+            key = board.zobrist_key
+            board.make_move(move)
+            self.check_tree(board, depth - 1)
+            board.unmake_move()
+            self.assertEqual(board.zobrist_key, key)
+
+    def test_incremental_key_matches_recompute(self):
+        """
+        Ensure the key stays correct through captures, castling, en-passant and promotions
+        """
+        self.check_tree(Board.from_fen(KIWIPETE), 2)
+        self.check_tree(Board.from_fen(
+            'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1'), 2)
+
+    def test_transpositions(self):
+        """
+        Ensure that the same position reached by different move orders has the same key
+        """
+        board_1 = Board.from_fen()
+        play(board_1, 'g1f3', 'g8f6', 'b1c3', 'b8c6')
+        board_2 = Board.from_fen()
+        play(board_2, 'b1c3', 'b8c6', 'g1f3', 'g8f6')
+        self.assertEqual(board_1.zobrist_key, board_2.zobrist_key)
+
+        # Knights going out and back gives the starting position again
+        board_3 = Board.from_fen()
+        start_key = board_3.zobrist_key
+        play(board_3, 'g1f3', 'g8f6', 'f3g1', 'f6g8')
+        self.assertEqual(board_3.zobrist_key, start_key)
+
+    def test_state_is_hashed(self):
+        """
+        Ensure side to move, castling rights and capturable en-passant squares change the key
+        """
+        white = Board.from_fen('4k3/8/8/8/8/8/8/4K3 w - - 0 1')
+        black = Board.from_fen('4k3/8/8/8/8/8/8/4K3 b - - 0 1')
+        self.assertEqual(white.zobrist_key ^ black.zobrist_key, ZOBRIST_BLACK_TO_MOVE)
+
+        castling = Board.from_fen('r3k3/8/8/8/8/8/8/4K3 w q - 0 1')
+        no_castling = Board.from_fen('r3k3/8/8/8/8/8/8/4K3 w - - 0 1')
+        self.assertNotEqual(castling.zobrist_key, no_castling.zobrist_key)
+
+        # No black pawn can take on e3, so the en-passant square does not matter
+        self.assertEqual(Board.from_fen('4k3/8/8/8/4P3/8/8/4K3 b - e3 0 1').zobrist_key,
+                         Board.from_fen('4k3/8/8/8/4P3/8/8/4K3 b - - 0 1').zobrist_key)
+        # The pawn on d4 can take on e3
+        self.assertNotEqual(Board.from_fen('4k3/8/8/8/3pP3/8/8/4K3 b - e3 0 1').zobrist_key,
+                            Board.from_fen('4k3/8/8/8/3pP3/8/8/4K3 b - - 0 1').zobrist_key)
+
+
+if __name__ == '__main__':
+    unittest.main()